@@ -0,0 +1,87 @@
+"""
+Benchmark des moteurs de lecture XML (etree, lxml).
+
+Débit (Mo/s) et pic de mémoire résidente de l'extraction de toutes les
+couches, par moteur et par mode de lecture (arbre complet, flux et
+projection mmap), chaque mesure dans un processus séparé. La conformité des
+deux moteurs (sorties identiques) est vérifiée par tests/test_backends.py.
+
+Usage:
+    python benchmarks/bench_backends.py [--sizes 500 2000]
+"""
+
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+
+SRC_DIR = os.path.join(os.path.dirname(__file__), "..", "src")
+sys.path.insert(0, SRC_DIR)
+
+from extract_functions.backends import BACKENDS, parse  # noqa: E402
+from extract_functions.registry import extract_selected_layers  # noqa: E402
+from extract_functions.streaming import extract_layers_streaming  # noqa: E402
+from telepac_synthetique import (  # noqa: E402
+    NAMESPACE,
+    NAMESPACE_GML,
+    best_time,
+    write_telepac,
+)
+
+MODES = ("dom", "streaming", "mmap")
+
+
+def extract_all(xml_file, backend, mode):
+    """
+    Extraction de toutes les couches avec un moteur et un mode de lecture.
+    """
+    if mode in ("streaming", "mmap"):
+        return extract_layers_streaming(
+            xml_file, NAMESPACE, NAMESPACE_GML, backend=backend, mapped=mode == "mmap"
+        )
+    return extract_selected_layers(
+        parse(xml_file, backend=backend), NAMESPACE, NAMESPACE_GML
+    )
+
+
+def measure(backend, mode, xml_file):
+    """
+    Pic de RSS (Mo) et durée d'extraction (s) mesurés dans un sous-processus.
+    """
+    output = subprocess.run(
+        [sys.executable, __file__, "--run", backend, mode, xml_file],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    rss, duration = output.split()
+    return float(rss) / 1024, float(duration)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[500, 2000])
+    parser.add_argument("--run", nargs=3, metavar=("BACKEND", "MODE", "XML"))
+    args = parser.parse_args()
+
+    if args.run:
+        backend, mode, xml_file = args.run
+        duration, _ = best_time(extract_all, 1, xml_file, backend, mode)
+        print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, duration)
+        sys.exit(0)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        columns = [f"{backend} {mode}" for backend in BACKENDS for mode in MODES]
+        print(f"{'ilots':>8} {'Mo':>6} " + " ".join(f"{c:>26}" for c in columns))
+        for nb_ilots in args.sizes:
+            xml_file = os.path.join(tmp, f"telepac_{nb_ilots}.xml")
+            size = write_telepac(xml_file, nb_ilots=nb_ilots, nb_sna=nb_ilots)
+
+            cells = []
+            for backend in BACKENDS:
+                for mode in MODES:
+                    rss, duration = measure(backend, mode, xml_file)
+                    cells.append(f"{size / duration:6.1f} Mo/s {rss:7.0f} Mo RSS")
+            print(f"{nb_ilots:>8} {size:>6.1f} " + " ".join(f"{c:>26}" for c in cells))
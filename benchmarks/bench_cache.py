@@ -0,0 +1,47 @@
+"""
+Benchmark du cache des couches extraites : extraction sans cache, premier
+passage (cache vide, écriture) et passages suivants (lecture du cache).
+
+Les couches lues dans le cache sont comparées à celles de l'extraction.
+
+Usage:
+    python benchmarks/bench_cache.py [--nb_ilots 2000] [--repeat 3]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from read_xml import extract_layers  # noqa: E402
+from telepac_synthetique import best_time, write_telepac  # noqa: E402
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--nb_ilots", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        xml_file = os.path.join(tmp, "telepac.xml")
+        write_telepac(xml_file, nb_ilots=args.nb_ilots)
+        cache_dir = os.path.join(tmp, "cache")
+
+        t_sans, reference = best_time(extract_layers, 1, xml_file)
+        t_ecriture, _ = best_time(extract_layers, 1, xml_file, cache_dir=cache_dir)
+        t_lecture, cached = best_time(
+            extract_layers, args.repeat, xml_file, cache_dir=cache_dir
+        )
+
+        for layer, df in reference.items():
+            assert cached[layer].equals(df), layer
+        size = sum(entry.stat().st_size for entry in os.scandir(cache_dir))
+
+        print(f"Fichier xml       : {os.path.getsize(xml_file) / 1024**2:.1f} Mo")
+        print(f"Cache             : {size / 1024**2:.1f} Mo")
+        print(f"Sans cache        : {t_sans:.3f} s")
+        print(f"Cache vide        : {t_ecriture:.3f} s")
+        print(f"Lecture du cache  : {t_lecture:.3f} s")
+        print(f"Gain              : {t_sans / t_lecture:.1f}x")
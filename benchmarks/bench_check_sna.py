@@ -0,0 +1,89 @@
+"""
+Benchmark du contrôle des intersections des SNA avec les parcelles : index
+spatial (STRtree) et calcul en bloc de check_sna, contre un parcours naïf de
+toutes les paires SNA × parcelles (une comparaison de chaque SNA à toutes les
+parcelles).
+
+Sont mesurées la recherche des paires proches par chaque méthode (paires
+identiques, voir tests/test_check_sna.py) et le calcul vectorisé des longueurs de
+bordure et surfaces des paires, les couches étant extraites une fois.
+
+Usage:
+    python benchmarks/bench_check_sna.py [--sizes 200 1000 3000] [--repeat 3]
+"""
+
+import argparse
+import io
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from check_sna import TOLERANCE, border_lengths, sna_pairs  # noqa: E402
+from extract_functions.backends import parse  # noqa: E402
+from extract_functions.registry import extract_selected_layers  # noqa: E402
+from extract_functions.reprojection import LAMBERT93  # noqa: E402
+from telepac_synthetique import (  # noqa: E402
+    NAMESPACE,
+    NAMESPACE_GML,
+    best_time,
+    generate_telepac,
+)
+
+
+def naive_pairs(sna_geometries, geometries, tolerance=TOLERANCE):
+    """
+    Paires SNA / géométrie proches, sans index : chaque SNA est comparée à
+    toutes les géométries.
+    """
+    import shapely
+
+    sna_index, index = [], []
+    for i, sna in enumerate(sna_geometries):
+        (found,) = np.nonzero(shapely.dwithin(sna, geometries, tolerance))
+        sna_index.extend([i] * len(found))
+        index.extend(found)
+    return np.array(sna_index, dtype=int), np.array(index, dtype=int)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[200, 1000, 3000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(
+        f"{'SNA':>8} {'parcelles':>10} {'paires':>8} {'naïf (s)':>10}"
+        f" {'STRtree (s)':>12} {'':>6} {'longueurs (s)':>13}"
+    )
+    for nb_sna in args.sizes:
+        xml = generate_telepac(nb_ilots=nb_sna, nb_sna=nb_sna, sna_distance=150)
+        layers = extract_selected_layers(
+            parse(io.BytesIO(xml.encode("utf-8"))),
+            NAMESPACE,
+            NAMESPACE_GML,
+            layers=["parcelles", "sna"],
+            crs=LAMBERT93,
+        )
+        sna_geometries = np.asarray(layers["sna"].geometry.array)
+        geometries = np.asarray(layers["parcelles"].geometry.array)
+
+        naive, _ = best_time(naive_pairs, args.repeat, sna_geometries, geometries)
+        indexed, (sna_index, index) = best_time(
+            sna_pairs, args.repeat, sna_geometries, geometries
+        )
+        lengths, _ = best_time(
+            border_lengths,
+            args.repeat,
+            sna_geometries,
+            geometries,
+            sna_index,
+            index,
+        )
+        print(
+            f"{nb_sna:>8} {len(geometries):>10} {len(index):>8}"
+            f" {naive:>10.3f} {indexed:>12.3f} (x{naive / indexed:4.0f})"
+            f" {lengths:>13.3f}"
+        )
@@ -0,0 +1,142 @@
+"""
+Benchmark de la représentation des enregistrements pendant l'extraction :
+colonnes typées (ColumnBuilder, codes catégoriels) contre une liste de
+dictionnaires, un par enregistrement (représentation historique).
+
+Le document est lu une seule fois ; sont mesurés, pour chaque
+représentation, la mémoire Python (tracemalloc) des données collectées
+et la durée de la collecte et de la construction des GeoDataFrame, ainsi que
+la mémoire occupée par les DataFrame obtenus.
+
+Usage:
+    python benchmarks/bench_columns.py [--nb_ilots 5000] [--repeat 3]
+"""
+
+import argparse
+import gc
+import io
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from extract_functions.backends import parse  # noqa: E402
+from extract_functions.columns import ColumnBuilder  # noqa: E402
+from extract_functions.registry import RECORD_LAYERS, load  # noqa: E402
+from extract_functions.walk_ilots import ILOT_COLLECTORS  # noqa: E402
+from telepac_synthetique import (  # noqa: E402
+    NAMESPACE,
+    NAMESPACE_GML,
+    best_time,
+    generate_telepac,
+)
+
+
+class RowBuilder:
+    """
+    Référence : même interface que ColumnBuilder, un dictionnaire par
+    enregistrement.
+    """
+
+    def __init__(self):
+        self.rows = []
+        self.row = {}
+
+    def __len__(self):
+        return len(self.rows)
+
+    def add(self, name, value):
+        self.row[name] = value
+
+    def update(self, values, prefix=""):
+        for name, value in values.items():
+            self.add(prefix + name if prefix else name, value)
+
+    def end_row(self):
+        self.rows.append(self.row)
+        self.row = {}
+
+    def to_columns(self):
+        return self.rows
+
+
+def collectors():
+    """
+    Collecteurs et constructions de toutes les couches géographiques :
+    [(couche, tag de l'enregistrement, collecteur, construction)]
+    """
+    result = [
+        (layer, "ilot", collect, build)
+        for layer, (collect, build) in ILOT_COLLECTORS.items()
+    ]
+    for layer, (module, tag) in RECORD_LAYERS.items():
+        collect = load(module, f"collect_{layer}")
+        result.append((layer, tag, collect, load(module, f"build_{layer}")))
+    return result
+
+
+def collect_all(xml_root, builder):
+    """
+    Collecte de toutes les couches dans des données de type builder.
+    """
+    collected = []
+    for layer, tag, collect, build in collectors():
+        records, geometries = builder(), []
+        for elem in xml_root.iter(f"{NAMESPACE}{tag}"):
+            collect(elem, NAMESPACE, NAMESPACE_GML, records, geometries)
+        collected.append((layer, build, records, geometries))
+    return collected
+
+
+def measure(xml_root, builder, repeat):
+    """
+    Mémoire des données collectées (Mo), durée de la collecte et de la
+    construction (s) et mémoire des GeoDataFrame obtenus (Mo).
+    """
+    gc.collect()
+    tracemalloc.start()
+    collected = collect_all(xml_root, builder)
+    retained = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del collected
+
+    duration, layers = best_time(
+        lambda: {
+            layer: build(records, geometries)
+            for layer, build, records, geometries in collect_all(xml_root, builder)
+        },
+        repeat,
+    )
+    frames = sum(
+        gdf.drop(columns="geometry").memory_usage(deep=True).sum()
+        for gdf in layers.values()
+    )
+    return retained / 1024**2, duration, frames / 1024**2
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--nb_ilots", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    xml = generate_telepac(
+        nb_ilots=args.nb_ilots, nb_sna=args.nb_ilots, nb_vertices=8
+    ).encode("utf-8")
+    xml_root = parse(io.BytesIO(xml))
+    print(f"Fichier xml : {len(xml) / 1024**2:.1f} Mo, {args.nb_ilots} ilots")
+
+    print(
+        f"{'représentation':>22} {'collecte (Mo)':>14} {'durée (s)':>10}"
+        f" {'DataFrame (Mo)':>15}"
+    )
+    reference = None
+    for name, builder in (("dictionnaires", RowBuilder), ("colonnes", ColumnBuilder)):
+        retained, duration, frames = measure(xml_root, builder, args.repeat)
+        reference = reference or (retained, duration, frames)
+        print(
+            f"{name:>22} {retained:>9.1f} (x{reference[0] / retained:4.1f})"
+            f" {duration:>10.3f} (x{reference[1] / duration:4.2f})"
+            f" {frames:>9.1f} (x{reference[2] / frames:4.1f})"
+        )
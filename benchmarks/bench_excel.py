@@ -0,0 +1,89 @@
+"""
+Benchmark d'écriture excel d'un grand onglet de parcelles :
+pd.ExcelWriter (openpyxl, ancien chemin) contre write_excel (xlsxwriter en
+mémoire constante, types numériques).
+
+Usage:
+    python benchmarks/bench_excel.py [--nb_ilots 5000] [--nb_parcelles 10]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import tracemalloc
+import xml.etree.ElementTree as ET
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from extract_functions.walk_ilots import extract_ilot_layers  # noqa: E402
+from output_functions.excel import write_excel  # noqa: E402
+from telepac_synthetique import (  # noqa: E402
+    NAMESPACE,
+    NAMESPACE_GML,
+    best_time,
+    generate_telepac,
+)
+
+
+def write_openpyxl(layers, excel_filename):
+    """
+    Ancien chemin : pd.ExcelWriter et to_excel, géométries converties en texte.
+    """
+    with pd.ExcelWriter(excel_filename, engine="openpyxl") as writer:
+        pd.DataFrame(layers["parcelles"]).to_excel(
+            writer, sheet_name="Parcelles", index=False
+        )
+
+
+def write_streaming(layers, excel_filename):
+    """
+    Nouveau chemin : write_excel.
+    """
+    write_excel({"parcelles": layers["parcelles"]}, excel_filename)
+
+
+def measure(func, layers, excel_filename):
+    """
+    Durée (s) puis pic de mémoire Python (Mo) d'une écriture.
+    """
+    duration, _ = best_time(func, 1, layers, excel_filename)
+
+    tracemalloc.start()
+    func(layers, excel_filename)
+    peak = tracemalloc.get_traced_memory()[1] / 1024**2
+    tracemalloc.stop()
+    return duration, peak, os.path.getsize(excel_filename) / 1024**2
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--nb_ilots", type=int, default=5000)
+    parser.add_argument("--nb_parcelles", type=int, default=10)
+    parser.add_argument("--nb_vertices", type=int, default=20)
+    args = parser.parse_args()
+
+    xml_root = ET.fromstring(
+        generate_telepac(
+            nb_ilots=args.nb_ilots,
+            nb_parcelles=args.nb_parcelles,
+            nb_vertices=args.nb_vertices,
+        )
+    )
+    layers = extract_ilot_layers(xml_root, NAMESPACE, NAMESPACE_GML, ["parcelles"])
+    print(f"Onglet Parcelles : {len(layers['parcelles'])} lignes")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, func in [
+            ("openpyxl", write_openpyxl),
+            ("xlsxwriter", write_streaming),
+        ]:
+            duration, peak, size = measure(
+                func, layers, os.path.join(tmp, f"{name}.xlsx")
+            )
+            print(
+                f"{name:>12} : {duration:7.2f} s, pic mémoire {peak:7.1f} Mo, "
+                f"fichier {size:6.1f} Mo"
+            )
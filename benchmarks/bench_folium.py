@@ -0,0 +1,61 @@
+"""
+Benchmark de la visu Folium : taille du fichier html et durée de génération
+de la visu complète, de la visu allégée (géométries simplifiées, coordonnées
+arrondies, champs des infobulles) et de la visu allégée avec fichiers JS/CSS
+partagés.
+
+Les couches sont extraites une seule fois, seule la génération est mesurée.
+
+Usage:
+    python benchmarks/bench_folium.py [--nb_ilots 200] [--nb_vertices 200] [--repeat 3]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from read_xml import extract_layers, visu_folium_extracted  # noqa: E402
+from telepac_synthetique import best_time, write_telepac  # noqa: E402
+
+# Variantes mesurées : {nom: options de visu_folium_layers}
+VARIANTS = {
+    "complète": {},
+    "allégée": {"light": True},
+    "allégée zoom 16": {"light": True, "zoom": 16, "precision": 5},
+    "allégée + assets": {"light": True, "assets_url": "../assets"},
+}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--nb_ilots", type=int, default=200)
+    parser.add_argument("--nb_vertices", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        xml_file = os.path.join(tmp, "telepac.xml")
+        size = write_telepac(
+            xml_file,
+            nb_ilots=args.nb_ilots,
+            nb_sna=args.nb_ilots,
+            nb_vertices=args.nb_vertices,
+        )
+        extracted = extract_layers(xml_file)
+        print(f"Fichier xml : {size:.1f} Mo")
+
+        reference = None
+        for name, options in VARIANTS.items():
+            html_output = os.path.join(tmp, "visu.html")
+            duration, _ = best_time(
+                visu_folium_extracted, args.repeat, extracted, html_output, **options
+            )
+            size = os.path.getsize(html_output) / 1024**2
+            reference = reference or (size, duration)
+            print(
+                f"{name:>18} : {size:7.2f} Mo (x{reference[0] / size:5.1f})"
+                f" {duration:7.3f} s (x{reference[1] / duration:5.1f})"
+            )
@@ -0,0 +1,131 @@
+"""
+Benchmark et contrôle de parité du décodage gml natif face au chemin OGR.
+
+Les échantillons comprennent les polygones du notebook
+notebooks/read_gml_with_gdal.ipynb, un polygone troué, un point et des
+variantes GML 3 (gml:posList, gml:pos). Sans GDAL, seul le décodage natif
+est chronométré ; le décodage lui-même est vérifié par tests/test_gml.py.
+
+Usage:
+    python benchmarks/bench_gml.py [--nb_polygons 5000] [--nb_vertices 50]
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import xml.etree.ElementTree as ET
+
+import shapely
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from extract_functions import gml  # noqa: E402
+from telepac_synthetique import (  # noqa: E402
+    NAMESPACE_GML,
+    NAMESPACE_GML_URI,
+    best_time,
+    polygon_gml,
+)
+
+NOTEBOOK = os.path.join(
+    os.path.dirname(__file__), "..", "notebooks", "read_gml_with_gdal.ipynb"
+)
+
+AUTRES_ECHANTILLONS = [
+    # Polygone troué (GML 2)
+    "<gml:Polygon><gml:outerBoundaryIs><gml:LinearRing><gml:coordinates>"
+    "0,0 100,0 100,100 0,100 0,0</gml:coordinates></gml:LinearRing>"
+    "</gml:outerBoundaryIs><gml:innerBoundaryIs><gml:LinearRing><gml:coordinates>"
+    "10,10 20,10 20,20 10,20 10,10</gml:coordinates></gml:LinearRing>"
+    "</gml:innerBoundaryIs></gml:Polygon>",
+    # Point (GML 2)
+    "<gml:Point><gml:coordinates>431244.2409999967,6288499.064</gml:coordinates>"
+    "</gml:Point>",
+    # Polygone GML 3 (gml:posList)
+    "<gml:Polygon><gml:exterior><gml:LinearRing><gml:posList>"
+    "0 0 50 0 50 50 0 0</gml:posList></gml:LinearRing></gml:exterior></gml:Polygon>",
+    # Point GML 3 (gml:pos)
+    "<gml:Point><gml:pos>425133.3533 6289122.005</gml:pos></gml:Point>",
+]
+
+
+def echantillons_notebook():
+    """
+    Géométries gml définies dans les cellules du notebook.
+    """
+    with open(NOTEBOOK, encoding="utf-8") as f:
+        notebook = json.load(f)
+    source = "\n".join("".join(cell["source"]) for cell in notebook["cells"])
+    return re.findall(r"gml_txt = '''(.*?)'''", source, flags=re.S)
+
+
+def parse_gml(txt):
+    """
+    Élément gml à partir d'un texte sans déclaration de namespace.
+    """
+    root = ET.fromstring(f'<racine xmlns:gml="{NAMESPACE_GML_URI}">{txt}</racine>')
+    return root[0]
+
+
+def decode_natif(elements):
+    """
+    Décodage natif puis construction en bloc.
+    """
+    decoded = [gml.read_geometry(elem, NAMESPACE_GML) for elem in elements]
+    return gml.build_geometries(decoded)
+
+
+def decode_ogr(elements):
+    """
+    Décodage historique : ET.tostring puis OGR puis WKB.
+    """
+    return [gml.ogr_geometry(elem) for elem in elements]
+
+
+def controle_parite(elements):
+    """
+    Vérifie que les deux chemins donnent exactement les mêmes géométries.
+    """
+    natif = decode_natif(elements)
+    for i, (geom_natif, geom_ogr) in enumerate(zip(natif, decode_ogr(elements))):
+        assert shapely.equals_exact(
+            geom_natif, geom_ogr, tolerance=0
+        ), f"Échantillon {i} : {geom_natif.wkt[:80]} != {geom_ogr.wkt[:80]}"
+    return len(natif)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--nb_polygons", type=int, default=5000)
+    parser.add_argument("--nb_vertices", type=int, default=50)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    echantillons = [
+        parse_gml(txt) for txt in echantillons_notebook() + AUTRES_ECHANTILLONS
+    ]
+    polygones = [
+        parse_gml(polygon_gml(430000, 6280000, 500, args.nb_vertices, rng))
+        for _ in range(args.nb_polygons)
+    ]
+
+    # Le décodage natif seul doit fonctionner sans GDAL
+    natif = decode_natif(echantillons)
+    print(f"Décodage natif des échantillons : {len(natif)} géométries")
+
+    if gml.load_ogr() is None:
+        print("GDAL absent : contrôle de parité et comparaison OGR ignorés")
+    else:
+        nb = controle_parite(echantillons + polygones[:100])
+        print(f"Parité OGR vérifiée sur {nb} géométries")
+
+    t_natif, _ = best_time(decode_natif, 1, polygones)
+    print(f"Natif : {args.nb_polygons} polygones en {t_natif:.3f} s")
+
+    if gml.load_ogr() is not None:
+        t_ogr, _ = best_time(decode_ogr, 1, polygones)
+        print(f"OGR   : {args.nb_polygons} polygones en {t_ogr:.3f} s")
+        print(f"Gain  : {t_ogr / t_natif:.1f}x")
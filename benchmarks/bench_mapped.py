@@ -0,0 +1,90 @@
+"""
+Benchmark de la lecture projetée en mémoire (mmap) des fichiers XML telepac.
+
+Sont mesurés :
+- le repérage des bornes des producteurs et enregistrements (débit en Mo/s
+  du parcours des octets de la projection) ;
+- l'extraction de quelques couches, en flux (iterparse, qui analyse tout le
+  document) et en lecture projetée (seules les plages des enregistrements
+  demandés sont analysées). L'identité des couches extraites est vérifiée
+  par tests/test_mapped.py.
+
+Usage:
+    python benchmarks/bench_mapped.py [--sizes 1000 5000] [--repeat 3]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from extract_functions.mapped import map_file, scan_boundaries  # noqa: E402
+from extract_functions.streaming import extract_layers_streaming  # noqa: E402
+from telepac_synthetique import (  # noqa: E402
+    NAMESPACE,
+    NAMESPACE_GML,
+    best_time,
+    write_telepac,
+)
+
+# Sélections de couches mesurées
+SELECTIONS = {
+    "demandeur": ["demandeur"],
+    "sna": ["sna"],
+    "ilots": ["ilots", "parcelles"],
+    "toutes": None,
+}
+
+
+def scan(xml_file):
+    """
+    Repérage des bornes du fichier projeté en mémoire.
+    """
+    with map_file(xml_file) as buffer:
+        return scan_boundaries(buffer)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for nb_ilots in args.sizes:
+            xml_file = os.path.join(tmp, f"telepac_{nb_ilots}.xml")
+            size = write_telepac(
+                xml_file, nb_ilots=nb_ilots, nb_sna=nb_ilots, nb_zdh=nb_ilots // 10
+            )
+
+            duration, boundaries = best_time(scan, args.repeat, xml_file)
+            print(
+                f"{nb_ilots} ilots, {size:.1f} Mo : repérage de "
+                f"{len(boundaries['records'])} enregistrements en {duration:.3f}s "
+                f"({size / duration:.0f} Mo/s)"
+            )
+            print(f"{'couches':>12} {'flux (s)':>10} {'mmap (s)':>10}")
+            for name, layers in SELECTIONS.items():
+                streamed, _ = best_time(
+                    extract_layers_streaming,
+                    args.repeat,
+                    xml_file,
+                    NAMESPACE,
+                    NAMESPACE_GML,
+                    layers,
+                )
+                mapped, _ = best_time(
+                    extract_layers_streaming,
+                    args.repeat,
+                    xml_file,
+                    NAMESPACE,
+                    NAMESPACE_GML,
+                    layers,
+                    mapped=True,
+                )
+                print(
+                    f"{name:>12} {streamed:>10.3f} {mapped:>10.3f}"
+                    f" (x{streamed / mapped:4.1f})"
+                )
@@ -0,0 +1,67 @@
+"""
+Benchmark de l'extraction parallèle (plages d'enregistrements réparties sur
+un pool de processus) d'un fichier XML telepac volumineux.
+
+Pour chaque taille, l'extraction de toutes les couches est mesurée en série
+(lecture projetée en mémoire, un seul processus) puis en parallèle avec
+chaque nombre de processus demandé (couches identiques, voir
+tests/test_parallel.py). Le démarrage du pool (import de shapely dans chaque
+processus) est compris dans la mesure : le gain n'apparaît que sur les gros
+fichiers, et reste borné par le nombre de processeurs de la machine.
+
+Usage:
+    python benchmarks/bench_parallel.py [--sizes 5000 20000] [--workers 1 2 4]
+                                        [--repeat 3]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from extract_functions.parallel import extract_layers_parallel  # noqa: E402
+from extract_functions.streaming import extract_layers_streaming  # noqa: E402
+from telepac_synthetique import (  # noqa: E402
+    NAMESPACE,
+    NAMESPACE_GML,
+    best_time,
+    write_telepac,
+)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[5000, 20000])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{os.cpu_count()} processeurs")
+    with tempfile.TemporaryDirectory() as tmp:
+        for nb_ilots in args.sizes:
+            xml_file = os.path.join(tmp, f"telepac_{nb_ilots}.xml")
+            size = write_telepac(
+                xml_file, nb_ilots=nb_ilots, nb_sna=nb_ilots, nb_zdh=nb_ilots // 10
+            )
+
+            serial, _ = best_time(
+                extract_layers_streaming,
+                args.repeat,
+                xml_file,
+                NAMESPACE,
+                NAMESPACE_GML,
+                mapped=True,
+            )
+            print(f"{nb_ilots} ilots, {size:.1f} Mo : série {serial:.3f}s")
+            print(f"{'processus':>10} {'durée (s)':>10} {'accélération':>13}")
+            for workers in args.workers:
+                duration, _ = best_time(
+                    extract_layers_parallel,
+                    args.repeat,
+                    xml_file,
+                    NAMESPACE,
+                    NAMESPACE_GML,
+                    workers=workers,
+                )
+                print(f"{workers:>10} {duration:>10.3f} {serial / duration:>12.2f}x")
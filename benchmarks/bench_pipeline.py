@@ -0,0 +1,63 @@
+"""
+Benchmark de l'extraction en pipeline : durée du traitement complet d'un
+fichier (excel, visu Folium, GeoParquet) en séquentiel et en pipeline, pour
+plusieurs nombres de threads de décodage.
+
+Les couches extraites en pipeline sont comparées à celles du traitement
+séquentiel.
+
+Usage:
+    python benchmarks/bench_pipeline.py [--nb_ilots 2000] [--threads 1 2 4]
+                                        [--streaming] [--repeat 3]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from read_xml import process_xml  # noqa: E402
+from telepac_synthetique import best_time, write_telepac  # noqa: E402
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--nb_ilots", type=int, default=2000)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--streaming", action="store_true")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        xml_file = os.path.join(tmp, "telepac.xml")
+        size = write_telepac(xml_file, nb_ilots=args.nb_ilots, nb_sna=args.nb_ilots)
+        print(f"Fichier xml : {size:.1f} Mo")
+
+        def run(name, **options):
+            output_dir = os.path.join(tmp, name)
+            return process_xml(
+                xml_file,
+                output_dir,
+                visu_folium=True,
+                parquet_dir=os.path.join(output_dir, "parquet"),
+                streaming=args.streaming,
+                **options,
+            )
+
+        t_sequentiel, reference = best_time(run, args.repeat, "sequentiel")
+        print(f"{'séquentiel':>20} : {t_sequentiel:.3f} s")
+
+        for threads in args.threads:
+            duration, extracted = best_time(
+                run, args.repeat, f"pipeline_{threads}", pipeline=True, threads=threads
+            )
+            assert list(extracted) == list(reference)
+            for layer, df in reference.items():
+                pd.testing.assert_frame_equal(extracted[layer], df, obj=layer)
+            print(
+                f"{f'pipeline {threads} thread(s)':>20} : {duration:.3f} s "
+                f"(x{t_sequentiel / duration:.2f})"
+            )
@@ -0,0 +1,70 @@
+"""
+Benchmark de la reprojection des couches géographiques en WGS84 :
+un to_crs par couche (ancien chemin) contre reproject_layers (transformateur
+partagé, coordonnées de toutes les couches transformées en bloc).
+
+Les géométries obtenues par les deux chemins sont comparées.
+
+Usage:
+    python benchmarks/bench_reprojection.py [--nb_ilots 2000] [--repeat 3]
+"""
+
+import argparse
+import os
+import sys
+import xml.etree.ElementTree as ET
+
+import shapely
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from extract_functions.registry import GEO_LAYERS, extract_selected_layers  # noqa: E402
+from extract_functions.reprojection import (  # noqa: E402
+    LAMBERT93,
+    WGS84,
+    reproject_layers,
+)
+from telepac_synthetique import (  # noqa: E402
+    NAMESPACE,
+    NAMESPACE_GML,
+    best_time,
+    generate_telepac,
+)
+
+
+def reproject_to_crs(layers):
+    """
+    Ancien chemin : un to_crs par couche.
+    """
+    return {name: gdf.to_crs(crs=WGS84) for name, gdf in layers.items()}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--nb_ilots", type=int, default=2000)
+    parser.add_argument("--nb_vertices", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    xml_root = ET.fromstring(
+        generate_telepac(nb_ilots=args.nb_ilots, nb_vertices=args.nb_vertices)
+    )
+    layers = extract_selected_layers(
+        xml_root, NAMESPACE, NAMESPACE_GML, GEO_LAYERS, crs=LAMBERT93
+    )
+    nb = sum(len(gdf) for gdf in layers.values())
+    print(f"{len(layers)} couches, {nb} géométries")
+
+    t_old, res_old = best_time(reproject_to_crs, args.repeat, layers)
+    t_new, res_new = best_time(reproject_layers, args.repeat, layers, WGS84)
+
+    for name in layers:
+        assert res_new[name].crs == res_old[name].crs, name
+        assert shapely.equals_exact(
+            res_new[name].geometry.values, res_old[name].geometry.values, 1e-9
+        ).all(), name
+    print("Géométries identiques aux to_crs par couche")
+
+    print(f"to_crs par couche : {t_old:.3f} s")
+    print(f"reproject_layers  : {t_new:.3f} s")
+    print(f"Gain              : {t_old / t_new:.1f}x")
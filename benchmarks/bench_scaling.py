@@ -0,0 +1,248 @@
+"""
+Suite de benchmarks de passage à l'échelle : durée et pic de mémoire Python
+(tracemalloc) de chaque étape du traitement d'un fichier XML telepac, sur des
+déclarations synthétiques de plusieurs tailles.
+
+Étapes mesurées :
+- lecture : recensement des éléments (scan_xml), lecture de l'arbre
+- extraction : chaque extracteur de extract_functions, puis toutes les
+  couches par le registre (arbre complet) et en flux
+- sorties : fichier excel, jeux de données GeoParquet, visu Folium complète
+  et allégée
+
+Pour chaque étape, la courbe de passage à l'échelle est résumée par son
+exposant (pente log-log de la durée en fonction du nombre d'ilots : 1 pour
+une étape linéaire). Les résultats peuvent être enregistrés (--output) puis
+comparés à une référence (--baseline) : les étapes plus lentes ou plus
+gourmandes que la référence au-delà de la tolérance sont signalées et le
+script s'arrête en erreur.
+
+Usage:
+    python benchmarks/bench_scaling.py [--sizes 100 300 1000] [--repeat 3]
+                                       [--stages STAGE [STAGE ...]]
+                                       [--output resultats.json]
+                                       [--baseline reference.json] [--tolerance 0.25]
+"""
+
+import argparse
+import json
+import math
+import os
+import sys
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from extract_functions.backends import parse  # noqa: E402
+from extract_functions.registry import (  # noqa: E402
+    ILOT_LAYERS,
+    RECORD_LAYERS,
+    TABULAR_LAYERS,
+    extract_selected_layers,
+    load,
+)
+from extract_functions.streaming import extract_layers_streaming  # noqa: E402
+from output_functions.excel import write_excel  # noqa: E402
+from output_functions.parquet import write_layers_parquet  # noqa: E402
+from read_xml import visu_folium_extracted  # noqa: E402
+from scan_xml import census_elements  # noqa: E402
+from telepac_synthetique import (  # noqa: E402
+    NAMESPACE,
+    NAMESPACE_GML,
+    best_time,
+    write_telepac,
+)
+
+# Extracteurs publics : (module, fonction)
+EXTRACTORS = (
+    [(f"extract_{layer}", f"extract_{layer}") for layer in ILOT_LAYERS]
+    + [(module, f"extract_{layer}") for layer, (module, _) in RECORD_LAYERS.items()]
+    + [(module, module) for module in TABULAR_LAYERS.values()]
+)
+
+
+def synthetic_xml(xml_file, nb_ilots):
+    """
+    Écrit la déclaration synthétique de nb_ilots ilots, les autres éléments
+    étant proportionnels au nombre d'ilots, et retourne sa taille en Mo.
+    """
+    return write_telepac(
+        xml_file,
+        nb_ilots=nb_ilots,
+        nb_sna=nb_ilots,
+        nb_sna_points=nb_ilots // 2,
+        nb_zdh=max(nb_ilots // 10, 1),
+    )
+
+
+def stages(xml_file, tmp):
+    """
+    Étapes mesurées sur xml_file : {nom: fonction sans argument}.
+
+    L'arbre et les couches utilisés par les extracteurs et les sorties sont
+    préparés une fois, hors mesure.
+    """
+    xml_root = parse(xml_file)
+    extracted = extract_selected_layers(xml_root, NAMESPACE, NAMESPACE_GML)
+
+    result = {
+        "scan": lambda: census_elements(xml_file),
+        "parse": lambda: parse(xml_file),
+    }
+    for module, function in EXTRACTORS:
+        extract = load(module, function)
+        result[function] = lambda extract=extract: extract(
+            xml_root, NAMESPACE, NAMESPACE_GML
+        )
+    result["extract_layers"] = lambda: extract_selected_layers(
+        parse(xml_file), NAMESPACE, NAMESPACE_GML
+    )
+    result["extract_layers_streaming"] = lambda: extract_layers_streaming(
+        xml_file, NAMESPACE, NAMESPACE_GML
+    )
+    result["excel"] = lambda: write_excel(extracted, os.path.join(tmp, "output.xlsx"))
+    result["parquet"] = lambda: write_layers_parquet(
+        extracted, os.path.join(tmp, "parquet")
+    )
+    result["folium"] = lambda: visu_folium_extracted(
+        extracted, os.path.join(tmp, "visu.html")
+    )
+    result["folium_light"] = lambda: visu_folium_extracted(
+        extracted, os.path.join(tmp, "visu.html"), light=True
+    )
+    return result
+
+
+def measure(func, repeat):
+    """
+    Durée minimale sur repeat exécutions (s) et pic de mémoire Python (Mo)
+    d'une étape, la mémoire étant mesurée sur une exécution à part.
+    """
+    duration, _ = best_time(func, repeat)
+
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1] / 1024**2
+    tracemalloc.stop()
+    return duration, peak
+
+
+def exponent(sizes, values):
+    """
+    Pente de la régression log-log de values en fonction de sizes.
+    """
+    points = [
+        (math.log(size), math.log(value))
+        for size, value in zip(sizes, values)
+        if value > 0
+    ]
+    if len(points) < 2:
+        return float("nan")
+    mean_x = sum(x for x, _ in points) / len(points)
+    mean_y = sum(y for _, y in points) / len(points)
+    variance = sum((x - mean_x) ** 2 for x, _ in points)
+    if variance == 0:
+        return float("nan")
+    return sum((x - mean_x) * (y - mean_y) for x, y in points) / variance
+
+
+def run(sizes, repeat, selected=None):
+    """
+    Mesure des étapes à chaque taille, par ordre croissant des tailles.
+
+    Retourne {"sizes": [...], "megabytes": [...], "stages": {étape:
+    {"duration": [...], "memory": [...]}}}.
+    """
+    sizes = sorted(sizes)
+    results = {"sizes": sizes, "megabytes": [], "stages": {}}
+    for nb_ilots in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            xml_file = os.path.join(tmp, "telepac.xml")
+            results["megabytes"].append(synthetic_xml(xml_file, nb_ilots))
+
+            for name, func in stages(xml_file, tmp).items():
+                if selected and name not in selected:
+                    continue
+                if name not in results["stages"]:
+                    # Première taille : exécution à blanc (imports, caches)
+                    func()
+                duration, peak = measure(func, repeat)
+                stage = results["stages"].setdefault(
+                    name, {"duration": [], "memory": []}
+                )
+                stage["duration"].append(duration)
+                stage["memory"].append(peak)
+    return results
+
+
+def report(results):
+    """
+    Affiche durées, pics de mémoire et exposants de chaque étape.
+    """
+    sizes = results["sizes"]
+    header = " ".join(f"{size:>16}" for size in sizes)
+    print(f"{'ilots':>26} {header} {'exposant':>9}")
+    megabytes = " ".join(f"{mb:>13.1f} Mo" for mb in results["megabytes"])
+    print(f"{'fichier':>26} {megabytes}")
+    for name, stage in results["stages"].items():
+        cells = " ".join(
+            f"{duration:>7.3f}s {peak:>6.1f}Mo"
+            for duration, peak in zip(stage["duration"], stage["memory"])
+        )
+        print(f"{name:>26} {cells} {exponent(sizes, stage['duration']):>9.2f}")
+
+
+def regressions(results, baseline, tolerance):
+    """
+    Étapes plus lentes ou plus gourmandes que la référence au-delà de la
+    tolérance (proportion), aux tailles mesurées dans les deux cas.
+
+    Retourne la liste des messages de régression.
+    """
+    messages = []
+    for name, stage in results["stages"].items():
+        reference = baseline["stages"].get(name)
+        if reference is None:
+            continue
+        for i, size in enumerate(results["sizes"]):
+            if size not in baseline["sizes"]:
+                continue
+            j = baseline["sizes"].index(size)
+            for metric in ("duration", "memory"):
+                value, expected = stage[metric][i], reference[metric][j]
+                if expected > 0 and value > expected * (1 + tolerance):
+                    messages.append(
+                        f"{name}, {size} ilots, {metric} : "
+                        f"{value:.3f} contre {expected:.3f} "
+                        f"(+{100 * (value / expected - 1):.0f} %)"
+                    )
+    return messages
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 300, 1000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--stages", type=str, nargs="+", default=None)
+    parser.add_argument("--output", type=str, default=None)
+    parser.add_argument("--baseline", type=str, default=None)
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args()
+
+    results = run(args.sizes, args.repeat, args.stages)
+    report(results)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        messages = regressions(results, baseline, args.tolerance)
+        for message in messages:
+            print(f"RÉGRESSION {message}")
+        if messages:
+            sys.exit(1)
+        print(f"Aucune régression (tolérance {100 * args.tolerance:.0f} %)")
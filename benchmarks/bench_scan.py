@@ -0,0 +1,88 @@
+"""
+Benchmark de passage à l'échelle du scan des éléments (scan_xml.py).
+
+Le recensement en un seul parcours (arbre complet et flux) doit avoir une
+durée par Mo à peu près constante quand la taille du fichier augmente.
+L'ancien scan (un findall sur tout l'arbre par élément, puis un count par
+élément unique), quadratique, n'est mesuré que jusqu'à --max_ilots_ancien.
+L'identité des recensements en flux et sur l'arbre complet est vérifiée par
+tests/test_streaming.py.
+
+Usage:
+    python benchmarks/bench_scan.py [--sizes 250 500 1000 2000 4000]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import xml.etree.ElementTree as ET
+from collections import Counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from scan_xml import census_elements  # noqa: E402
+from telepac_synthetique import NAMESPACE, best_time, write_telepac  # noqa: E402
+
+
+def scan_ancien(xml_filename):
+    """
+    Ancien chemin : findall sur tout l'arbre pour chaque élément, puis
+    count sur la liste pour chaque élément unique.
+    """
+    xml = ET.parse(xml_filename)
+    list_elem = list()
+    list_attrib = list()
+    for elem in xml.getroot().iter():
+        i = elem.tag.find("}")
+        if i >= 0:
+            list_elem.append(elem.tag[i + 1 :])
+        for j in xml.findall(f".//{NAMESPACE}{elem.tag[i + 1 :]}"):
+            for at in j.attrib:
+                if at not in list_attrib:
+                    list_attrib.append(at)
+    list_elem = list_elem + list_attrib
+    return {element: list_elem.count(element) for element in set(list_elem)}
+
+
+def scan_recensement(xml_filename, streaming=False):
+    """
+    Nouveau chemin : census_elements, mêmes comptes que l'ancien affichage.
+    """
+    census = census_elements(xml_filename, streaming=streaming)
+    counts = Counter(census["elements"])
+    counts.update(census["attributes"].keys())
+    return dict(counts)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[250, 500, 1000, 2000, 4000]
+    )
+    parser.add_argument("--max_ilots_ancien", type=int, default=500)
+    args = parser.parse_args()
+
+    print(
+        f"{'ilots':>8} {'Mo':>7} {'arbre (s/Mo)':>13} {'flux (s/Mo)':>12} "
+        f"{'ancien (s/Mo)':>14}"
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        for nb_ilots in args.sizes:
+            xml_file = os.path.join(tmp, f"telepac_{nb_ilots}.xml")
+            size = write_telepac(xml_file, nb_ilots=nb_ilots)
+
+            t_dom, counts = best_time(scan_recensement, 1, xml_file)
+            t_flux, _ = best_time(scan_recensement, 1, xml_file, True)
+
+            ancien = "-"
+            if nb_ilots <= args.max_ilots_ancien:
+                t_ancien, counts_ancien = best_time(scan_ancien, 1, xml_file)
+                # L'ancien scan comptait une seule fois chaque attribut
+                assert set(counts_ancien) == set(counts)
+                ancien = f"{t_ancien / size:.3f}"
+
+            print(
+                f"{nb_ilots:>8} {size:>7.1f} {t_dom / size:>13.3f} "
+                f"{t_flux / size:>12.3f} {ancien:>14}"
+            )
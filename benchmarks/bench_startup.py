@@ -0,0 +1,100 @@
+"""
+Benchmark du démarrage à froid de read_xml.py, scan_xml.py et batch_xml.py.
+
+Chaque scénario est lancé avec `python -X importtime` : le temps d'import
+cumulé des modules de premier niveau (hors `site`, propre à l'environnement)
+est comparé à un seuil, et le script sort en erreur si un seuil est dépassé.
+
+Usage:
+    python benchmarks/bench_startup.py [--repeat 5] [--max_ms SCENARIO=MS ...]
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+import tempfile
+
+SRC_DIR = os.path.join(os.path.dirname(__file__), "..", "src")
+
+# Scénarios : {nom: (script, arguments, seuil en ms du temps d'import)}
+SCENARIOS = {
+    "read_xml --help": ("read_xml.py", ["--help"], 150),
+    "scan_xml --help": ("scan_xml.py", ["--help"], 150),
+    "batch_xml --help": ("batch_xml.py", ["--help"], 150),
+    "read_xml tabulaire": (
+        "read_xml.py",
+        ["{xml}", "--layers", "demandeur", "animaux", "--output_dir", "{tmp}"],
+        2000,
+    ),
+}
+
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)")
+
+
+def import_time_ms(stderr):
+    """
+    Temps d'import cumulé (ms) des modules de premier niveau, hors site.
+    """
+    total = 0
+    for match in IMPORTTIME_LINE.finditer(stderr):
+        _, cumulative, indent, module = match.groups()
+        if not indent and module != "site":
+            total += int(cumulative)
+    return total / 1000
+
+
+def run_scenario(script, arguments):
+    """
+    Temps d'import (ms) d'un lancement de script.
+    """
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", script] + arguments,
+        cwd=SRC_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return import_time_ms(completed.stderr)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--max_ms",
+        nargs="+",
+        default=[],
+        metavar="SCENARIO=MS",
+        help="surcharge des seuils, ex : 'read_xml --help=200'",
+    )
+    args = parser.parse_args()
+
+    thresholds = {name: threshold for name, (_, _, threshold) in SCENARIOS.items()}
+    for item in args.max_ms:
+        name, value = item.rsplit("=", 1)
+        thresholds[name] = float(value)
+
+    sys.path.insert(0, os.path.dirname(__file__))
+    from telepac_synthetique import write_telepac
+
+    regressions = []
+    with tempfile.TemporaryDirectory() as tmp:
+        xml_file = os.path.join(tmp, "telepac.xml")
+        write_telepac(xml_file)
+
+        for name, (script, arguments, _) in SCENARIOS.items():
+            arguments = [a.format(xml=xml_file, tmp=tmp) for a in arguments]
+            # Meilleur temps sur plusieurs lancements (cache disque chaud)
+            best = min(run_scenario(script, arguments) for _ in range(args.repeat))
+            status = "ok" if best <= thresholds[name] else "REGRESSION"
+            print(
+                f"{name:>22} : {best:8.1f} ms (seuil {thresholds[name]:.0f} ms) {status}"
+            )
+            if status != "ok":
+                regressions.append(name)
+
+    if regressions:
+        print(f"Seuils dépassés : {', '.join(regressions)}")
+        sys.exit(1)
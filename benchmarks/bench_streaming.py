@@ -0,0 +1,99 @@
+"""
+Benchmark mémoire : lecture de l'arbre complet (ET.parse) contre la lecture
+en flux (iterparse) pour l'extraction des couches et le scan des éléments.
+
+Chaque mesure est faite dans un processus séparé pour obtenir le pic de
+mémoire résidente (RSS) propre à un mode et une taille de fichier.
+
+Usage:
+    python benchmarks/bench_streaming.py [--sizes 500 2000 8000]
+"""
+
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import xml.etree.ElementTree as ET
+
+SRC_DIR = os.path.join(os.path.dirname(__file__), "..", "src")
+sys.path.insert(0, SRC_DIR)
+
+from telepac_synthetique import (  # noqa: E402
+    NAMESPACE,
+    NAMESPACE_GML,
+    best_time,
+    write_telepac,
+)
+
+MODES = ["read_dom", "read_streaming", "scan_dom", "scan_streaming"]
+
+
+def run_mode(mode, xml_file):
+    """
+    Exécute un mode sur un fichier (dans le processus courant).
+    """
+    from extract_functions.streaming import extract_layers_streaming
+    from extract_functions.walk_ilots import extract_ilot_layers
+    from extract_functions.extract_sna import extract_sna
+    from extract_functions.extract_zdh import extract_zdh
+    from scan_xml import create_liste_elements
+
+    if mode == "read_dom":
+        xml = ET.parse(xml_file).getroot()
+        extract_ilot_layers(xml, NAMESPACE, NAMESPACE_GML)
+        extract_sna(xml, NAMESPACE, NAMESPACE_GML)
+        extract_zdh(xml, NAMESPACE, NAMESPACE_GML)
+    elif mode == "read_streaming":
+        extract_layers_streaming(xml_file, NAMESPACE, NAMESPACE_GML)
+    elif mode == "scan_dom":
+        create_liste_elements(xml_file)
+    elif mode == "scan_streaming":
+        create_liste_elements(xml_file, streaming=True)
+
+
+def measure(mode, xml_file):
+    """
+    Pic de RSS (Mo) et durée (s) d'un mode mesurés dans un sous-processus.
+    """
+    duration, completed = best_time(
+        subprocess.run,
+        1,
+        [sys.executable, __file__, "--run", mode, xml_file],
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    return float(completed.stdout.strip()) / 1024, duration
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[500, 2000, 8000])
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=MODES)
+    parser.add_argument("--run", nargs=2, metavar=("MODE", "XML"), help="interne")
+    args = parser.parse_args()
+
+    if args.run:
+        run_mode(*args.run)
+        print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+        sys.exit(0)
+
+    # Les SNA grandissent avec les ilots pour simuler un fichier départemental
+    with tempfile.TemporaryDirectory() as tmp:
+        print(
+            f"{'ilots':>8} {'taille (Mo)':>12} "
+            + " ".join(f"{m:>22}" for m in args.modes)
+        )
+        for nb_ilots in args.sizes:
+            xml_file = os.path.join(tmp, f"telepac_{nb_ilots}.xml")
+            size = write_telepac(xml_file, nb_ilots=nb_ilots, nb_sna=nb_ilots)
+
+            results = []
+            for mode in args.modes:
+                rss, duration = measure(mode, xml_file)
+                results.append(f"{rss:>9.0f} Mo {duration:>7.2f} s")
+            print(
+                f"{nb_ilots:>8} {size:>12.1f} " + " ".join(f"{r:>22}" for r in results)
+            )
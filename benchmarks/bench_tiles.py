@@ -0,0 +1,61 @@
+"""
+Benchmark de l'export en tuiles vectorielles (MBTiles) des jeux de données
+GeoParquet d'un lot d'exploitations synthétiques : durée de l'export, nombre
+de tuiles et taille de l'archive selon le nombre d'exploitations.
+
+Usage:
+    python benchmarks/bench_tiles.py [--nb_farms 10 50] [--nb_ilots 30]
+                                     [--min_zoom 8] [--max_zoom 14]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from output_functions.mbtiles import MAX_ZOOM, MIN_ZOOM, export_mbtiles  # noqa: E402
+from read_xml import process_xml  # noqa: E402
+from telepac_synthetique import best_time, write_telepac  # noqa: E402
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--nb_farms", type=int, nargs="+", default=[10, 50])
+    parser.add_argument("--nb_ilots", type=int, default=30)
+    parser.add_argument("--min_zoom", type=int, default=MIN_ZOOM)
+    parser.add_argument("--max_zoom", type=int, default=MAX_ZOOM)
+    args = parser.parse_args()
+
+    print(f"{'exploitations':>14} {'tuiles':>8} {'Mo':>8} {'durée (s)':>10}")
+    for nb_farms in args.nb_farms:
+        with tempfile.TemporaryDirectory() as tmp:
+            parquet_dir = os.path.join(tmp, "parquet")
+            for farm in range(nb_farms):
+                xml_file = os.path.join(tmp, "telepac.xml")
+                write_telepac(
+                    xml_file,
+                    nb_ilots=args.nb_ilots,
+                    nb_sna=args.nb_ilots,
+                    seed=farm,
+                    numero_pacage=f"031{farm:06d}",
+                )
+                process_xml(
+                    xml_file,
+                    tmp,
+                    excel_filename=None,
+                    parquet_dir=parquet_dir,
+                    layers=["ilots", "parcelles", "sna", "zdh"],
+                )
+
+            mbtiles_file = os.path.join(tmp, "telepac.mbtiles")
+            duration, nb_tiles = best_time(
+                export_mbtiles,
+                1,
+                parquet_dir,
+                mbtiles_file,
+                min_zoom=args.min_zoom,
+                max_zoom=args.max_zoom,
+            )
+            size = os.path.getsize(mbtiles_file) / 1024**2
+            print(f"{nb_farms:>14} {nb_tiles:>8} {size:>8.2f} {duration:>10.2f}")
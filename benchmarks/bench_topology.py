@@ -0,0 +1,119 @@
+"""
+Benchmark du contrôle des géométries (réparation des géométries invalides,
+chevauchements et débords des parcelles) : calcul en bloc de
+check_layer_geometries, contre un parcours géométrie par géométrie et paire
+par paire des parcelles de chaque ilot.
+
+La durée du contrôle est aussi rapportée à celle de l'extraction des couches
+(arbre complet), pour estimer le surcoût de l'étape optionnelle. Les
+parcelles synthétiques d'un ilot sont toutes centrées sur l'ilot et se
+chevauchent deux à deux : chaque paire demande le calcul (GEOS) de son
+intersection, qui domine alors le contrôle. Avec une parcelle par ilot
+(--nb_parcelles 1), seuls les contrôles de validité et les requêtes des
+index spatiaux sont mesurés.
+
+Usage:
+    python benchmarks/bench_topology.py [--sizes 200 1000 3000] [--repeat 3]
+                                        [--nb_parcelles 3]
+"""
+
+import argparse
+import io
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from extract_functions.backends import parse  # noqa: E402
+from extract_functions.registry import GEO_LAYERS, extract_selected_layers  # noqa: E402
+from extract_functions.reprojection import LAMBERT93  # noqa: E402
+from extract_functions.topology import (  # noqa: E402
+    AREA_TOLERANCE,
+    check_layer_geometries,
+)
+from telepac_synthetique import (  # noqa: E402
+    NAMESPACE,
+    NAMESPACE_GML,
+    best_time,
+    generate_telepac,
+)
+
+
+def naive_check(layers, tolerance=AREA_TOLERANCE):
+    """
+    Contrôle sans opérations en bloc ni index : validité et réparation
+    géométrie par géométrie, chevauchements paire par paire des parcelles de
+    chaque ilot et débord de chaque parcelle hors de son ilot.
+
+    Retourne le nombre d'anomalies trouvées.
+    """
+    import shapely
+
+    nb_anomalies = 0
+    repaired = {}
+    for layer in GEO_LAYERS:
+        if layer not in layers:
+            continue
+        geometries = []
+        for geometry in layers[layer].geometry:
+            if not geometry.is_valid:
+                nb_anomalies += 1
+                geometry = shapely.make_valid(
+                    geometry, method="structure", keep_collapsed=False
+                )
+            geometries.append(geometry)
+        repaired[layer] = geometries
+
+    ilots = dict(zip(layers["ilots"]["numero-ilot-reference"], repaired["ilots"]))
+    by_ilot = {}
+    for numero, geometry in zip(
+        layers["parcelles"]["numero-ilot-reference"], repaired["parcelles"]
+    ):
+        by_ilot.setdefault(numero, []).append(geometry)
+    for numero, geometries in by_ilot.items():
+        for i, first in enumerate(geometries):
+            for second in geometries[i + 1 :]:
+                if first.intersection(second).area > tolerance:
+                    nb_anomalies += 1
+            ilot = ilots.get(numero)
+            if ilot is None or first.difference(ilot).area > tolerance:
+                nb_anomalies += 1
+    return nb_anomalies
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[200, 1000, 3000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--nb_parcelles", type=int, default=3)
+    args = parser.parse_args()
+
+    print(
+        f"{'ilots':>8} {'anomalies':>10} {'extraction (s)':>15}"
+        f" {'naïf (s)':>10} {'contrôle (s)':>13} {'':>6} {'surcoût':>8}"
+    )
+    for nb_ilots in args.sizes:
+        xml = generate_telepac(
+            nb_ilots=nb_ilots,
+            nb_parcelles=args.nb_parcelles,
+            nb_sna=nb_ilots,
+            nb_invalides=nb_ilots // 10,
+        )
+        extraction, layers = best_time(
+            lambda: extract_selected_layers(
+                parse(io.BytesIO(xml.encode("utf-8"))),
+                NAMESPACE,
+                NAMESPACE_GML,
+                crs=LAMBERT93,
+            ),
+            args.repeat,
+        )
+
+        naive, expected = best_time(naive_check, args.repeat, layers)
+        vectorized, checked = best_time(check_layer_geometries, args.repeat, layers)
+        assert len(checked["controle_geometries"]) == expected, "Anomalies différentes"
+        print(
+            f"{nb_ilots:>8} {expected:>10} {extraction:>15.3f}"
+            f" {naive:>10.3f} {vectorized:>13.3f} (x{naive / vectorized:4.1f})"
+            f" {100 * vectorized / extraction:>7.0f}%"
+        )
@@ -0,0 +1,60 @@
+"""
+Benchmark : appels successifs des extract_* des ilots contre le parcours unique.
+
+L'identité des couches des deux chemins est vérifiée par
+tests/test_walk_ilots.py.
+
+Usage:
+    python benchmarks/bench_walk_ilots.py [--sizes 100 500 2000] [--repeat 3]
+"""
+
+import argparse
+import os
+import sys
+import xml.etree.ElementTree as ET
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from extract_functions.extract_bio import extract_bio  # noqa: E402
+from extract_functions.extract_ilots import extract_ilots  # noqa: E402
+from extract_functions.extract_maec import extract_maec  # noqa: E402
+from extract_functions.extract_parcelles import extract_parcelles  # noqa: E402
+from extract_functions.walk_ilots import extract_ilot_layers  # noqa: E402
+from telepac_synthetique import (  # noqa: E402
+    NAMESPACE,
+    NAMESPACE_GML,
+    best_time,
+    generate_telepac,
+)
+
+
+def extract_sequentiel(xml_root):
+    """
+    Séquence historique : un parcours complet de l'arbre par extracteur.
+    """
+    return {
+        "ilots": extract_ilots(xml_root, NAMESPACE, NAMESPACE_GML),
+        "parcelles": extract_parcelles(xml_root, NAMESPACE, NAMESPACE_GML),
+        "bio": extract_bio(xml_root, NAMESPACE, NAMESPACE_GML),
+        "maec": extract_maec(xml_root, NAMESPACE, NAMESPACE_GML),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 500, 2000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(
+        f"{'ilots':>8} {'sequentiel (s)':>15} {'parcours unique (s)':>20} {'gain':>6}"
+    )
+    for nb_ilots in args.sizes:
+        xml_root = ET.fromstring(generate_telepac(nb_ilots=nb_ilots))
+
+        t_seq, _ = best_time(extract_sequentiel, args.repeat, xml_root)
+        t_walk, _ = best_time(
+            extract_ilot_layers, args.repeat, xml_root, NAMESPACE, NAMESPACE_GML
+        )
+
+        print(f"{nb_ilots:>8} {t_seq:>15.3f} {t_walk:>20.3f} {t_seq / t_walk:>6.2f}")
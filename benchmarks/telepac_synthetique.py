@@ -0,0 +1,311 @@
+"""
+Génération de fichiers XML telepac synthétiques pour les benchmarks et les
+tests, et chronométrage commun des benchmarks.
+
+Les documents reprennent la structure des déclarations telepac (espace de
+noms echange-producteur) : demandeur et associés, ilots avec parcelles,
+éléments bio et MAEC, SNA surfaciques et ponctuelles avec leurs
+intersections déclarées, ZDH, effectifs animaux et demandes d'aides.
+
+Usage:
+    python benchmarks/telepac_synthetique.py output_xml [--nb_ilots N] [--nb_parcelles N]
+                                             [--nb_sna N] [--nb_sna_points N] ...
+"""
+
+import argparse
+import math
+import os
+import random
+import time
+
+NAMESPACE_URI = "urn:x-telepac:fr.gouv.agriculture.telepac:echange-producteur"
+NAMESPACE_GML_URI = "http://www.opengis.net/gml"
+
+# Namespaces sous la forme attendue par les extracteurs
+NAMESPACE = f"{{{NAMESPACE_URI}}}"
+NAMESPACE_GML = f"{{{NAMESPACE_GML_URI}}}"
+
+
+def polygon_gml(x, y, rayon, nb_vertices, rng, invalid=False):
+    """
+    Polygone gml (anneau fermé) autour du point (x, y) en Lambert 93. Si
+    invalid est vrai, deux sommets opposés sont intervertis : l'anneau se
+    recoupe (polygone invalide).
+    """
+    coords = []
+    for i in range(nb_vertices):
+        angle = 2 * math.pi * i / nb_vertices
+        r = rayon * (0.8 + 0.2 * rng.random())
+        coords.append(f"{x + r * math.cos(angle):.4f},{y + r * math.sin(angle):.4f}")
+    if invalid:
+        half = nb_vertices // 2
+        coords[1], coords[half] = coords[half], coords[1]
+    coords.append(coords[0])
+    return (
+        "<gml:Polygon><gml:outerBoundaryIs><gml:LinearRing><gml:coordinates>"
+        + " ".join(coords)
+        + "</gml:coordinates></gml:LinearRing></gml:outerBoundaryIs></gml:Polygon>"
+    )
+
+
+def point_gml(x, y):
+    """
+    Point gml en Lambert 93.
+    """
+    return f"<gml:Point><gml:coordinates>{x:.4f},{y:.4f}</gml:coordinates></gml:Point>"
+
+
+def sna_intersections_xml(numero_ilot, nb_parcelles, rng):
+    """
+    Intersections déclarées d'une SNA avec un ilot et ses parcelles.
+    """
+    if numero_ilot is None:
+        return ""
+    parcelles = "".join(
+        "<intersectionSnaParcelle>"
+        f"<numeroIlot>{numero_ilot}</numeroIlot>"
+        f"<numeroParcelle>{j + 1}</numeroParcelle>"
+        f"<longueur-iae>{rng.uniform(1, 50):.2f}</longueur-iae>"
+        "</intersectionSnaParcelle>"
+        for j in range(min(nb_parcelles, 2))
+    )
+    return (
+        "<intersectionsSnaIlots><intersectionSnaIlot>"
+        f"<numeroIlot>{numero_ilot}</numeroIlot>"
+        f"<largeur>{rng.randint(1, 10)}</largeur>"
+        "</intersectionSnaIlot></intersectionsSnaIlots>"
+        f"<intersectionsSnaParcelles>{parcelles}</intersectionsSnaParcelles>"
+    )
+
+
+def generate_telepac(
+    nb_ilots=10,
+    nb_parcelles=3,
+    nb_bio=1,
+    nb_maec=1,
+    nb_sna=10,
+    nb_zdh=2,
+    nb_vertices=20,
+    seed=0,
+    numero_pacage="031000001",
+    nb_sna_points=0,
+    nb_associes=2,
+    nb_animaux=3,
+    campagne="2024",
+    sna_distance=600,
+    nb_invalides=0,
+):
+    """
+    Génère le contenu d'un fichier XML telepac synthétique.
+
+    Paramètres :
+    - nb_ilots : nombre d'ilots
+    - nb_parcelles, nb_bio, nb_maec : nombre de parcelles, d'éléments bio
+      et d'éléments MAEC par ilot
+    - nb_sna, nb_zdh : nombre de SNA (surfaciques) et de ZDH déclarées
+    - nb_vertices : nombre de sommets par polygone
+    - seed : graine du générateur aléatoire
+    - numero_pacage : numéro pacage du producteur
+    - nb_sna_points : nombre de SNA ponctuelles (arbres isolés)
+    - nb_associes : nombre d'associés de la société
+    - nb_animaux : nombre d'effectifs animaux déclarés
+    - campagne : campagne des demandes d'aides (aucune demande si None)
+    - sna_distance : distance (m) entre le centre d'un ilot et celui de la
+      SNA surfacique correspondante (hors de l'ilot par défaut, en bordure
+      des parcelles vers 150)
+    - nb_invalides : nombre d'ilots dont la première parcelle a une
+      géométrie invalide (anneau qui se recoupe)
+    """
+    rng = random.Random(seed)
+    parts = [
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        f'<producteurs xmlns="{NAMESPACE_URI}" xmlns:gml="{NAMESPACE_GML_URI}">',
+        f'<producteur numero-pacage="{numero_pacage}">',
+        '<demandeur type="societe">'
+        f"<siret>{rng.randrange(10**13, 10**14)}</siret>"
+        "<courriel>exploitation@example.org</courriel>"
+        "<identification-societe>"
+        f"<exploitation>EARL SYNTHETIQUE {numero_pacage}</exploitation>"
+        "<associes>"
+        + "".join(
+            f'<associe numero-pacage="031{rng.randrange(10**6):06d}">'
+            f"<civilite>{rng.choice(['M', 'MME'])}</civilite>"
+            f"<nom>ASSOCIE{k + 1}</nom><prenoms>PRENOM{k + 1}</prenoms>"
+            "</associe>"
+            for k in range(nb_associes)
+        )
+        + "</associes>"
+        "</identification-societe>"
+        "</demandeur>",
+    ]
+    if campagne is not None:
+        parts.append(
+            f'<demandes-aides-pilier1-et-AR campagne="{campagne}">'
+            "<bcae8><option-BCAE8>OPTION1</option-BCAE8></bcae8>"
+            '<demande-aides-decouplees demande-paiement-base="true"/>'
+            '<demande-aide-ecoregime demande-ecoregime="true"/>'
+            "</demandes-aides-pilier1-et-AR>"
+            '<demandes-aides-pilier2><ichn demande-ichn="false"/></demandes-aides-pilier2>'
+        )
+    parts.append("<effectifs-animaux>")
+    for k in range(nb_animaux):
+        parts.append(
+            "<effectif-animal>"
+            f"<type-animal-1>{['BOVIN', 'OVIN', 'CAPRIN', 'EQUIN'][k % 4]}</type-animal-1>"
+            f"<nb-animaux-1>{rng.randint(1, 200)}</nb-animaux-1>"
+            "</effectif-animal>"
+        )
+    parts.append("</effectifs-animaux><rpg><ilots>")
+    for i in range(nb_ilots):
+        x = 430000 + 1500 * (i % 100)
+        y = 6280000 + 1500 * (i // 100)
+        parts.append(
+            f'<ilot numero-ilot="{i + 1}" numero-ilot-reference="031{i + 1:07d}">'
+            f"<commune>31555</commune>"
+            f"<geometrie>{polygon_gml(x, y, 500, nb_vertices, rng)}</geometrie>"
+            "<parcelles>"
+        )
+        for j in range(nb_parcelles):
+            parts.append(
+                "<parcelle>"
+                f'<descriptif-parcelle numero-parcelle="{j + 1}">'
+                '<culture-principale production-semences="false">'
+                f"<code-culture>{rng.choice(['BTH', 'MIS', 'PPH', 'TRN'])}</code-culture>"
+                "<precision>001</precision>"
+                "</culture-principale>"
+                '<agri-bio conduite-bio="false"/>'
+                "</descriptif-parcelle>"
+                f"<surface-admissible>{rng.uniform(0.5, 10):.2f}</surface-admissible>"
+                "<geometrie>"
+                + polygon_gml(
+                    x, y, 150, nb_vertices, rng, invalid=j == 0 and i < nb_invalides
+                )
+                + "</geometrie></parcelle>"
+            )
+        parts.append("</parcelles><elements-bio>")
+        for j in range(nb_bio):
+            parts.append(
+                "<element-bio>"
+                f"<numero-element>{j + 1}</numero-element>"
+                "<code-mesure>CAB</code-mesure>"
+                "<premiere-campagne>2021</premiere-campagne>"
+                "<derniere-campagne>2025</derniere-campagne>"
+                f"<geometrie>{polygon_gml(x, y, 100, nb_vertices, rng)}</geometrie>"
+                "</element-bio>"
+            )
+        parts.append("</elements-bio><elements-surfaciques>")
+        for j in range(nb_maec):
+            parts.append(
+                "<element-surfacique>"
+                f"<numero-element>{j + 1}</numero-element>"
+                "<code-mesure>OC_HERB</code-mesure>"
+                "<sous-type-geometrie>SURFACE</sous-type-geometrie>"
+                "<premiere-campagne>2023</premiere-campagne>"
+                "<derniere-campagne>2027</derniere-campagne>"
+                f"<geometrie>{polygon_gml(x, y, 80, nb_vertices, rng)}</geometrie>"
+                "</element-surfacique>"
+            )
+        parts.append("</elements-surfaciques></ilot>")
+    parts.append("</ilots></rpg><snas-declarees>")
+    for i in range(nb_sna):
+        x = 430000 + 1500 * (i % 100) + sna_distance
+        y = 6280000 + 1500 * (i // 100)
+        parts.append(
+            "<sna-declaree>"
+            f"<numeroSna>{i + 1}</numeroSna>"
+            "<categorieSna>HAIE</categorieSna>"
+            "<typeSna>HAI</typeSna>"
+            f"<surfaceGraphique>{rng.uniform(10, 500):.2f}</surfaceGraphique>"
+            f"<geometrie>{polygon_gml(x, y, 20, nb_vertices, rng)}</geometrie>"
+            + sna_intersections_xml(i + 1 if i < nb_ilots else None, nb_parcelles, rng)
+            + f"<largeur>{rng.randint(1, 10)}</largeur>"
+            "</sna-declaree>"
+        )
+    for i in range(nb_sna_points):
+        x = 430000 + 1500 * (i % 100) + rng.uniform(-300, 300)
+        y = 6280000 + 1500 * (i // 100) + rng.uniform(-300, 300)
+        parts.append(
+            "<sna-declaree>"
+            f"<numeroSna>{nb_sna + i + 1}</numeroSna>"
+            "<categorieSna>ARBRE</categorieSna>"
+            "<typeSna>ARI</typeSna>"
+            f"<geometrie>{point_gml(x, y)}</geometrie>"
+            + sna_intersections_xml(i + 1 if i < nb_ilots else None, nb_parcelles, rng)
+            + "</sna-declaree>"
+        )
+    parts.append("</snas-declarees><zdhs-declarees>")
+    for i in range(nb_zdh):
+        x = 430000 + 1500 * (i % 100) - 600
+        y = 6280000 + 1500 * (i // 100)
+        parts.append(
+            "<zdh-declaree>"
+            f"<numeroZdh>{i + 1}</numeroZdh>"
+            "<densiteVegetation>FORTE</densiteVegetation>"
+            f"<geometrie>{polygon_gml(x, y, 30, nb_vertices, rng)}</geometrie>"
+            "</zdh-declaree>"
+        )
+    parts.append("</zdhs-declarees></producteur></producteurs>")
+    return "\n".join(parts)
+
+
+def write_telepac(xml_file, **options):
+    """
+    Écrit dans xml_file un fichier XML telepac synthétique (options de
+    generate_telepac) et retourne sa taille en Mo.
+    """
+    with open(xml_file, "w", encoding="utf-8") as f:
+        f.write(generate_telepac(**options))
+    return os.path.getsize(xml_file) / 1024**2
+
+
+def best_time(func, repeat, *args, **kwargs):
+    """
+    Durée minimale (s) de func(*args, **kwargs) sur repeat exécutions, et
+    résultat de la dernière exécution.
+    """
+    duration = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        duration = min(duration, time.perf_counter() - start)
+    return duration, result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("output_xml", type=str, help="fichier XML à générer")
+    parser.add_argument("--nb_ilots", type=int, default=10)
+    parser.add_argument("--nb_parcelles", type=int, default=3)
+    parser.add_argument("--nb_bio", type=int, default=1)
+    parser.add_argument("--nb_maec", type=int, default=1)
+    parser.add_argument("--nb_sna", type=int, default=10)
+    parser.add_argument("--nb_zdh", type=int, default=2)
+    parser.add_argument("--nb_vertices", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--numero_pacage", type=str, default="031000001")
+    parser.add_argument("--nb_sna_points", type=int, default=0)
+    parser.add_argument("--nb_associes", type=int, default=2)
+    parser.add_argument("--nb_animaux", type=int, default=3)
+    parser.add_argument("--campagne", type=str, default="2024")
+    parser.add_argument("--sna_distance", type=float, default=600)
+    parser.add_argument("--nb_invalides", type=int, default=0)
+    args = parser.parse_args()
+
+    write_telepac(
+        args.output_xml,
+        nb_ilots=args.nb_ilots,
+        nb_parcelles=args.nb_parcelles,
+        nb_bio=args.nb_bio,
+        nb_maec=args.nb_maec,
+        nb_sna=args.nb_sna,
+        nb_zdh=args.nb_zdh,
+        nb_vertices=args.nb_vertices,
+        seed=args.seed,
+        numero_pacage=args.numero_pacage,
+        nb_sna_points=args.nb_sna_points,
+        nb_associes=args.nb_associes,
+        nb_animaux=args.nb_animaux,
+        campagne=args.campagne,
+        sna_distance=args.sna_distance,
+        nb_invalides=args.nb_invalides,
+    )
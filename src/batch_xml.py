@@ -0,0 +1,482 @@
+"""
+Traitement par lot de fichiers xml TELEPAC répartis sur un pool de processus.
+
+Les imports lourds (pandas, geopandas, folium...) ne sont payés qu'une fois
+par processus de travail. Un fichier en erreur n'interrompt pas le lot.
+
+Usage:
+    python batch_xml.py inputs [inputs ...] [--output_dir OUTPUT_DIR] [--workers N]
+                        [--visu_folium] [--streaming] [--mmap] [--parquet_dir PARQUET_DIR]
+                        [--campagne CAMPAGNE] [--excel_geometry {wkt,drop}] [--no_excel]
+                        [--layers LAYER [LAYER ...]] [--keep_lambert93]
+                        [--cache_dir CACHE_DIR] [--cache_max_mb CACHE_MAX_MB]
+                        [--backend {etree,lxml}] [--folium_light] [--folium_zoom ZOOM]
+                        [--folium_precision PRECISION] [--folium_assets_url URL]
+                        [--mbtiles MBTILES] [--metrics] [--metrics_memory] [--profile]
+                        [--check_geometries]
+"""
+
+import argparse
+import csv
+import glob
+import hashlib
+import os
+import time
+import traceback
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from extract_functions.backends import BACKENDS, ETREE
+from extract_functions.cache import CACHE_MAX_MB
+from extract_functions.registry import LAYERS
+from output_functions.geojson import PRECISION, SIMPLIFY_ZOOM
+
+
+def usage() -> argparse.Namespace:
+    """Parse the options provided on the command line.
+
+    Returns:
+        argparse.Namespace: The parameters provided on the command line.
+    """
+
+    parser = argparse.ArgumentParser()
+    required_args = parser.add_argument_group("required arguments")
+    required_args.add_argument(
+        "inputs",
+        type=str,
+        nargs="+",
+        help="répertoires ou motifs glob des fichiers XML Telepac à analyser",
+    )
+    required_args.add_argument(
+        "--output_dir",
+        type=str,
+        action="store",
+        default=os.getcwd(),
+        required=False,
+        help="Répertoire de sortie : un sous-répertoire par fichier xml (chemin "
+        "relatif à la racine commune des fichiers) et le récapitulatif du lot",
+    )
+    required_args.add_argument(
+        "--workers",
+        type=int,
+        action="store",
+        default=os.cpu_count(),
+        required=False,
+        help="Nombre de processus de traitement",
+    )
+    required_args.add_argument(
+        "--visu_folium",
+        action="store_true",
+        default=False,
+        help="Création de html Folium pour chaque fichier xml.",
+    )
+    required_args.add_argument(
+        "--streaming",
+        action="store_true",
+        default=False,
+        help="Lecture des xml en flux (iterparse) pour limiter la mémoire utilisée.",
+    )
+    required_args.add_argument(
+        "--mmap",
+        action="store_true",
+        default=False,
+        help="Lecture des xml projetés en mémoire (mmap), seuls les enregistrements "
+        "des couches demandées étant analysés.",
+    )
+    required_args.add_argument(
+        "--parquet_dir",
+        type=str,
+        action="store",
+        default=None,
+        required=False,
+        help="Répertoire des jeux de données GeoParquet consolidés du lot "
+        "(partitionnés par campagne et numéro pacage)",
+    )
+    required_args.add_argument(
+        "--campagne",
+        type=str,
+        action="store",
+        default=None,
+        required=False,
+        help="Campagne utilisée pour partitionner les sorties Parquet",
+    )
+    required_args.add_argument(
+        "--excel_geometry",
+        type=str,
+        choices=("wkt", "drop"),
+        default="wkt",
+        required=False,
+        help="Géométries écrites en WKT dans les fichiers excel, ou ignorées (drop)",
+    )
+    required_args.add_argument(
+        "--no_excel",
+        action="store_true",
+        default=False,
+        help="Pas de fichier excel par fichier xml (utile avec --parquet_dir).",
+    )
+    required_args.add_argument(
+        "--layers",
+        type=str,
+        nargs="+",
+        choices=LAYERS,
+        default=None,
+        required=False,
+        help="Couches à extraire (toutes par défaut)",
+    )
+    required_args.add_argument(
+        "--keep_lambert93",
+        action="store_true",
+        default=False,
+        help="Géométries conservées en Lambert-93 (EPSG:2154) dans les sorties "
+        "excel et Parquet, au lieu de WGS84 (EPSG:4326)",
+    )
+    required_args.add_argument(
+        "--cache_dir",
+        type=str,
+        action="store",
+        default=None,
+        required=False,
+        help="Répertoire du cache des couches extraites, partagé par les processus",
+    )
+    required_args.add_argument(
+        "--cache_max_mb",
+        type=float,
+        action="store",
+        default=CACHE_MAX_MB,
+        required=False,
+        help="Taille maximale du cache (Mo)",
+    )
+    required_args.add_argument(
+        "--backend",
+        type=str,
+        choices=BACKENDS,
+        default=ETREE,
+        required=False,
+        help="Moteur de lecture XML (etree ou lxml)",
+    )
+    required_args.add_argument(
+        "--folium_light",
+        action="store_true",
+        default=False,
+        help="Visus Folium allégées (géométries simplifiées, coordonnées arrondies)",
+    )
+    required_args.add_argument(
+        "--folium_zoom",
+        type=int,
+        action="store",
+        default=SIMPLIFY_ZOOM,
+        required=False,
+        help="Niveau de zoom jusqu'auquel les géométries simplifiées des visus "
+        "allégées restent exactes au pixel",
+    )
+    required_args.add_argument(
+        "--folium_precision",
+        type=int,
+        action="store",
+        default=PRECISION,
+        required=False,
+        help="Nombre de décimales des coordonnées des visus allégées",
+    )
+    required_args.add_argument(
+        "--folium_assets_url",
+        type=str,
+        action="store",
+        default=None,
+        required=False,
+        help="Répertoire partagé des fichiers JS/CSS de Leaflet utilisé par "
+        "toutes les visus Folium du lot",
+    )
+    required_args.add_argument(
+        "--mbtiles",
+        type=str,
+        action="store",
+        default=None,
+        required=False,
+        help="Fichier MBTiles des tuiles vectorielles de toutes les exploitations, "
+        "exporté à partir de --parquet_dir à la fin du lot",
+    )
+    required_args.add_argument(
+        "--metrics",
+        action="store_true",
+        default=False,
+        help="Rapport JSON des mesures de chaque étape par fichier (metrics.json) "
+        "et agrégé sur le lot (batch_metrics.json)",
+    )
+    required_args.add_argument(
+        "--metrics_memory",
+        action="store_true",
+        default=False,
+        help="Mesure du pic de mémoire de chaque étape (tracemalloc, plus lent)",
+    )
+    required_args.add_argument(
+        "--profile",
+        action="store_true",
+        default=False,
+        help="Profil cProfile du traitement de chaque fichier (profile.prof)",
+    )
+    required_args.add_argument(
+        "--check_geometries",
+        action="store_true",
+        default=False,
+        help="Réparation des géométries invalides et contrôle des chevauchements "
+        "et débords des parcelles (table controle_geometries)",
+    )
+    args = parser.parse_args()
+    if args.mbtiles is not None and args.parquet_dir is None:
+        # Les tuiles sont exportées à partir des jeux de données Parquet du lot
+        parser.error("--mbtiles nécessite --parquet_dir")
+    return args
+
+
+def list_xml_files(inputs):
+    """
+    Liste triée des fichiers xml à partir de répertoires ou de motifs glob
+    """
+    files = set()
+    for path in inputs:
+        if os.path.isdir(path):
+            files.update(glob.glob(os.path.join(path, "*.xml")))
+        else:
+            files.update(glob.glob(path))
+    return sorted({os.path.normpath(xml_file) for xml_file in files})
+
+
+def output_names(xml_files):
+    """
+    Nom du sous-répertoire de sortie de chaque fichier xml : son chemin
+    relatif à la racine commune des fichiers, sans extension (le nom du
+    fichier seul s'ils sont tous dans le même répertoire). Des fichiers de
+    même nom dans des répertoires différents ont ainsi des sorties
+    distinctes ; ceux qui ne diffèrent que par l'extension sont distingués
+    par une empreinte courte de leur chemin complet.
+
+    Retourne ({fichier: nom}, {fichier: autres fichiers de même nom}).
+    """
+    if not xml_files:
+        return {}, {}
+    paths = {xml_file: os.path.abspath(xml_file) for xml_file in xml_files}
+    root = os.path.commonpath([os.path.dirname(path) for path in paths.values()])
+    names = {
+        xml_file: os.path.splitext(os.path.relpath(path, root))[0]
+        for xml_file, path in paths.items()
+    }
+    counts = Counter(names.values())
+    for xml_file, name in names.items():
+        if counts[name] > 1:
+            digest = hashlib.sha1(paths[xml_file].encode()).hexdigest()[:8]
+            names[xml_file] = f"{name}_{digest}"
+
+    homonyms = {}
+    for xml_file in xml_files:
+        stem = os.path.splitext(os.path.basename(xml_file))[0]
+        homonyms.setdefault(stem, []).append(xml_file)
+    collisions = {
+        xml_file: [other for other in files if other != xml_file]
+        for files in homonyms.values()
+        if len(files) > 1
+        for xml_file in files
+    }
+    return names, collisions
+
+
+def init_worker():
+    """
+    Import des modules lourds une seule fois par processus de traitement
+    """
+    import read_xml  # noqa: F401
+
+
+def process_file(
+    xml_file,
+    output_dir,
+    options,
+    metrics=False,
+    metrics_memory=False,
+    profile=False,
+    output_name=None,
+):
+    """
+    Traitement d'un fichier dans un processus de traitement.
+
+    Les sorties sont écrites dans le sous-répertoire output_name de
+    output_dir (par défaut le nom du fichier sans extension, voir
+    output_names).
+
+    Si metrics est vrai, les mesures des étapes sont écrites dans
+    metrics.json du répertoire de sortie du fichier et jointes au résultat
+    (metriques). Si profile est vrai, le profil cProfile du traitement est
+    écrit dans profile.prof.
+
+    Retourne une ligne du récapitulatif, y compris en cas d'erreur.
+    """
+    from extract_functions.metrics import Metrics, profiled
+    from read_xml import process_xml
+
+    if output_name is None:
+        output_name = os.path.splitext(os.path.basename(xml_file))[0]
+    file_output_dir = os.path.join(output_dir, output_name)
+    file_metrics = Metrics(xml_file, memory=metrics_memory) if metrics else None
+    process = process_xml
+    if profile:
+        os.makedirs(file_output_dir, exist_ok=True)
+        process = profiled(process_xml, os.path.join(file_output_dir, "profile.prof"))
+    start = time.perf_counter()
+    try:
+        process(xml_file, file_output_dir, metrics=file_metrics, **options)
+    except Exception as e:  # un fichier en erreur ne doit pas arrêter le lot
+        result = {
+            "fichier": xml_file,
+            "statut": "erreur",
+            "duree": round(time.perf_counter() - start, 3),
+            "erreur": f"{type(e).__name__}: {e}",
+            "trace": traceback.format_exc(),
+        }
+    else:
+        result = {
+            "fichier": xml_file,
+            "statut": "ok",
+            "duree": round(time.perf_counter() - start, 3),
+            "erreur": "",
+            "trace": "",
+        }
+    if file_metrics is not None:
+        file_metrics.stop()
+        result["metriques"] = file_metrics.report()
+        if os.path.isdir(file_output_dir):
+            file_metrics.write_json(os.path.join(file_output_dir, "metrics.json"))
+    return result
+
+
+def process_batch(
+    xml_files,
+    output_dir,
+    workers=None,
+    metrics=False,
+    metrics_memory=False,
+    profile=False,
+    **options,
+):
+    """
+    Traitement d'une liste de fichiers xml sur un pool de processus.
+
+    Chaque fichier a son sous-répertoire de sortie (sortie du
+    récapitulatif, voir output_names) ; les fichiers de même nom sont
+    signalés dans la colonne collision.
+
+    Avec metrics, le rapport des mesures agrégées sur le lot est écrit dans
+    batch_metrics.json de output_dir.
+
+    Retourne les lignes du récapitulatif dans l'ordre des fichiers.
+    """
+    if not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+
+    names, collisions = output_names(xml_files)
+    for xml_file in collisions:
+        print(f"Fichier de même nom qu'un autre : {xml_file} -> {names[xml_file]}")
+
+    results = {}
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker) as pool:
+        futures = {
+            pool.submit(
+                process_file,
+                xml_file,
+                output_dir,
+                options,
+                metrics=metrics,
+                metrics_memory=metrics_memory,
+                profile=profile,
+                output_name=names[xml_file],
+            ): xml_file
+            for xml_file in xml_files
+        }
+        for future in as_completed(futures):
+            xml_file = futures[future]
+            result = future.result()
+            result["sortie"] = names[xml_file]
+            result["collision"] = "; ".join(collisions.get(xml_file, []))
+            results[xml_file] = result
+            print(f"{result['statut']:>6} {result['duree']:>8.2f}s {result['fichier']}")
+
+    results = [results[xml_file] for xml_file in xml_files]
+    if metrics:
+        from extract_functions.metrics import aggregate_reports, write_report
+
+        report = aggregate_reports(
+            [result["metriques"] for result in results if "metriques" in result]
+        )
+        write_report(report, os.path.join(output_dir, "batch_metrics.json"))
+    return results
+
+
+def write_summary(results, summary_filename):
+    """
+    Écriture du récapitulatif (statut, durée, erreur, sous-répertoire de
+    sortie, fichiers de même nom) du lot au format csv
+    """
+    with open(summary_filename, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(
+            f,
+            fieldnames=[
+                "fichier",
+                "statut",
+                "duree",
+                "erreur",
+                "trace",
+                "sortie",
+                "collision",
+            ],
+            extrasaction="ignore",
+        )
+        writer.writeheader()
+        writer.writerows(results)
+
+
+if __name__ == "__main__":
+    # Import des paramètres
+    args = usage()
+    XML_FILES = list_xml_files(args.inputs)
+    if not XML_FILES:
+        print("Aucun fichier xml trouvé.")
+    else:
+        start_batch = time.perf_counter()
+        RESULTS = process_batch(
+            XML_FILES,
+            args.output_dir,
+            workers=args.workers,
+            visu_folium=args.visu_folium,
+            streaming=args.streaming,
+            mapped=args.mmap,
+            parquet_dir=args.parquet_dir,
+            campagne=args.campagne,
+            excel_filename=None if args.no_excel else "output.xlsx",
+            excel_geometry=args.excel_geometry,
+            layers=args.layers,
+            keep_lambert93=args.keep_lambert93,
+            cache_dir=args.cache_dir,
+            cache_max_mb=args.cache_max_mb,
+            backend=args.backend,
+            folium_light=args.folium_light,
+            folium_zoom=args.folium_zoom,
+            folium_precision=args.folium_precision,
+            folium_assets_url=args.folium_assets_url,
+            check_geometries=args.check_geometries,
+            metrics=args.metrics,
+            metrics_memory=args.metrics_memory,
+            profile=args.profile,
+        )
+        write_summary(RESULTS, os.path.join(args.output_dir, "batch_summary.csv"))
+
+        nb_errors = sum(result["statut"] == "erreur" for result in RESULTS)
+        print(
+            f"{len(RESULTS)} fichiers traités en "
+            f"{time.perf_counter() - start_batch:.1f}s, {nb_errors} en erreur"
+        )
+
+        if args.mbtiles is not None:
+            from output_functions.mbtiles import export_mbtiles
+
+            nb_tiles = export_mbtiles(
+                args.parquet_dir, args.mbtiles, campagne=args.campagne
+            )
+            print(f"{nb_tiles} tuiles écrites dans {args.mbtiles}")
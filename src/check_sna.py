@@ -0,0 +1,318 @@
+"""
+Contrôle des intersections déclarées des SNA (surfaces non agricoles) d'un
+fichier xml TELEPAC avec les ilots et les parcelles.
+
+Les intersections sont recalculées à partir des géométries (Lambert-93) : les
+ilots et parcelles proches de chaque SNA sont trouvés par un index spatial
+(STRtree), puis les longueurs de bordure et surfaces d'intersection de toutes
+les paires sont calculées en bloc (opérations vectorisées de shapely). Elles
+sont ensuite comparées aux intersections déclarées dans le xml.
+
+Usage:
+    python check_sna.py input_xml [--output_dir OUTPUT_DIR] [--excel_filename FILE]
+                        [--tolerance TOLERANCE] [--streaming] [--cache_dir CACHE_DIR]
+"""
+
+import argparse
+import os
+
+from extract_functions.reprojection import LAMBERT93
+from output_functions.excel import write_excel
+from read_xml import check_extension, extract_layers
+
+# Distance (m) en deçà de laquelle une SNA touche un ilot ou une parcelle
+TOLERANCE = 0.5
+
+# Écart de longueur toléré : relatif, et absolu (m) pour les petites longueurs
+LENGTH_TOLERANCE = 0.1
+LENGTH_MIN_GAP = 1.0
+
+# Statuts des intersections en sortie
+CONFORME = "conforme"
+NON_DECLAREE = "non déclarée"
+NON_CONSTATEE = "non constatée"
+LONGUEUR_DIFFERENTE = "longueur différente"
+
+SNA_KEY = "numero-sna-declaree"
+
+
+def usage() -> argparse.Namespace:
+    """Parse the options provided on the command line.
+
+    Returns:
+        argparse.Namespace: The parameters provided on the command line.
+    """
+
+    parser = argparse.ArgumentParser()
+    required_args = parser.add_argument_group("required arguments")
+    required_args.add_argument(
+        "input_xml",
+        type=str,
+        action="store",
+        help="nom du fichier XML Telepac à contrôler",
+    )
+    required_args.add_argument(
+        "--output_dir",
+        type=str,
+        action="store",
+        default=os.getcwd(),
+        required=False,
+        help="Nom du répertoire de sortie du contrôle",
+    )
+    required_args.add_argument(
+        "--excel_filename",
+        type=str,
+        action=check_extension({"xlsx"}),
+        default="controle_sna.xlsx",
+        required=False,
+        help="Nom du fichier excel du contrôle. Extension xlsx obligatoire",
+    )
+    required_args.add_argument(
+        "--tolerance",
+        type=float,
+        action="store",
+        default=TOLERANCE,
+        required=False,
+        help="Distance (m) en deçà de laquelle une SNA touche un ilot ou une parcelle",
+    )
+    required_args.add_argument(
+        "--streaming",
+        action="store_true",
+        default=False,
+        help="Lecture du xml en flux (iterparse)",
+    )
+    required_args.add_argument(
+        "--cache_dir",
+        type=str,
+        action="store",
+        default=None,
+        required=False,
+        help="Répertoire du cache des couches extraites",
+    )
+    return parser.parse_args()
+
+
+def sna_pairs(sna_geometries, geometries, tolerance=TOLERANCE):
+    """
+    Paires (indice de la SNA, indice de la géométrie) à moins de tolerance
+    mètres l'une de l'autre, trouvées par l'index spatial des géométries.
+    """
+    import numpy as np
+    import shapely
+
+    tree = shapely.STRtree(np.asarray(geometries))
+    sna_index, index = tree.query(
+        np.asarray(sna_geometries), predicate="dwithin", distance=tolerance
+    )
+    order = np.lexsort((index, sna_index))
+    return sna_index[order], index[order]
+
+
+def border_lengths(sna_geometries, geometries, sna_index, index, tolerance=TOLERANCE):
+    """
+    Longueurs (m) de la bordure de chaque géométrie comprise dans la SNA
+    appariée (élargie de tolerance), et surfaces (m²) de leurs intersections,
+    pour les paires (sna_index, index). Les SNA élargies et les bordures sont
+    calculées une seule fois, quel que soit le nombre de paires de chacune ;
+    une SNA ponctuelle (arbre isolé) n'a ni longueur ni surface.
+    """
+    import numpy as np
+    import shapely
+
+    sna_geometries = np.asarray(sna_geometries)
+    geometries = np.asarray(geometries)
+    surfacic = shapely.get_dimensions(sna_geometries)[sna_index] == 2
+    sna_index, index = sna_index[surfacic], index[surfacic]
+
+    zones = shapely.buffer(sna_geometries, tolerance, quad_segs=1)
+    boundaries = shapely.boundary(geometries)
+    lengths = np.zeros(len(surfacic))
+    areas = np.zeros(len(surfacic))
+    lengths[surfacic] = shapely.length(
+        shapely.intersection(boundaries[index], zones[sna_index])
+    )
+    areas[surfacic] = shapely.area(
+        shapely.intersection(geometries[index], sna_geometries[sna_index])
+    )
+    return lengths, areas
+
+
+def computed_intersections(sna, gdf, keys, tolerance=TOLERANCE):
+    """
+    Intersections constatées entre les SNA et les éléments de gdf,
+    identifiés par les colonnes keys.
+
+    Retourne un DataFrame (numéro de SNA, keys, longueur-calculee,
+    surface-intersection), une ligne par paire SNA / élément, les clés en
+    entiers (Int64).
+    """
+    import pandas as pd
+
+    sna_index, index = sna_pairs(sna.geometry.values, gdf.geometry.values, tolerance)
+    lengths, areas = border_lengths(
+        sna.geometry.values, gdf.geometry.values, sna_index, index, tolerance
+    )
+    computed = pd.DataFrame({SNA_KEY: sna[SNA_KEY].to_numpy()[sna_index]})
+    for key in keys:
+        computed[key] = gdf[key].to_numpy()[index]
+    # Clés entières, comme celles des tables de relations
+    for column in [SNA_KEY] + list(keys):
+        values = pd.to_numeric(computed[column], errors="coerce")
+        computed[column] = values.astype("Int64")
+    computed["longueur-calculee"] = lengths.round(2)
+    computed["surface-intersection"] = areas.round(2)
+    return computed
+
+
+def declared_intersections(sna, layer, keys, fields=None):
+    """
+    Intersections déclarées des SNA, lues dans la table de relations layer
+    (sna_ilots ou sna_parcelles, voir extract_sna.build_relation) : une ligne
+    par paire SNA / élément keys, avec les champs fields : {champ déclaré:
+    colonne en sortie}.
+    """
+    from extract_functions.extract_sna import build_relation
+
+    fields = fields or {}
+    index = [SNA_KEY] + list(keys)
+    declared = build_relation(sna, layer)[index + list(fields)].rename(columns=fields)
+    return declared.drop_duplicates(subset=index, ignore_index=True)
+
+
+def compare_intersections(declared, computed, keys, length=None):
+    """
+    Comparaison des intersections déclarées et constatées, appariées sur le
+    numéro de SNA et keys.
+
+    Si length (colonne des longueurs déclarées) est renseigné, les longueurs
+    déclarées et calculées sont aussi comparées.
+
+    Retourne un DataFrame de toutes les intersections avec leur statut.
+    """
+    import numpy as np
+    import pandas as pd
+
+    index = [SNA_KEY] + list(keys)
+    result = declared.merge(computed, on=index, how="outer", indicator=True)
+    result.insert(len(index), "declaree", result["_merge"] != "right_only")
+    result.insert(len(index) + 1, "constatee", result["_merge"] != "left_only")
+    result = result.drop(columns="_merge")
+
+    statut = np.full(len(result), CONFORME, dtype=object)
+    statut[~result["declaree"].to_numpy()] = NON_DECLAREE
+    statut[~result["constatee"].to_numpy()] = NON_CONSTATEE
+    if length is not None:
+        declared_length = pd.to_numeric(result[length], errors="coerce")
+        gap = (declared_length - result["longueur-calculee"]).abs()
+        allowed = np.maximum(LENGTH_TOLERANCE * declared_length, LENGTH_MIN_GAP)
+        different = (gap > allowed).to_numpy() & (statut == CONFORME)
+        statut[different] = LONGUEUR_DIFFERENTE
+        result[length] = declared_length
+    result["statut"] = statut
+    return result.sort_values(index, ignore_index=True)
+
+
+def check_sna(layers, tolerance=TOLERANCE):
+    """
+    Contrôle des intersections déclarées des SNA avec les ilots et les
+    parcelles de layers (couches ilots, parcelles et sna en Lambert-93).
+
+    Retourne un dictionnaire {controle_sna_ilots: DataFrame,
+    controle_sna_parcelles: DataFrame} des intersections déclarées et
+    constatées, avec leur statut.
+    """
+    # Colonnes absentes des couches vides ou incomplètes
+    sna, ilots, parcelles = (
+        layers[layer].assign(
+            **{column: None for column in columns if column not in layers[layer]}
+        )
+        for layer, columns in (
+            ("sna", (SNA_KEY, "intersectionsSna_Ilots", "intersectionSna_Parcelles")),
+            ("ilots", ("numero-ilot", "numero-ilot-reference")),
+            ("parcelles", ("numero-ilot-reference", "numero-parcelle")),
+        )
+    )
+
+    # Les intersections déclarées désignent les ilots par leur numéro
+    numeros = dict(zip(ilots["numero-ilot-reference"], ilots["numero-ilot"]))
+    parcelles = parcelles.assign(
+        **{"numero-ilot": parcelles["numero-ilot-reference"].map(numeros)}
+    )
+
+    # Longueur déclarée : longueur IAE, à défaut longueur SIE
+    ilot_keys = ("numero-ilot",)
+    parcelle_keys = ("numero-ilot", "numero-parcelle")
+    declared_ilots = declared_intersections(
+        sna, "sna_ilots", ilot_keys, {"largeur": "largeur-declaree"}
+    )
+    declared_parcelles = declared_intersections(
+        sna,
+        "sna_parcelles",
+        parcelle_keys,
+        {"longueur-iae": "longueur-declaree", "longueur-sie": "longueur-sie"},
+    )
+    declared_parcelles["longueur-declaree"] = declared_parcelles[
+        "longueur-declaree"
+    ].fillna(declared_parcelles.pop("longueur-sie"))
+
+    return {
+        "controle_sna_ilots": compare_intersections(
+            declared_ilots,
+            computed_intersections(sna, ilots, ilot_keys, tolerance),
+            ilot_keys,
+        ),
+        "controle_sna_parcelles": compare_intersections(
+            declared_parcelles,
+            computed_intersections(sna, parcelles, parcelle_keys, tolerance),
+            parcelle_keys,
+            length="longueur-declaree",
+        ),
+    }
+
+
+def check_sna_xml(xml_file, tolerance=TOLERANCE, streaming=False, cache_dir=None):
+    """
+    Contrôle des intersections déclarées des SNA d'un fichier XML telepac
+    (voir check_sna).
+    """
+    layers = extract_layers(
+        xml_file,
+        layers=["ilots", "parcelles", "sna"],
+        streaming=streaming,
+        crs=LAMBERT93,
+        cache_dir=cache_dir,
+    )
+    return check_sna(layers, tolerance=tolerance)
+
+
+if __name__ == "__main__":
+
+    # Import des paramètres
+    args = usage()
+    if not os.path.exists(args.output_dir):
+        os.makedirs(args.output_dir)
+
+    controle = check_sna_xml(
+        args.input_xml,
+        tolerance=args.tolerance,
+        streaming=args.streaming,
+        cache_dir=args.cache_dir,
+    )
+
+    for layer, df in controle.items():
+        counts = df["statut"].value_counts()
+        print(
+            f"{layer} : "
+            + ", ".join(
+                f"{counts.get(statut, 0)} {statut}"
+                for statut in (
+                    CONFORME,
+                    NON_DECLAREE,
+                    NON_CONSTATEE,
+                    LONGUEUR_DIFFERENTE,
+                )
+            )
+        )
+
+    # Création d'un fichier excel du contrôle
+    write_excel(controle, f"{args.output_dir}/{args.excel_filename}")
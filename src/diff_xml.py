@@ -0,0 +1,281 @@
+"""
+Différences entre deux fichiers xml TELEPAC d'un même producteur
+(par exemple une déclaration et sa modification, ou deux campagnes).
+
+Les ilots sont appariés sur leur numero-ilot-reference et les parcelles sur
+(numero-ilot-reference, numero-parcelle). Seuls les éléments ajoutés,
+supprimés ou modifiés (attributs ou géométrie) sont écrits en sortie.
+
+Usage:
+    python diff_xml.py old_xml new_xml [--output_dir OUTPUT_DIR] [--excel_filename FILE]
+                       [--parquet] [--streaming] [--keep_lambert93] [--force]
+                       [--cache_dir CACHE_DIR]
+"""
+
+import argparse
+import hashlib
+import os
+
+from extract_functions.reprojection import LAMBERT93, WGS84, reproject_layers
+from output_functions.excel import write_excel
+from output_functions.parquet import detect_numero_pacage
+from read_xml import check_extension, extract_layers
+
+# Clés d'appariement des couches comparées : {couche: colonnes de la clé}
+DIFF_KEYS = {
+    "ilots": ("numero-ilot-reference",),
+    "parcelles": ("numero-ilot-reference", "numero-parcelle"),
+}
+
+# Statuts des éléments en sortie
+AJOUT = "ajout"
+SUPPRESSION = "suppression"
+MODIFICATION = "modification"
+
+# Rang d'un élément parmi ceux de même clé (clés en double appariées dans l'ordre)
+OCCURRENCE = "_occurrence"
+
+
+def usage() -> argparse.Namespace:
+    """Parse the options provided on the command line.
+
+    Returns:
+        argparse.Namespace: The parameters provided on the command line.
+    """
+
+    parser = argparse.ArgumentParser()
+    required_args = parser.add_argument_group("required arguments")
+    required_args.add_argument(
+        "old_xml",
+        type=str,
+        action="store",
+        help="fichier XML Telepac de référence (ancienne déclaration)",
+    )
+    required_args.add_argument(
+        "new_xml",
+        type=str,
+        action="store",
+        help="fichier XML Telepac à comparer (nouvelle déclaration)",
+    )
+    required_args.add_argument(
+        "--output_dir",
+        type=str,
+        action="store",
+        default=os.getcwd(),
+        required=False,
+        help="Nom du répertoire de sortie des différences",
+    )
+    required_args.add_argument(
+        "--excel_filename",
+        type=str,
+        action=check_extension({"xlsx"}),
+        default="diff.xlsx",
+        required=False,
+        help="Nom du fichier excel des différences. Extension xlsx obligatoire",
+    )
+    required_args.add_argument(
+        "--parquet",
+        action="store_true",
+        default=False,
+        help="Écrit aussi les différences de chaque couche en GeoParquet "
+        "(diff_<couche>.parquet)",
+    )
+    required_args.add_argument(
+        "--streaming",
+        action="store_true",
+        default=False,
+        help="Lecture des xml en flux (iterparse)",
+    )
+    required_args.add_argument(
+        "--keep_lambert93",
+        action="store_true",
+        default=False,
+        help="Géométries conservées en Lambert-93 (EPSG:2154) en sortie",
+    )
+    required_args.add_argument(
+        "--force",
+        action="store_true",
+        default=False,
+        help="Compare les fichiers même si leurs numéros pacage diffèrent",
+    )
+    required_args.add_argument(
+        "--cache_dir",
+        type=str,
+        action="store",
+        default=None,
+        required=False,
+        help="Répertoire du cache des couches extraites",
+    )
+    return parser.parse_args()
+
+
+def geometry_hashes(geometries):
+    """
+    Empreinte des coordonnées (WKB) de chaque géométrie, None si absente.
+    """
+    import shapely
+
+    return [
+        None if wkb is None else hashlib.blake2b(wkb, digest_size=16).digest()
+        for wkb in shapely.to_wkb(geometries, output_dimension=2)
+    ]
+
+
+def as_objects(series):
+    """
+    Valeurs d'une colonne en objets Python, None pour les valeurs manquantes.
+    """
+    import numpy as np
+
+    return np.asarray(series.astype(object).where(series.notna(), None))
+
+
+def changed_geometries(old_geometries, new_geometries):
+    """
+    Booléens des géométries modifiées entre deux tableaux appariés.
+
+    Les empreintes des coordonnées sont comparées d'abord : seules les paires
+    d'empreintes différentes sont comparées géométriquement (shapely.equals),
+    une géométrie dont seul le point de départ ou le sens change n'étant pas
+    considérée comme modifiée.
+    """
+    import numpy as np
+    import shapely
+
+    old_geometries = np.asarray(old_geometries)
+    new_geometries = np.asarray(new_geometries)
+    changed = np.array(
+        [
+            old_hash != new_hash
+            for old_hash, new_hash in zip(
+                geometry_hashes(old_geometries), geometry_hashes(new_geometries)
+            )
+        ],
+        dtype=bool,
+    )
+    changed[changed] = ~shapely.equals(old_geometries[changed], new_geometries[changed])
+    return changed
+
+
+def diff_layer(old, new, keys):
+    """
+    Différences entre deux versions d'une couche appariées sur keys.
+
+    Retourne un GeoDataFrame des éléments ajoutés et modifiés (valeurs de new)
+    et supprimés (valeurs de old), avec leur statut et, pour les éléments
+    modifiés, la liste des champs modifiés (geometry compris).
+    """
+    import geopandas as gpd
+    import pandas as pd
+
+    keys = list(keys)
+    index = keys + [OCCURRENCE]
+    old = old.assign(**{key: None for key in keys if key not in old})
+    new = new.assign(**{key: None for key in keys if key not in new})
+    old = old.assign(**{OCCURRENCE: old.groupby(keys, dropna=False).cumcount()})
+    new = new.assign(**{OCCURRENCE: new.groupby(keys, dropna=False).cumcount()})
+    old = old.set_index(index)
+    new = new.set_index(index)
+
+    added = new[~new.index.isin(old.index)].assign(statut=AJOUT)
+    removed = old[~old.index.isin(new.index)].assign(statut=SUPPRESSION)
+
+    # Comparaison des éléments présents dans les deux versions
+    common = new.index[new.index.isin(old.index)]
+    old_common = old.loc[common]
+    new_common = new.loc[common]
+    geometry = new.geometry.name
+    columns = [c for c in new.columns if c != geometry] + [
+        c for c in old.columns if c != geometry and c not in new.columns
+    ]
+    changes = {}
+    for column in columns:
+        old_values = as_objects(old_common.get(column, pd.Series(None, index=common)))
+        new_values = as_objects(new_common.get(column, pd.Series(None, index=common)))
+        changes[column] = old_values != new_values
+    changes[geometry] = changed_geometries(
+        old_common.geometry.values, new_common.geometry.values
+    )
+    changes = pd.DataFrame(changes, index=common)
+
+    modified = changes.any(axis=1).to_numpy()
+    modified_fields = [
+        ", ".join(changes.columns[row]) for row in changes.to_numpy()[modified]
+    ]
+    modified = new_common[modified].assign(
+        statut=MODIFICATION, champs_modifies=modified_fields
+    )
+
+    diff = pd.concat([added, removed, modified])
+    diff = diff.reset_index().drop(columns=OCCURRENCE)
+    first = keys + ["statut", "champs_modifies"]
+    diff = diff[first + [c for c in diff.columns if c not in first]]
+    return gpd.GeoDataFrame(diff, geometry=geometry, crs=new.crs)
+
+
+def diff_xml(old_xml, new_xml, streaming=False, force=False, cache_dir=None):
+    """
+    Différences des ilots et parcelles entre deux fichiers XML telepac.
+
+    Les géométries sont comparées en Lambert-93, sans reprojection. Une
+    ValueError est levée si les numéros pacage des deux fichiers diffèrent,
+    sauf si force est vrai.
+
+    Retourne un dictionnaire {nom de la couche: GeoDataFrame des différences}.
+    """
+    layers = list(DIFF_KEYS) + ["demandeur"]
+    old_layers, new_layers = (
+        extract_layers(
+            xml_file,
+            layers=layers,
+            streaming=streaming,
+            crs=LAMBERT93,
+            cache_dir=cache_dir,
+        )
+        for xml_file in (old_xml, new_xml)
+    )
+
+    old_pacage = detect_numero_pacage(old_layers)
+    new_pacage = detect_numero_pacage(new_layers)
+    if old_pacage != new_pacage and not force:
+        raise ValueError(
+            f"Numéros pacage différents : {old_pacage} et {new_pacage} "
+            "(utiliser --force pour comparer malgré tout)"
+        )
+
+    return {
+        layer: diff_layer(old_layers[layer], new_layers[layer], keys)
+        for layer, keys in DIFF_KEYS.items()
+    }
+
+
+if __name__ == "__main__":
+
+    # Import des paramètres
+    args = usage()
+    if not os.path.exists(args.output_dir):
+        os.makedirs(args.output_dir)
+
+    diff = diff_xml(
+        args.old_xml,
+        args.new_xml,
+        streaming=args.streaming,
+        force=args.force,
+        cache_dir=args.cache_dir,
+    )
+    diff = reproject_layers(diff, LAMBERT93 if args.keep_lambert93 else WGS84)
+
+    for layer, gdf in diff.items():
+        counts = gdf["statut"].value_counts()
+        print(
+            f"{layer} : {counts.get(AJOUT, 0)} ajout(s), "
+            f"{counts.get(SUPPRESSION, 0)} suppression(s), "
+            f"{counts.get(MODIFICATION, 0)} modification(s)"
+        )
+
+    # Création d'un fichier excel des différences
+    write_excel(diff, f"{args.output_dir}/{args.excel_filename}")
+
+    if args.parquet:
+        for layer, gdf in diff.items():
+            gdf.to_parquet(f"{args.output_dir}/diff_{layer}.parquet")
@@ -0,0 +1,90 @@
+"""
+Export en tuiles vectorielles (MBTiles) des couches géographiques des jeux de
+données GeoParquet d'un lot de fichiers xml TELEPAC (batch_xml.py --parquet_dir),
+pour visualiser toutes les exploitations d'un territoire à la fois.
+
+Usage:
+    python export_tiles.py parquet_dir mbtiles_file [--layers LAYER [LAYER ...]]
+                           [--campagne CAMPAGNE] [--min_zoom MIN_ZOOM] [--max_zoom MAX_ZOOM]
+"""
+
+import argparse
+import time
+
+from output_functions.mbtiles import MAX_ZOOM, MIN_ZOOM, TILE_FIELDS, export_mbtiles
+
+
+def usage() -> argparse.Namespace:
+    """Parse the options provided on the command line.
+
+    Returns:
+        argparse.Namespace: The parameters provided on the command line.
+    """
+
+    parser = argparse.ArgumentParser()
+    required_args = parser.add_argument_group("required arguments")
+    required_args.add_argument(
+        "parquet_dir",
+        type=str,
+        action="store",
+        help="Répertoire des jeux de données GeoParquet (--parquet_dir)",
+    )
+    required_args.add_argument(
+        "mbtiles_file",
+        type=str,
+        action="store",
+        help="Fichier MBTiles des tuiles vectorielles en sortie (remplacé s'il existe)",
+    )
+    required_args.add_argument(
+        "--layers",
+        type=str,
+        nargs="+",
+        choices=list(TILE_FIELDS),
+        default=list(TILE_FIELDS),
+        required=False,
+        help="Couches à exporter (ilots, parcelles, sna et zdh par défaut)",
+    )
+    required_args.add_argument(
+        "--campagne",
+        type=str,
+        action="store",
+        default=None,
+        required=False,
+        help="Campagne à exporter (toutes par défaut)",
+    )
+    required_args.add_argument(
+        "--min_zoom",
+        type=int,
+        action="store",
+        default=MIN_ZOOM,
+        required=False,
+        help="Niveau de zoom minimal des tuiles",
+    )
+    required_args.add_argument(
+        "--max_zoom",
+        type=int,
+        action="store",
+        default=MAX_ZOOM,
+        required=False,
+        help="Niveau de zoom maximal des tuiles",
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+
+    # Import des paramètres
+    args = usage()
+    start = time.perf_counter()
+    nb_tiles = export_mbtiles(
+        args.parquet_dir,
+        args.mbtiles_file,
+        layers=args.layers,
+        campagne=args.campagne,
+        min_zoom=args.min_zoom,
+        max_zoom=args.max_zoom,
+    )
+    print(
+        f"{nb_tiles} tuiles écrites dans {args.mbtiles_file} "
+        f"en {time.perf_counter() - start:.1f}s"
+    )
@@ -0,0 +1,95 @@
+"""
+Module des moteurs de lecture XML (backends).
+
+- etree : xml.etree.ElementTree de la bibliothèque standard (par défaut)
+- lxml : lxml.etree, recherche des enregistrements par XPath compilé et
+  lecture en flux filtrée par tag (iterparse(tag=...))
+
+Les extracteurs n'utilisent que l'API commune aux deux moteurs (iter, find,
+findall, attrib, text) : les couches extraites sont identiques quel que soit
+le moteur. lxml est optionnel et n'est importé que s'il est demandé.
+"""
+
+import functools
+import xml.etree.ElementTree as ET
+
+ETREE = "etree"
+LXML = "lxml"
+BACKENDS = (ETREE, LXML)
+
+
+@functools.lru_cache(maxsize=None)
+def load_lxml():
+    """
+    Import à la demande de lxml.etree.
+    """
+    try:
+        from lxml import etree
+    except ImportError as error:
+        raise ImportError(
+            "Le moteur lxml nécessite le paquet lxml (pip install lxml)"
+        ) from error
+    return etree
+
+
+def check_backend(backend):
+    """
+    Vérifie le nom du moteur demandé.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Moteur XML inconnu : {backend} (parmi {BACKENDS})")
+    return backend
+
+
+def is_lxml(elem):
+    """
+    Vrai si l'élément provient de lxml.
+    """
+    return hasattr(elem, "getparent")
+
+
+def parse(source, backend=ETREE):
+    """
+    Lit un document XML complet et retourne sa racine.
+    """
+    if check_backend(backend) == LXML:
+        return load_lxml().parse(source).getroot()
+    return ET.parse(source).getroot()
+
+
+def iterparse(source, events=("end",), backend=ETREE):
+    """
+    Lecture en flux d'un document XML : itérateur de tuples (événement, élément).
+    """
+    if check_backend(backend) == LXML:
+        return load_lxml().iterparse(source, events=events)
+    return ET.iterparse(source, events=events)
+
+
+@functools.lru_cache(maxsize=None)
+def compiled_xpath(tag):
+    """
+    XPath compilé des descendants d'un tag complet {namespace}nom.
+    """
+    namespace, _, name = tag[1:].partition("}")
+    return load_lxml().XPath("descendant::n:" + name, namespaces={"n": namespace})
+
+
+def iter_elements(xml_root, tag):
+    """
+    Éléments de tag complet tag sous xml_root, dans l'ordre du document,
+    comme xml_root.findall(".//tag") : un XPath compilé est utilisé pour les
+    documents lxml.
+    """
+    if is_lxml(xml_root):
+        return compiled_xpath(tag)(xml_root)
+    return xml_root.iter(tag)
+
+
+def tostring(elem):
+    """
+    Sérialisation XML (texte) d'un élément, quel que soit son moteur.
+    """
+    if is_lxml(elem):
+        return load_lxml().tostring(elem, encoding="unicode")
+    return ET.tostring(elem, encoding="unicode")
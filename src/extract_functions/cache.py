@@ -0,0 +1,168 @@
+"""
+Cache disque des couches extraites des fichiers XML telepac.
+
+Chaque couche est stockée (pickle) sous une clé calculée à partir du contenu
+du fichier xml, de la version des extracteurs (code source du package
+extract_functions et versions de pandas, geopandas et shapely), du nom de la
+couche et du système de coordonnées. Un fichier inchangé n'est donc plus relu
+et une modification des extracteurs invalide le cache sans intervention.
+
+La taille du cache est bornée : les couches les moins récemment utilisées
+(date de modification, mise à jour à chaque lecture) sont supprimées.
+"""
+
+import functools
+import hashlib
+import os
+import pickle
+from pathlib import Path
+
+from extract_functions.reprojection import WGS84
+
+# Taille maximale du cache par défaut (Mo)
+CACHE_MAX_MB = 1024
+CACHE_SUFFIX = ".pkl"
+
+# Bibliothèques dont la version modifie le contenu des couches mises en cache
+VERSIONED_PACKAGES = ("pandas", "geopandas", "shapely")
+
+
+@functools.lru_cache(maxsize=None)
+def extractor_version():
+    """
+    Empreinte du code des extracteurs et des versions des bibliothèques,
+    calculée au premier appel seulement.
+    """
+    from importlib import metadata
+
+    digest = hashlib.sha256()
+    for source in sorted(Path(__file__).parent.glob("*.py")):
+        digest.update(source.name.encode())
+        digest.update(source.read_bytes())
+    for package in VERSIONED_PACKAGES:
+        try:
+            digest.update(f"{package}=={metadata.version(package)}".encode())
+        except metadata.PackageNotFoundError:
+            digest.update(f"{package} absent".encode())
+    return digest.hexdigest()
+
+
+def file_digest(xml_file, chunk_size=1 << 20):
+    """
+    Empreinte sha256 du contenu d'un fichier.
+    """
+    digest = hashlib.sha256()
+    with open(xml_file, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def cache_path(cache_dir, xml_digest, layer, crs):
+    """
+    Chemin du fichier de cache d'une couche.
+    """
+    key = hashlib.sha256(
+        f"{xml_digest}:{extractor_version()}:{layer}:{crs}".encode()
+    ).hexdigest()
+    return os.path.join(cache_dir, f"{key}{CACHE_SUFFIX}")
+
+
+def read_cache(path):
+    """
+    Lit une couche du cache, None si elle est absente ou illisible.
+    """
+    try:
+        with open(path, "rb") as f:
+            layer = pickle.load(f)
+    except Exception:
+        # Entrée absente, supprimée par une éviction concurrente ou illisible
+        return None
+
+    # Date d'utilisation pour l'éviction LRU
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        pass
+    return layer
+
+
+def write_cache(path, layer):
+    """
+    Écrit une couche dans le cache (écriture atomique : un échec de la
+    sérialisation ne laisse aucun fichier partiel).
+    """
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            pickle.dump(layer, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+def evict(cache_dir, max_mb=CACHE_MAX_MB):
+    """
+    Supprime les couches les moins récemment utilisées au-delà de max_mb.
+    """
+    entries = []
+    for entry in os.scandir(cache_dir):
+        if entry.name.endswith(CACHE_SUFFIX):
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+    size = sum(entry_size for _, entry_size, _ in entries)
+    for _, entry_size, path in sorted(entries):
+        if size <= max_mb * 1024**2:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        size -= entry_size
+
+
+def extract_layers_cached(
+    xml_file, layers, extract, cache_dir, crs=WGS84, max_mb=CACHE_MAX_MB
+):
+    """
+    Extrait les couches demandées en passant par le cache de cache_dir.
+
+    Paramètres :
+    - xml_file : fichier XML telepac
+    - layers : noms des couches demandées
+    - extract : fonction d'extraction (liste de couches) -> dictionnaire
+      {nom de la couche: DataFrame ou GeoDataFrame}, appelée uniquement pour
+      les couches absentes du cache
+    - cache_dir : répertoire du cache
+    - crs : système de coordonnées des géométries extraites
+    - max_mb : taille maximale du cache (Mo)
+
+    Retourne un dictionnaire {nom de la couche: DataFrame ou GeoDataFrame}.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    xml_digest = file_digest(xml_file)
+    paths = {layer: cache_path(cache_dir, xml_digest, layer, crs) for layer in layers}
+
+    extracted = {}
+    for layer, path in paths.items():
+        cached = read_cache(path)
+        if cached is not None:
+            extracted[layer] = cached
+
+    # Le fichier n'est relu que si des couches manquent dans le cache
+    missing = [layer for layer in layers if layer not in extracted]
+    if missing:
+        for layer, df in extract(missing).items():
+            write_cache(paths[layer], df)
+            extracted[layer] = df
+        evict(cache_dir, max_mb)
+
+    return {layer: extracted[layer] for layer in layers}
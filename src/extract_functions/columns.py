@@ -0,0 +1,168 @@
+"""
+Module de construction des couches colonne par colonne.
+
+Les collecteurs ajoutent les valeurs de chaque enregistrement directement
+dans les colonnes d'un ColumnBuilder, sans dictionnaire par ligne. Les
+colonnes de codes à faible cardinalité (CATEGORICAL_COLUMNS) sont stockées
+sous forme de codes entiers (array) et d'une table des valeurs distinctes :
+chaque code n'est gardé qu'une fois et la colonne du DataFrame est une
+colonne catégorielle pandas.
+
+Le DataFrame obtenu est celui qu'aurait donné la liste des dictionnaires
+des enregistrements : colonnes dans l'ordre de leur première apparition,
+valeurs manquantes (NaN) pour les colonnes absentes d'un enregistrement.
+"""
+
+from array import array
+
+# Colonnes de codes à faible cardinalité, encodées en catégories
+CATEGORICAL_COLUMNS = frozenset(
+    {
+        "code-culture",
+        "code-mesure",
+        "commune",
+        "precision",
+        "portee",
+        "reconversion-pp",
+        "retournement-pp",
+        "obligation-reimplantation-pp",
+        "culture-principale_production-semences",
+        "agri-bio_conduite-bio",
+        "premiere-campagne",
+        "derniere-campagne",
+        "sous-type-geometrie",
+        "categorieSna",
+        "typeSna",
+        "densiteVegetation",
+    }
+)
+
+# Valeur d'une colonne absente d'un enregistrement (comme pandas)
+MISSING = float("nan")
+
+# Code d'une valeur absente dans une colonne catégorielle
+MISSING_CODE = -1
+
+
+class ColumnBuilder:
+    """
+    Colonnes d'une couche, remplies enregistrement par enregistrement :
+    add (ou update) pour chaque valeur de l'enregistrement en cours, puis
+    end_row pour passer au suivant.
+    """
+
+    def __init__(self, categorical=CATEGORICAL_COLUMNS):
+        self.nb_rows = 0
+        self.columns = {}
+        self.categories = {}
+        self.categorical = categorical
+
+    def __len__(self):
+        return self.nb_rows
+
+    def column(self, name):
+        """
+        Colonne name, complétée jusqu'à l'enregistrement en cours.
+        """
+        values = self.columns.get(name)
+        if values is None:
+            if name in self.categorical:
+                values = array("i")
+                self.categories[name] = {}
+            else:
+                values = []
+            self.columns[name] = values
+        if len(values) < self.nb_rows:
+            self.pad(name, values)
+        return values
+
+    def pad(self, name, values):
+        """
+        Complète une colonne par des valeurs manquantes jusqu'à nb_rows.
+        """
+        missing = self.nb_rows - len(values)
+        if name in self.categories:
+            values.extend(array("i", [MISSING_CODE]) * missing)
+        else:
+            values.extend([MISSING] * missing)
+
+    def add(self, name, value):
+        """
+        Valeur de la colonne name pour l'enregistrement en cours. Une seconde
+        valeur de la même colonne remplace la première (comme dict.update).
+        """
+        values = self.column(name)
+        categories = self.categories.get(name)
+        if categories is not None:
+            value = (
+                MISSING_CODE
+                if value is None
+                else categories.setdefault(value, len(categories))
+            )
+        if len(values) > self.nb_rows:
+            values[self.nb_rows] = value
+        else:
+            values.append(value)
+
+    def update(self, values, prefix=""):
+        """
+        Valeurs {colonne: valeur} de l'enregistrement en cours, les noms des
+        colonnes étant précédés de prefix.
+        """
+        for name, value in values.items():
+            self.add(prefix + name if prefix else name, value)
+
+    def end_row(self):
+        """
+        Termine l'enregistrement en cours.
+        """
+        self.nb_rows += 1
+
+    def extend(self, other):
+        """
+        Ajoute à la suite les enregistrements d'un autre ColumnBuilder (couche
+        extraite par morceaux du document) : les colonnes nouvelles sont
+        ajoutées dans leur ordre d'apparition et les codes des colonnes
+        catégorielles sont convertis dans la table des valeurs de celui-ci,
+        comme si les enregistrements avaient été ajoutés un par un.
+        """
+        import numpy as np
+
+        for name, values in other.columns.items():
+            if len(values) < other.nb_rows:
+                other.pad(name, values)
+            column = self.column(name)
+            categories = other.categories.get(name)
+            if categories is None:
+                column.extend(values)
+                continue
+            own = self.categories[name]
+            # Le dernier élément convertit les valeurs absentes (MISSING_CODE)
+            codes = np.array(
+                [own.setdefault(value, len(own)) for value in categories]
+                + [MISSING_CODE],
+                dtype=np.intc,
+            )
+            column.frombytes(codes[np.frombuffer(values, dtype=np.intc)].tobytes())
+        self.nb_rows += other.nb_rows
+
+    def to_columns(self):
+        """
+        Colonnes {nom: valeurs} complètes, prêtes pour pandas : listes de
+        valeurs, ou pandas.Categorical pour les colonnes catégorielles.
+        """
+        import numpy as np
+        import pandas as pd
+
+        data = {}
+        for name, values in self.columns.items():
+            if len(values) < self.nb_rows:
+                self.pad(name, values)
+            categories = self.categories.get(name)
+            if categories is None:
+                data[name] = values
+            else:
+                data[name] = pd.Categorical.from_codes(
+                    np.frombuffer(values, dtype=np.intc), categories=list(categories)
+                )
+        return data
@@ -2,59 +2,66 @@
 Module contenant les fonctions d'extraction des éléments bio d'un fichier XML.
 """
 
-import xml.etree.ElementTree as ET
-import geopandas as gpd
-import shapely
-from osgeo import ogr
+from extract_functions.backends import iter_elements
+from extract_functions.columns import ColumnBuilder
+from extract_functions.fields import namespaced, namespaced_fields, ordered, read_record
+from extract_functions.gml import build_geometries, read_geometry
+from extract_functions.reprojection import LAMBERT93, WGS84, reproject
 
+# Champs d'un élément bio : (tag, colonne)
+BIO_FIELDS = (
+    ("numero-element", "numero-element-bio"),
+    ("code-mesure", "code-mesure"),
+    ("premiere-campagne", "premiere-campagne"),
+    ("derniere-campagne", "derniere-campagne"),
+)
 
-def extract_bio(xml_root, ns, ns_gml):
+
+def collect_bio(ilot, ns, ns_gml, columns, geometries):
+    """
+    Ajoute les éléments bio d'un ilot aux colonnes de données (ColumnBuilder)
+    et à la liste des géométries.
+    """
+    fields = namespaced_fields(ns, BIO_FIELDS)
+    elements_bio, element_bio = namespaced(ns, ("elements-bio", "element-bio"))
+    (polygon,) = namespaced(ns_gml, ("Polygon",))
+    numero_ilot_ref = ilot.attrib.get("numero-ilot-reference")
+
+    # Vérifie la présence d'éléments bio dans l'ilot
+    for d in ilot.iter(elements_bio):
+        for e in d.iter(element_bio):
+            # Extraire les données et la géométrie de l'élément bio
+            values, elements = read_record(e, fields, (polygon,))
+            for geom in elements[polygon]:
+                geometries.append(read_geometry(geom, ns_gml))
+
+            # Ajouter les données aux colonnes
+            columns.add("numero-ilot-reference", numero_ilot_ref)
+            columns.update(ordered(values, fields))
+            columns.end_row()
+
+
+def build_bio(columns, geometries):
+    """
+    Crée le GeoDataFrame des éléments bio à partir des données collectées.
+    """
+    import geopandas as gpd
+
+    return gpd.GeoDataFrame(
+        columns.to_columns(), geometry=build_geometries(geometries), crs=LAMBERT93
+    )
+
+
+def extract_bio(xml_root, ns, ns_gml, crs=WGS84):
     """
     Extrait les informations sur les éléments bio d'un document XML.
+    Les géométries sont reprojetées dans crs (WGS84 par défaut).
     """
-    list_bio = []
+    columns = ColumnBuilder()
     geometries = []
 
-    for ilot in xml_root.findall(f".//{ns}ilot"):
-        # Vérifie la présence d'éléments bio dans le fichier XML
-        for d in ilot.findall(f".//{ns}elements-bio"):
-            for e in d.findall(f".//{ns}element-bio"):
-                # Extraire les données des éléments bio
-                numeroelement = next(
-                    (num.text for num in e.findall(f".//{ns}numero-element")), None
-                )
-                codemesure = next(
-                    (code.text for code in e.findall(f".//{ns}code-mesure")), None
-                )
-
-                # Géométrie de l'élément bio
-                for geom in e.findall(f".//{ns_gml}Polygon"):
-                    xmlstr = ET.tostring(geom, encoding="unicode")
-                    geom_gdal = ogr.CreateGeometryFromGML(xmlstr)
-                    polygon = shapely.wkb.loads(bytes(geom_gdal.ExportToIsoWkb()))
-                    geometries.append(polygon)
-
-                # Extraire les informations sur les campagnes
-                premcampagne = next(
-                    (prem.text for prem in e.findall(f".//{ns}premiere-campagne")), None
-                )
-                dercampagne = next(
-                    (der.text for der in e.findall(f".//{ns}derniere-campagne")), None
-                )
-
-                # Ajouter les données à la liste
-                list_bio.append(
-                    {
-                        "numero-ilot-reference": ilot.attrib.get(
-                            "numero-ilot-reference"
-                        ),
-                        "numero-element-bio": numeroelement,
-                        "code-mesure": codemesure,
-                        "premiere-campagne": premcampagne,
-                        "derniere-campagne": dercampagne,
-                    }
-                )
+    for ilot in iter_elements(xml_root, f"{ns}ilot"):
+        collect_bio(ilot, ns, ns_gml, columns, geometries)
 
     # Créer un GeoDataFrame
-    gdf = gpd.GeoDataFrame(list_bio, geometry=geometries, crs="EPSG:2154")
-    return gdf.to_crs(crs="EPSG:4326")
+    return reproject(build_bio(columns, geometries), crs)
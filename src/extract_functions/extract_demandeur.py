@@ -24,7 +24,7 @@ def extract_demandeur(xml_root, ns, ns_gml):
 
     # Extraction des informations du demandeur
     for d in xml_root.findall(f".//{ns}demandeur"):
-        dict_demandeur = d.attrib.copy()
+        dict_demandeur = dict(d.attrib)
 
         # Ajout du numéro de pacage dans dict_demandeur
         dict_demandeur["numero-pacage"] = numero_pacage
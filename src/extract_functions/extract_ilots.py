@@ -2,35 +2,55 @@
 Module qui contient la fonction extract_ilots.
 """
 
-import xml.etree.ElementTree as ET
-import geopandas as gpd
-import shapely
-from osgeo import ogr
+from extract_functions.backends import iter_elements
+from extract_functions.columns import ColumnBuilder
+from extract_functions.fields import namespaced
+from extract_functions.gml import build_geometries, read_geometry
+from extract_functions.reprojection import LAMBERT93, WGS84, reproject
 
 
-def extract_ilots(xml_root, ns, ns_gml):
+def collect_ilot(ilot, ns, ns_gml, columns, geometries):
+    """
+    Ajoute les informations d'un ilot aux colonnes de données (ColumnBuilder)
+    et à la liste des géométries.
+    """
+    (tag_commune,) = namespaced(ns, ("commune",))
+    (polygon,) = namespaced(ns_gml, ("Polygon",))
+
+    # Premières occurrences seulement : le parcours s'arrête dès qu'elles
+    # sont trouvées, sans descendre dans les parcelles
+    commune = next((c.text for c in ilot.iter(tag_commune)), None)
+    geom = next(ilot.iter(polygon), None)
+
+    if geom is not None:
+        geometries.append(read_geometry(geom, ns_gml))
+
+        columns.add("numero-ilot", ilot.attrib.get("numero-ilot"))
+        columns.add("numero-ilot-reference", ilot.attrib.get("numero-ilot-reference"))
+        columns.add("commune", commune)
+        columns.end_row()
+
+
+def build_ilots(columns, geometries):
+    """
+    Crée le GeoDataFrame des ilots à partir des données collectées.
+    """
+    import geopandas as gpd
+
+    return gpd.GeoDataFrame(
+        columns.to_columns(), geometry=build_geometries(geometries), crs=LAMBERT93
+    )
+
+
+def extract_ilots(xml_root, ns, ns_gml, crs=WGS84):
     """
     Extrait les informations sur les ilots à partir d'un document XML.
+    Les géométries sont reprojetées dans crs (WGS84 par défaut).
     """
-    list_ilots = []
-
-    for ilot in xml_root.findall(f".//{ns}ilot"):
-        commune = next((c.text for c in ilot.findall(f".//{ns}commune")), None)
-        geom = next((g for g in ilot.findall(f".//{ns_gml}Polygon")), None)
-
-        if geom:
-            xmlstr = ET.tostring(geom, encoding="unicode")
-            geom_gdal = ogr.CreateGeometryFromGML(xmlstr)
-            polygon = shapely.wkb.loads(bytes(geom_gdal.ExportToIsoWkb()))
-
-            list_ilots.append(
-                {
-                    "numero-ilot": ilot.attrib.get("numero-ilot"),
-                    "numero-ilot-reference": ilot.attrib.get("numero-ilot-reference"),
-                    "commune": commune,
-                    "geometry": polygon,
-                }
-            )
-
-    gdf = gpd.GeoDataFrame(list_ilots, crs="EPSG:2154")
-    return gdf.to_crs(crs="EPSG:4326")
+    columns = ColumnBuilder()
+    geometries = []
+
+    for ilot in iter_elements(xml_root, f"{ns}ilot"):
+        collect_ilot(ilot, ns, ns_gml, columns, geometries)
+
+    return reproject(build_ilots(columns, geometries), crs)
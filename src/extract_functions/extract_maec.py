@@ -2,62 +2,66 @@
 Module pour extraire les informations sur les éléments MAEC d'un document XML.
 """
 
-import xml.etree.ElementTree as ET
-import geopandas as gpd
-import shapely
-from osgeo import ogr
+from extract_functions.backends import iter_elements
+from extract_functions.columns import ColumnBuilder
+from extract_functions.fields import namespaced, namespaced_fields, ordered, read_record
+from extract_functions.gml import build_geometries, read_geometry
+from extract_functions.reprojection import LAMBERT93, WGS84, reproject
 
+# Champs d'un élément MAEC : (tag, colonne)
+MAEC_FIELDS = (
+    ("numero-element", "numero-element-maec"),
+    ("code-mesure", "code-mesure"),
+    ("premiere-campagne", "premiere-campagne"),
+    ("derniere-campagne", "derniere-campagne"),
+    ("sous-type-geometrie", "sous-type-geometrie"),
+)
 
-def extract_maec(xml_root, ns, ns_gml):
+
+def collect_maec(ilot, ns, ns_gml, columns, geometries):
+    """
+    Ajoute les éléments MAEC d'un ilot aux colonnes de données (ColumnBuilder)
+    et à la liste des géométries.
+    """
+    fields = namespaced_fields(ns, MAEC_FIELDS)
+    (element_surfacique,) = namespaced(ns, ("element-surfacique",))
+    (polygon,) = namespaced(ns_gml, ("Polygon",))
+    numero_ilot_ref = ilot.attrib.get("numero-ilot-reference")
+
+    # Vérifie la présence d'éléments MAEC dans l'ilot
+    for d in ilot.iter(element_surfacique):
+        # Extraire les données et la géométrie de l'élément MAEC
+        values, elements = read_record(d, fields, (polygon,))
+        for geom in elements[polygon]:
+            geometries.append(read_geometry(geom, ns_gml))
+
+        # Ajouter les données aux colonnes
+        columns.add("numero-ilot-reference", numero_ilot_ref)
+        columns.update(ordered(values, fields))
+        columns.end_row()
+
+
+def build_maec(columns, geometries):
+    """
+    Crée le GeoDataFrame des éléments MAEC à partir des données collectées.
+    """
+    import geopandas as gpd
+
+    return gpd.GeoDataFrame(
+        columns.to_columns(), geometry=build_geometries(geometries), crs=LAMBERT93
+    )
+
+
+def extract_maec(xml_root, ns, ns_gml, crs=WGS84):
     """
     Extrait les informations sur les éléments MAEC d'un document XML.
+    Les géométries sont reprojetées dans crs (WGS84 par défaut).
     """
-    list_maec = []
+    columns = ColumnBuilder()
     geometries = []
 
-    for ilot in xml_root.findall(f".//{ns}ilot"):
-        # Vérifie la présence d'éléments MAEC dans le fichier XML
-        for d in ilot.findall(f".//{ns}element-surfacique"):
-            # Extraire les données des éléments MAEC
-            numeroelement = next(
-                (num.text for num in d.findall(f".//{ns}numero-element")), None
-            )
-            codemesure = next(
-                (code.text for code in d.findall(f".//{ns}code-mesure")), None
-            )
-
-            # Sous-type de géométrie
-            ssgeom = next(
-                (ss.text for ss in d.findall(f".//{ns}sous-type-geometrie")), None
-            )
-
-            # Géométrie de l'élément MAEC
-            for geom in d.findall(f".//{ns_gml}Polygon"):
-                xmlstr = ET.tostring(geom, encoding="unicode")
-                geom_gdal = ogr.CreateGeometryFromGML(xmlstr)
-                polygon = shapely.wkb.loads(bytes(geom_gdal.ExportToIsoWkb()))
-                geometries.append(polygon)
-
-            # Informations sur les campagnes
-            premcampagne = next(
-                (prem.text for prem in d.findall(f".//{ns}premiere-campagne")), None
-            )
-            dercampagne = next(
-                (der.text for der in d.findall(f".//{ns}derniere-campagne")), None
-            )
-
-            # Ajouter les données à la liste
-            list_maec.append(
-                {
-                    "numero-ilot-reference": ilot.attrib.get("numero-ilot-reference"),
-                    "numero-element-maec": numeroelement,
-                    "code-mesure": codemesure,
-                    "premiere-campagne": premcampagne,
-                    "derniere-campagne": dercampagne,
-                    "sous-type-geometrie": ssgeom,
-                }
-            )
+    for ilot in iter_elements(xml_root, f"{ns}ilot"):
+        collect_maec(ilot, ns, ns_gml, columns, geometries)
 
     # Créer un GeoDataFrame
-    gdf = gpd.GeoDataFrame(list_maec, geometry=geometries, crs="EPSG:2154")
-    return gdf.to_crs(crs="EPSG:4326")
+    return reproject(build_maec(columns, geometries), crs)
@@ -2,72 +2,89 @@
 Module contenant la fonction extract_parcelles.
 """
 
-import xml.etree.ElementTree as ET
-import geopandas as gpd
-import shapely
-from osgeo import ogr
+from extract_functions.backends import iter_elements
+from extract_functions.columns import ColumnBuilder
+from extract_functions.fields import namespaced, namespaced_fields, read_record
+from extract_functions.gml import build_geometries, read_geometry
+from extract_functions.reprojection import LAMBERT93, WGS84, reproject
 
+# Éléments dont les attributs sont repris : (tag, préfixe des colonnes)
+PARCELLE_ATTRIBUTES = (
+    ("descriptif-parcelle", ""),
+    ("culture-principale", "culture-principale_"),
+    ("agri-bio", "agri-bio_"),
+    ("engagements-maec", "engagements-maec_"),
+)
 
-def extract_parcelles(xml_root, ns, ns_gml):
+# Champs d'une parcelle : (tag, colonne)
+PARCELLE_FIELDS = (
+    ("precision", "precision"),
+    ("reconversion-pp", "reconversion-pp"),
+    ("retournement-pp", "retournement-pp"),
+    ("obligation-reimplantation-pp", "obligation-reimplantation-pp"),
+    ("portee", "portee"),
+    ("longueur-bordure", "longueur-bordure"),
+    ("code-culture", "code-culture"),
+    ("surface-admissible", "surface-admissible"),
+)
+
+
+def collect_parcelles(ilot, ns, ns_gml, columns, geometries):
+    """
+    Ajoute les parcelles d'un ilot aux colonnes de données (ColumnBuilder)
+    et à la liste des géométries.
+    """
+    fields = namespaced_fields(ns, PARCELLE_FIELDS)
+    attributes = namespaced(ns, tuple(tag for tag, _ in PARCELLE_ATTRIBUTES))
+    prefixes = [prefix for _, prefix in PARCELLE_ATTRIBUTES]
+    tag_parcelles, tag_parcelle = namespaced(ns, ("parcelles", "parcelle"))
+    (polygon,) = namespaced(ns_gml, ("Polygon",))
+    numero_ilot_ref = ilot.attrib.get("numero-ilot-reference")
+
+    for parcelles in ilot.iter(tag_parcelles):
+        for parcelle in parcelles.iter(tag_parcelle):
+            values, elements = read_record(parcelle, fields, attributes + (polygon,))
+            columns.add("numero-ilot-reference", numero_ilot_ref)
+
+            # Attributs des éléments descriptifs, de la culture principale,
+            # de l'agriculture biologique et des engagements MAEC
+            for tag, prefix in zip(attributes, prefixes):
+                for d in elements[tag]:
+                    columns.update(d.attrib, prefix)
+
+            # Ajouter d'autres champs spécifiques (seulement s'ils sont présents)
+            for column in fields.values():
+                if column in values:
+                    columns.add(column, values[column])
+
+            # Géométrie de la parcelle
+            for geom in elements[polygon]:
+                geometries.append(read_geometry(geom, ns_gml))
+
+            columns.end_row()
+
+
+def build_parcelles(columns, geometries):
+    """
+    Crée le GeoDataFrame des parcelles à partir des données collectées.
+    """
+    import geopandas as gpd
+
+    return gpd.GeoDataFrame(
+        columns.to_columns(), geometry=build_geometries(geometries), crs=LAMBERT93
+    )
+
+
+def extract_parcelles(xml_root, ns, ns_gml, crs=WGS84):
     """
     Extrait les informations sur les parcelles d'un document XML.
+    Les géométries sont reprojetées dans crs (WGS84 par défaut).
     """
-    list_parcelles = []
+    columns = ColumnBuilder()
     geometries = []
 
-    for ilot in xml_root.findall(f".//{ns}ilot"):
-        numero_ilot_ref = ilot.attrib.get("numero-ilot-reference")
-
-        for parcelles in ilot.findall(f".//{ns}parcelles"):
-            for parcelle in parcelles.findall(f".//{ns}parcelle"):
-                dict_parcell = {"numero-ilot-reference": numero_ilot_ref}
-
-                # Récupérer les éléments descriptifs de la parcelle
-                for z in parcelle.findall(f".//{ns}descriptif-parcelle"):
-                    dict_parcell.update(z.attrib)
-
-                # Ajouter les informations sur la culture principale
-                for d in parcelle.findall(f".//{ns}culture-principale"):
-                    dict_parcell.update(
-                        {f"culture-principale_{k}": v for k, v in d.attrib.items()}
-                    )
-
-                # Informations sur l'agriculture biologique
-                for d in parcelle.findall(f".//{ns}agri-bio"):
-                    dict_parcell.update(
-                        {f"agri-bio_{k}": v for k, v in d.attrib.items()}
-                    )
-
-                # Informations sur les engagements MAEC
-                for d in parcelle.findall(f".//{ns}engagements-maec"):
-                    dict_parcell.update(
-                        {f"engagements-maec_{k}": v for k, v in d.attrib.items()}
-                    )
-
-                # Ajouter d'autres champs spécifiques
-                for tag, field in [
-                    ("precision", "precision"),
-                    ("reconversion-pp", "reconversion-pp"),
-                    ("retournement-pp", "retournement-pp"),
-                    ("obligation-reimplantation-pp", "obligation-reimplantation-pp"),
-                    ("portee", "portee"),
-                    ("longueur-bordure", "longueur-bordure"),
-                    ("code-culture", "code-culture"),
-                    ("surface-admissible", "surface-admissible"),
-                ]:
-                    value = parcelle.find(f".//{ns}{tag}")
-                    if value is not None:
-                        dict_parcell[field] = value.text
-
-                # Géométrie de la parcelle
-                for geom in parcelle.findall(f".//{ns_gml}Polygon"):
-                    xmlstr = ET.tostring(geom, encoding="unicode")
-                    geom_gdal = ogr.CreateGeometryFromGML(xmlstr)
-                    polygon = shapely.wkb.loads(bytes(geom_gdal.ExportToIsoWkb()))
-                    geometries.append(polygon)
-
-                list_parcelles.append(dict_parcell)
+    for ilot in iter_elements(xml_root, f"{ns}ilot"):
+        collect_parcelles(ilot, ns, ns_gml, columns, geometries)
 
     # Créer un GeoDataFrame
-    gdf = gpd.GeoDataFrame(list_parcelles, geometry=geometries, crs="EPSG:2154")
-    return gdf.to_crs(crs="EPSG:4326")
+    return reproject(build_parcelles(columns, geometries), crs)
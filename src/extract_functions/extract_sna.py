@@ -2,140 +2,150 @@
 Module contenant les fonctions pour extraire les informations sur les SNA déclarées.
 """
 
-import xml.etree.ElementTree as ET
-import geopandas as gpd
-import shapely
-from osgeo import ogr
+from extract_functions.backends import iter_elements
+from extract_functions.columns import ColumnBuilder
+from extract_functions.fields import namespaced, namespaced_fields, ordered, read_record
+from extract_functions.gml import build_geometries, read_geometry
+from extract_functions.reprojection import LAMBERT93, WGS84, reproject
 
+# Champs d'une SNA déclarée : (tag, colonne)
+SNA_FIELDS = (
+    ("numeroSna", "numero-sna-declaree"),
+    ("categorieSna", "categorieSna"),
+    ("surfaceGraphique", "surfaceGraphique"),
+    ("dateMiseAjour", "dateMiseAjour"),
+    ("datePrivatisation", "datePrivatisation"),
+    ("typeSna", "typeSna"),
+    ("largeur", "largeur"),
+    ("largeur-calculee", "largeur-calculée"),
+)
 
-def extract_sna(xml_root, ns, ns_gml):
+# Champs des intersections d'une SNA avec les ilots et les parcelles
+SNA_ILOT_FIELDS = (("numeroIlot", "numero-ilot"), ("largeur", "largeur"))
+SNA_PARCELLE_FIELDS = (
+    ("numeroIlot", "numero-ilot"),
+    ("numeroParcelle", "numero-parcelle"),
+    ("longueur-sie", "longueur-sie"),
+    ("longueur-iae", "longueur-iae"),
+)
+
+# Tables de relations des SNA : {couche: (colonne des intersections, champs)}
+SNA_RELATIONS = {
+    "sna_ilots": ("intersectionsSna_Ilots", SNA_ILOT_FIELDS),
+    "sna_parcelles": ("intersectionSna_Parcelles", SNA_PARCELLE_FIELDS),
+}
+
+# Clés entières des tables de relations (les autres colonnes sont décimales)
+RELATION_KEYS = ("numero-sna-declaree", "numero-ilot", "numero-parcelle")
+
+
+def collect_sna(sna, ns, ns_gml, columns, geometries):
+    """
+    Ajoute les informations d'une SNA déclarée aux colonnes de données
+    (ColumnBuilder) et à la liste des géométries.
+    """
+    fields = namespaced_fields(ns, SNA_FIELDS)
+    ilot_fields = namespaced_fields(ns, SNA_ILOT_FIELDS)
+    parcelle_fields = namespaced_fields(ns, SNA_PARCELLE_FIELDS)
+    inter_ilot, inter_parcelle = namespaced(
+        ns, ("intersectionSnaIlot", "intersectionSnaParcelle")
+    )
+    point, polygon = namespaced(ns_gml, ("Point", "Polygon"))
+
+    # Extraire les informations principales du SNA en un seul parcours
+    values, elements = read_record(
+        sna, fields, (point, polygon, inter_ilot, inter_parcelle)
+    )
+
+    # Géométrie du SNA
+    for geom in elements[point] + elements[polygon]:
+        geometries.append(read_geometry(geom, ns_gml))
+
+    # Intersection avec les ilots
+    intersectionSnaIlot = [
+        ordered(read_record(inter, ilot_fields)[0], ilot_fields)
+        for inter in elements[inter_ilot]
+    ]
+
+    # Intersection avec les parcelles
+    intersectionSnaParcelle = [
+        ordered(read_record(inter, parcelle_fields)[0], parcelle_fields)
+        for inter in elements[inter_parcelle]
+    ]
+
+    # Ajouter les données du SNA aux colonnes
+    columns.update(ordered(values, fields))
+    columns.add("intersectionsSna_Ilots", intersectionSnaIlot)
+    columns.add("intersectionSna_Parcelles", intersectionSnaParcelle)
+    columns.end_row()
+
+
+def build_sna(columns, geometries):
+    """
+    Crée le GeoDataFrame des SNA déclarées à partir des données collectées.
+    """
+    import geopandas as gpd
+
+    return gpd.GeoDataFrame(
+        columns.to_columns(), geometry=build_geometries(geometries), crs=LAMBERT93
+    )
+
+
+def extract_sna(xml_root, ns, ns_gml, crs=WGS84):
     """
     Extrait les informations sur les SNA déclarées à partir d'un document XML.
+    Les géométries sont reprojetées dans crs (WGS84 par défaut).
     """
-    list_sna = []
+    columns = ColumnBuilder()
     geometries = []
 
-    for sna in xml_root.findall(f".//{ns}sna-declaree"):
-        # Extraire les informations principales du SNA
-        numeroSna = next((num.text for num in sna.findall(f".//{ns}numeroSna")), None)
-        surfaceGraphique = next(
-            (surf.text for surf in sna.findall(f".//{ns}surfaceGraphique")), None
-        )
-        dateMiseAjour = next(
-            (date.text for date in sna.findall(f".//{ns}dateMiseAjour")), None
-        )
-        datePrivatisation = next(
-            (dateP.text for dateP in sna.findall(f".//{ns}datePrivatisation")), None
-        )
-        categorieSna = next(
-            (cat.text for cat in sna.findall(f".//{ns}categorieSna")), None
-        )
-        typeSna = next((typ.text for typ in sna.findall(f".//{ns}typeSna")), None)
-        largeur = next((larg.text for larg in sna.findall(f".//{ns}largeur")), None)
-        largeurcalc = next(
-            (largcalc.text for largcalc in sna.findall(f".//{ns}largeur-calculee")),
-            None,
-        )
+    for sna in iter_elements(xml_root, f"{ns}sna-declaree"):
+        collect_sna(sna, ns, ns_gml, columns, geometries)
+
+    # Créer un GeoDataFrame avec les géométries
+    return reproject(build_sna(columns, geometries), crs)
+
+
+def build_relation(sna, layer):
+    """
+    Table de relations layer (voir SNA_RELATIONS) à partir de la couche des
+    SNA : une ligne par intersection déclarée, identifiée par le numéro de
+    la SNA. Les clés sont des entiers (Int64), les largeurs et longueurs des
+    décimaux ; une valeur non numérique devient une valeur manquante.
+    """
+    import pandas as pd
 
-        # Géométrie du SNA
-        for geom in sna.findall(f".//{ns_gml}Point"):
-            xmlstr = ET.tostring(geom, encoding="unicode")
-            geom_gdal = ogr.CreateGeometryFromGML(xmlstr)
-            point = shapely.wkb.loads(bytes(geom_gdal.ExportToIsoWkb()))
-            geometries.append(point)
-
-        for geom in sna.findall(f".//{ns_gml}Polygon"):
-            xmlstr = ET.tostring(geom, encoding="unicode")
-            geom_gdal = ogr.CreateGeometryFromGML(xmlstr)
-            polygon = shapely.wkb.loads(bytes(geom_gdal.ExportToIsoWkb()))
-            geometries.append(polygon)
-
-        # Intersection avec les ilots
-        intersectionSnaIlot = []
-        for inters_ilots in sna.findall(f".//{ns}intersectionsSnaIlots"):
-            for inter_ilot in inters_ilots.findall(f".//{ns}intersectionSnaIlot"):
-                intersectionSnaIlot.append(
-                    {
-                        "numero-ilot": next(
-                            (
-                                num.text
-                                for num in inter_ilot.findall(f".//{ns}numeroIlot")
-                            ),
-                            None,
-                        ),
-                        "largeur": next(
-                            (
-                                large.text
-                                for large in inter_ilot.findall(f".//{ns}largeur")
-                            ),
-                            None,
-                        ),
-                    }
-                )
-
-        # Intersection avec les parcelles
-        intersectionSnaParcelle = []
-        for inters_parcelles in sna.findall(f".//{ns}intersectionsSnaParcelles"):
-            for inter_parcell in inters_parcelles.findall(
-                f".//{ns}intersectionSnaParcelle"
-            ):
-                intersectionSnaParcelle.append(
-                    {
-                        "numero-ilot": next(
-                            (
-                                num_ilot.text
-                                for num_ilot in inter_parcell.findall(
-                                    f".//{ns}numeroIlot"
-                                )
-                            ),
-                            None,
-                        ),
-                        "numero-parcelle": next(
-                            (
-                                num_parcelle.text
-                                for num_parcelle in inter_parcell.findall(
-                                    f".//{ns}numeroParcelle"
-                                )
-                            ),
-                            None,
-                        ),
-                        "longueur-sie": next(
-                            (
-                                longueur.text
-                                for longueur in inter_parcell.findall(
-                                    f".//{ns}longueur-sie"
-                                )
-                            ),
-                            None,
-                        ),
-                        "longueur-iae": next(
-                            (
-                                longueur.text
-                                for longueur in inter_parcell.findall(
-                                    f".//{ns}longueur-iae"
-                                )
-                            ),
-                            None,
-                        ),
-                    }
-                )
-
-        # Ajouter les données du SNA à la liste
-        list_sna.append(
-            {
-                "numero-sna-declaree": numeroSna,
-                "categorieSna": categorieSna,
-                "surfaceGraphique": surfaceGraphique,
-                "dateMiseAjour": dateMiseAjour,
-                "datePrivatisation": datePrivatisation,
-                "typeSna": typeSna,
-                "largeur": largeur,
-                "largeur-calculée": largeurcalc,
-                "intersectionsSna_Ilots": intersectionSnaIlot,
-                "intersectionSna_Parcelles": intersectionSnaParcelle,
-            }
+    column, fields = SNA_RELATIONS[layer]
+    columns = ["numero-sna-declaree"] + [name for _, name in fields]
+    if column not in sna or sna.empty:
+        relation = pd.DataFrame(columns=columns)
+    else:
+        # Une ligne par intersection, les SNA sans intersection disparaissent
+        intersections = pd.Series(
+            sna[column].to_numpy(), index=sna["numero-sna-declaree"].to_numpy()
+        ).explode()
+        intersections = intersections[intersections.notna()]
+        relation = pd.DataFrame(
+            intersections.tolist(), columns=columns[1:], index=intersections.index
         )
+        relation = relation.rename_axis("numero-sna-declaree").reset_index()
 
-    # Créer un GeoDataFrame avec les géométries
-    gdf = gpd.GeoDataFrame(list_sna, geometry=geometries, crs="EPSG:2154")
-    return gdf.to_crs(crs="EPSG:4326")
+    for name in columns:
+        values = pd.to_numeric(relation[name], errors="coerce")
+        relation[name] = values.astype("Int64" if name in RELATION_KEYS else "float64")
+    return relation
+
+
+def build_sna_ilots(sna):
+    """
+    Table des intersections déclarées des SNA avec les ilots (largeur).
+    """
+    return build_relation(sna, "sna_ilots")
+
+
+def build_sna_parcelles(sna):
+    """
+    Table des intersections déclarées des SNA avec les parcelles
+    (longueur-sie, longueur-iae).
+    """
+    return build_relation(sna, "sna_parcelles")
@@ -2,45 +2,59 @@
 Module qui contient la fonction extract_zdh.
 """
 
-import xml.etree.ElementTree as ET
-import geopandas as gpd
-import shapely
-from osgeo import ogr
+from extract_functions.backends import iter_elements
+from extract_functions.columns import ColumnBuilder
+from extract_functions.fields import namespaced, namespaced_fields, ordered, read_record
+from extract_functions.gml import build_geometries, read_geometry
+from extract_functions.reprojection import LAMBERT93, WGS84, reproject
 
+# Champs d'une ZDH déclarée : (tag, colonne)
+ZDH_FIELDS = (
+    ("numeroZdh", "numero-zdh-declaree"),
+    ("numeroZdhcreationTas", "numero-zdh-creationTas"),
+    ("densiteVegetation", "densiteVegetation"),
+)
 
-def extract_zdh(xml_root, ns, ns_gml):
+
+def collect_zdh(zdh, ns, ns_gml, columns, geometries):
+    """
+    Ajoute les informations d'une ZDH déclarée aux colonnes de données
+    (ColumnBuilder) et à la liste des géométries.
+    """
+    fields = namespaced_fields(ns, ZDH_FIELDS)
+    (polygon,) = namespaced(ns_gml, ("Polygon",))
+
+    # Extraction des informations et des géométries du ZDH en un seul parcours
+    values, elements = read_record(zdh, fields, (polygon,))
+    for geom in elements[polygon]:
+        geometries.append(read_geometry(geom, ns_gml))
+
+    # Ajouter les données du ZDH aux colonnes
+    columns.update(ordered(values, fields))
+    columns.end_row()
+
+
+def build_zdh(columns, geometries):
+    """
+    Crée le GeoDataFrame des ZDH déclarées à partir des données collectées.
+    """
+    import geopandas as gpd
+
+    return gpd.GeoDataFrame(
+        columns.to_columns(), geometry=build_geometries(geometries), crs=LAMBERT93
+    )
+
+
+def extract_zdh(xml_root, ns, ns_gml, crs=WGS84):
     """
     Extrait les informations sur les ZDH déclarées à partir d'un document XML.
+    Les géométries sont reprojetées dans crs (WGS84 par défaut).
     """
-    list_zdh = []
+    columns = ColumnBuilder()
     geometries = []
 
-    for zdh in xml_root.findall(f".//{ns}zdh-declaree"):
-        # Extraction des informations du ZDH
-        numeroZdh = next((num.text for num in zdh.findall(f".//{ns}numeroZdh")), None)
-        numeroZdhcreationTas = next(
-            (numC.text for numC in zdh.findall(f".//{ns}numeroZdhcreationTas")), None
-        )
-        densiteVegetation = next(
-            (dens.text for dens in zdh.findall(f".//{ns}densiteVegetation")), None
-        )
-
-        # Extraction des géométries
-        for geom in zdh.findall(f".//{ns_gml}Polygon"):
-            xmlstr = ET.tostring(geom, encoding="unicode")
-            geom_gdal = ogr.CreateGeometryFromGML(xmlstr)
-            polygon = shapely.wkb.loads(bytes(geom_gdal.ExportToIsoWkb()))
-            geometries.append(polygon)
-
-        # Ajouter les données du ZDH à la liste
-        list_zdh.append(
-            {
-                "numero-zdh-declaree": numeroZdh,
-                "numero-zdh-creationTas": numeroZdhcreationTas,
-                "densiteVegetation": densiteVegetation,
-            }
-        )
+    for zdh in iter_elements(xml_root, f"{ns}zdh-declaree"):
+        collect_zdh(zdh, ns, ns_gml, columns, geometries)
 
     # Créer un GeoDataFrame avec les géométries
-    gdf = gpd.GeoDataFrame(list_zdh, geometry=geometries, crs="EPSG:2154")
-    return gdf.to_crs(crs="EPSG:4326")
+    return reproject(build_zdh(columns, geometries), crs)
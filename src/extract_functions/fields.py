@@ -0,0 +1,65 @@
+"""
+Module de lecture des champs d'un enregistrement XML en un seul parcours.
+
+Chaque extracteur déclare ses champs sous la forme d'un tuple de paires
+(tag, colonne). Les tags complets (namespace compris) sont calculés une seule
+fois par namespace, puis read_record parcourt une seule fois le sous-arbre de
+l'enregistrement au lieu d'un findall(".//tag") par champ.
+"""
+
+import functools
+
+
+@functools.lru_cache(maxsize=None)
+def namespaced(ns, tags):
+    """
+    Tags complets {ns}tag d'un tuple de tags.
+    """
+    return tuple(f"{ns}{tag}" for tag in tags)
+
+
+@functools.lru_cache(maxsize=None)
+def namespaced_fields(ns, fields):
+    """
+    Correspondance {tag complet: colonne} d'un tuple de paires (tag, colonne).
+    """
+    return {f"{ns}{tag}": column for tag, column in fields}
+
+
+def read_record(elem, fields, collected=()):
+    """
+    Lit les champs d'un enregistrement en un seul parcours de son sous-arbre.
+
+    Paramètres :
+    - elem : élément de l'enregistrement
+    - fields : {tag complet: colonne} des champs texte (namespaced_fields)
+    - collected : tags complets des sous-éléments à retourner (géométries,
+      éléments répétés...)
+
+    Retourne :
+    - {colonne: texte} de la première occurrence de chaque champ trouvé, comme
+      next(findall(".//tag")), dans l'ordre des occurrences
+    - {tag complet: [sous-éléments]} des tags de collected, dans l'ordre du
+      document
+    """
+    values = {}
+    elements = {tag: [] for tag in collected}
+    descendants = elem.iter()
+    next(descendants)  # l'élément lui-même, exclu comme avec ".//"
+    for child in descendants:
+        tag = child.tag
+        column = fields.get(tag)
+        if column is not None:
+            if column not in values:
+                values[column] = child.text
+        elif tag in elements:
+            elements[tag].append(child)
+    return values, elements
+
+
+def ordered(values, fields, default=None):
+    """
+    Valeurs des champs dans l'ordre de déclaration de fields, default pour
+    les champs absents.
+    """
+    return {column: values.get(column, default) for column in fields.values()}
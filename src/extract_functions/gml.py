@@ -0,0 +1,234 @@
+"""
+Module de décodage des géométries gml des fichiers telepac.
+
+Les coordonnées (gml:coordinates, gml:posList, gml:pos) sont lues directement
+dans le texte des éléments vers des tableaux NumPy, puis les géométries sont
+construites en bloc avec les constructeurs vectorisés de shapely 2.
+GDAL/OGR n'est utilisé qu'en repli pour les géométries non prises en charge.
+"""
+
+import functools
+import numpy as np
+import shapely
+
+from extract_functions.backends import tostring
+
+# Types de géométries décodées par read_geometry
+POINT = "Point"
+POLYGON = "Polygon"
+GEOMETRY = "Geometry"  # géométrie shapely déjà construite (repli OGR)
+
+
+def parse_coordinates(coordinates):
+    """
+    Lit le texte d'un élément gml:coordinates en tableau (n, dim).
+
+    Les séparateurs de coordonnées (cs), de tuples (ts) et décimal (decimal)
+    déclarés en attribut sont pris en compte.
+    """
+    text = coordinates.text or ""
+    cs = coordinates.get("cs", ",")
+    ts = coordinates.get("ts", " ")
+    decimal = coordinates.get("decimal", ".")
+
+    if not ts.isspace():
+        text = text.replace(ts, " ")
+    tuples = text.split(None, 1)
+    if not tuples:
+        return np.empty((0, 2))
+    dim = tuples[0].count(cs) + 1
+
+    text = text.replace(cs, " ")
+    if decimal != ".":
+        text = text.replace(decimal, ".")
+    return np.array(text.split(), dtype=np.float64).reshape(-1, dim)
+
+
+def parse_pos_list(pos_list, dim=2):
+    """
+    Lit le texte d'un élément gml:posList en tableau (n, dim).
+    """
+    dim = int(pos_list.get("srsDimension", dim))
+    return np.array((pos_list.text or "").split(), dtype=np.float64).reshape(-1, dim)
+
+
+def read_coords(elem, ns_gml):
+    """
+    Lit les coordonnées d'un élément gml:LinearRing ou gml:Point.
+
+    Retourne None si aucune représentation connue n'est trouvée.
+    """
+    dim = int(elem.get("srsDimension", 2))
+    for child in elem:
+        if child.tag == f"{ns_gml}coordinates":
+            return parse_coordinates(child)
+        if child.tag == f"{ns_gml}posList":
+            return parse_pos_list(child, dim)
+
+    # gml:pos ou gml:coord répétés (un sommet par élément)
+    positions = [
+        (child.text or "").split() for child in elem if child.tag == f"{ns_gml}pos"
+    ]
+    if not positions:
+        positions = [
+            [c.text for c in child if isinstance(c.tag, str)]
+            for child in elem
+            if child.tag == f"{ns_gml}coord"
+        ]
+    if positions:
+        return np.array(positions, dtype=np.float64)
+    return None
+
+
+def read_polygon(polygon, ns_gml):
+    """
+    Lit les anneaux d'un gml:Polygon (GML 2 ou 3).
+
+    Retourne la liste des anneaux (l'extérieur en premier) ou None. Les
+    anneaux sans coordonnées (texte vide ou blanc) sont ignorés ; la liste
+    est vide si l'extérieur n'en a pas (polygone vide).
+    """
+    shell = None
+    holes = []
+    for boundary in polygon:
+        # Commentaires et instructions de traitement (lxml) ignorés
+        if not isinstance(boundary.tag, str):
+            continue
+        name = boundary.tag[len(ns_gml) :]
+        ring = boundary.find(f"{ns_gml}LinearRing")
+        if ring is None:
+            return None
+        coords = read_coords(ring, ns_gml)
+        if coords is None:
+            return None
+        if name in ("outerBoundaryIs", "exterior"):
+            shell = coords
+        elif name in ("innerBoundaryIs", "interior") and len(coords):
+            holes.append(coords)
+    if shell is None:
+        return None
+    if not len(shell):
+        return []
+    return [shell] + holes
+
+
+def read_multipolygon(multi, ns_gml):
+    """
+    Lit les polygones membres d'un gml:MultiSurface (GML 3) ou
+    gml:MultiPolygon (GML 2).
+
+    Retourne un MultiPolygon shapely (vide si tous ses polygones le sont)
+    ou None.
+    """
+    members = 0
+    polygons = []
+    for polygon in multi.iter(f"{ns_gml}Polygon"):
+        rings = read_polygon(polygon, ns_gml)
+        if rings is None:
+            return None
+        members += 1
+        if rings:
+            polygons.append(shapely.Polygon(rings[0], rings[1:]))
+    if not members:
+        return None
+    return shapely.MultiPolygon(polygons)
+
+
+@functools.lru_cache(maxsize=None)
+def load_ogr():
+    """
+    Import à la demande de GDAL/OGR, optionnel. Retourne None s'il est absent.
+    """
+    try:
+        from osgeo import ogr
+    except ImportError:
+        return None
+    return ogr
+
+
+def ogr_geometry(geom):
+    """
+    Décode une géométrie gml via GDAL/OGR (sérialisation XML puis WKB).
+    """
+    ogr = load_ogr()
+    if ogr is None:
+        raise ValueError(f"Géométrie gml non prise en charge sans GDAL : {geom.tag}")
+    xmlstr = tostring(geom)
+    geom_gdal = ogr.CreateGeometryFromGML(xmlstr)
+    return shapely.wkb.loads(bytes(geom_gdal.ExportToIsoWkb()))
+
+
+def read_geometry(geom, ns_gml):
+    """
+    Décode un élément gml:Polygon, gml:Point, gml:MultiSurface ou
+    gml:MultiPolygon.
+
+    Retourne un tuple (type, données) à passer à build_geometries :
+    - (POLYGON, liste des anneaux)
+    - (POINT, coordonnées du point)
+    - (GEOMETRY, géométrie shapely) pour les multi-polygones, les
+      géométries sans coordonnées (géométrie vide), ou en repli via OGR
+    """
+    if geom.tag == f"{ns_gml}Polygon":
+        rings = read_polygon(geom, ns_gml)
+        if rings == []:
+            return GEOMETRY, shapely.Polygon()
+        if rings is not None:
+            return POLYGON, rings
+    elif geom.tag == f"{ns_gml}Point":
+        coords = read_coords(geom, ns_gml)
+        if coords is not None and len(coords) == 0:
+            return GEOMETRY, shapely.Point()
+        if coords is not None and len(coords) == 1:
+            return POINT, coords[0]
+    elif geom.tag in (f"{ns_gml}MultiSurface", f"{ns_gml}MultiPolygon"):
+        multipolygon = read_multipolygon(geom, ns_gml)
+        if multipolygon is not None:
+            return GEOMETRY, multipolygon
+    return GEOMETRY, ogr_geometry(geom)
+
+
+def by_dimension(indices, coords):
+    """
+    Répartit les indices par nombre de dimensions des coordonnées coords(i).
+    """
+    groups = {}
+    for i in indices:
+        groups.setdefault(coords(i).shape[-1], []).append(i)
+    return groups.values()
+
+
+def build_geometries(decoded):
+    """
+    Construit en bloc les géométries shapely à partir des sorties de read_geometry.
+
+    Retourne un tableau NumPy de géométries dans l'ordre de decoded. Un
+    tableau déjà construit (extraction en pipeline) est retourné tel quel.
+    """
+    if isinstance(decoded, np.ndarray):
+        return decoded
+
+    geometries = np.empty(len(decoded), dtype=object)
+
+    # Constructions séparées par nombre de dimensions (2D, 3D)
+    polygons = [i for i, (kind, _) in enumerate(decoded) if kind == POLYGON]
+    for dim_polygons in by_dimension(polygons, lambda i: decoded[i][1][0]):
+        rings = [ring for i in dim_polygons for ring in decoded[i][1]]
+        ring_index = np.repeat(np.arange(len(rings)), [len(r) for r in rings])
+        linearrings = shapely.linearrings(np.concatenate(rings), indices=ring_index)
+        polygon_index = np.repeat(
+            np.arange(len(dim_polygons)), [len(decoded[i][1]) for i in dim_polygons]
+        )
+        geometries[dim_polygons] = shapely.polygons(linearrings, indices=polygon_index)
+
+    points = [i for i, (kind, _) in enumerate(decoded) if kind == POINT]
+    for dim_points in by_dimension(points, lambda i: decoded[i][1]):
+        geometries[dim_points] = shapely.points(
+            np.stack([decoded[i][1] for i in dim_points])
+        )
+
+    for i, (kind, geometry) in enumerate(decoded):
+        if kind == GEOMETRY:
+            geometries[i] = geometry
+
+    return geometries
@@ -0,0 +1,276 @@
+"""
+Module de lecture des fichiers XML telepac projetés en mémoire (mmap).
+
+Le fichier n'est pas lu dans un objet fichier Python : il est projeté en
+mémoire et l'analyseur XML est alimenté par des tranches (memoryview) de la
+projection, sans copie avec xml.etree (lxml n'accepte que des bytes et
+reçoit des copies de FEED_SIZE octets au plus).
+
+Un parcours rapide des octets (expressions régulières sur la projection)
+repère au préalable les bornes des producteurs et des enregistrements
+(ilot, sna-declaree, zdh-declaree). Le fichier peut alors être découpé en
+plages d'octets analysées séparément :
+- plages d'enregistrements consécutifs, analysées dans un élément englobant
+  qui reprend les déclarations de namespaces du document ; seules les plages
+  des enregistrements demandés sont analysées ;
+- squelette du document (demandeur, animaux, aides...), analysé à partir des
+  intervalles entre les enregistrements.
+
+Le repérage suppose que les balises des enregistrements n'apparaissent pas
+dans des commentaires ou sections CDATA, ce qui est le cas des exports
+telepac.
+"""
+
+import contextlib
+import functools
+import re
+
+from extract_functions.backends import ETREE, LXML, check_backend, load_lxml
+from extract_functions.registry import RECORD_LAYERS
+
+# Tags des enregistrements repérés dans le fichier (voir streaming.RECORD_TAGS)
+RECORD_TAGS = ("ilot",) + tuple(tag for _, tag in RECORD_LAYERS.values())
+
+# Taille maximale (octets) des tranches passées à l'analyseur
+FEED_SIZE = 1 << 20
+
+# Taille (octets) visée pour une plage d'enregistrements analysée d'un bloc
+SPAN_SIZE = 4 << 20
+
+# Début d'un élément (avec préfixe de namespace éventuel)
+START_PATTERN = re.compile(
+    rb"<((?:[\w.-]+:)?("
+    + b"|".join(tag.encode() for tag in RECORD_TAGS)
+    + rb"|producteur))[\s/>]"
+)
+ROOT_PATTERN = re.compile(rb"<(?![?!])([\w.:-]+)")
+NAMESPACE_PATTERN = re.compile(rb"""\sxmlns(?::[\w.-]+)?\s*=\s*(["']).*?\1""", re.S)
+ENCODING_PATTERN = re.compile(rb"""^<\?xml[^>]*?encoding\s*=\s*["']([\w.-]+)["']""")
+WHITESPACE_PATTERN = re.compile(rb"\s*")
+
+
+@contextlib.contextmanager
+def map_file(xml_file):
+    """
+    Projection en lecture seule d'un fichier (bytes vides pour un fichier
+    vide, qui ne peut pas être projeté).
+    """
+    import mmap
+
+    with open(xml_file, "rb") as f:
+        try:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            yield b""
+            return
+        with mapped:
+            yield mapped
+
+
+@functools.lru_cache(maxsize=None)
+def end_pattern(qname):
+    """
+    Expression de la balise fermante de l'élément de nom qualifié qname.
+    """
+    return re.compile(rb"</" + re.escape(qname) + rb"\s*>")
+
+
+def scan_boundaries(buffer):
+    """
+    Repère les bornes des éléments d'un document XML telepac par un parcours
+    de ses octets.
+
+    Retourne un dictionnaire :
+    - encoding : encodage déclaré du document (utf-8 par défaut)
+    - namespaces : déclarations de namespaces précédant le premier
+      enregistrement (racine, producteur...)
+    - producteurs : plages (début, fin) des éléments producteur
+    - records : plages (tag, début, fin) des enregistrements, dans l'ordre
+      du document
+    """
+    encoding = ENCODING_PATTERN.match(buffer)
+    producteurs, records = [], []
+    position = 0
+    while True:
+        match = START_PATTERN.search(buffer, position)
+        if match is None:
+            break
+        qname, tag = match.group(1), match.group(2).decode()
+        start = match.start()
+        closing = buffer.find(b">", match.end() - 1)
+        if buffer[closing - 1 : closing] == b"/":
+            # Élément vide <ilot .../>
+            stop = closing + 1
+        else:
+            end = end_pattern(qname).search(buffer, match.end())
+            if end is None:
+                raise ValueError(f"Élément {tag} non fermé à l'octet {start}")
+            stop = end.end()
+        if tag == "producteur":
+            # Les enregistrements sont recherchés dans le producteur
+            producteurs.append((start, stop))
+            position = match.end()
+        else:
+            records.append((tag, start, stop))
+            position = stop
+
+    head = records[0][1] if records else len(buffer)
+    root = ROOT_PATTERN.search(buffer, 0, head)
+    namespaces = {}
+    if root is not None:
+        for declaration in NAMESPACE_PATTERN.finditer(buffer, root.start(), head):
+            name = declaration.group(0).partition(b"=")[0].strip()
+            namespaces[name] = declaration.group(0).strip()
+    return {
+        "encoding": encoding.group(1).decode() if encoding else "utf-8",
+        "namespaces": b" ".join(namespaces.values()),
+        "producteurs": producteurs,
+        "records": records,
+    }
+
+
+def record_spans(buffer, boundaries, tags=RECORD_TAGS, size=SPAN_SIZE):
+    """
+    Plages d'enregistrements consécutifs à analyser d'un bloc : les
+    enregistrements d'un même tag, séparés seulement par des blancs, sont
+    regroupés jusqu'à atteindre size octets.
+
+    Retourne la liste des plages (tag, début, fin, nombre d'enregistrements)
+    des enregistrements de tags, dans l'ordre du document.
+    """
+    spans = []
+    for tag, start, stop in boundaries["records"]:
+        if tag not in tags:
+            continue
+        if spans:
+            last_tag, last_start, last_stop, count = spans[-1]
+            if (
+                last_tag == tag
+                and last_stop - last_start < size
+                and WHITESPACE_PATTERN.fullmatch(buffer, last_stop, start)
+            ):
+                spans[-1] = (tag, last_start, stop, count + 1)
+                continue
+        spans.append((tag, start, stop, 1))
+    return spans
+
+
+def feed(parser, buffer, start, stop, backend=ETREE):
+    """
+    Passe à l'analyseur les octets [start, stop[ de buffer, par tranches de
+    FEED_SIZE octets au plus.
+    """
+    with memoryview(buffer) as view:
+        for position in range(start, stop, FEED_SIZE):
+            chunk = view[position : min(position + FEED_SIZE, stop)]
+            parser.feed(chunk if backend == ETREE else bytes(chunk))
+            chunk.release()
+
+
+def parser_for(backend=ETREE, events=None):
+    """
+    Analyseur incrémental du moteur backend : analyseur d'arbre, ou
+    analyseur produisant les événements events.
+    """
+    if check_backend(backend) == LXML:
+        etree = load_lxml()
+        return etree.XMLPullParser(events=events) if events else etree.XMLParser()
+    import xml.etree.ElementTree as ET
+
+    return ET.XMLPullParser(events=events) if events else ET.XMLParser()
+
+
+def parse_span(buffer, boundaries, start, stop, backend=ETREE):
+    """
+    Analyse la plage [start, stop[ (enregistrements consécutifs) dans un
+    élément englobant portant les déclarations de namespaces du document.
+
+    Retourne l'élément englobant, dont les enregistrements sont les enfants.
+    """
+    parser = parser_for(backend)
+    parser.feed(
+        f'<?xml version="1.0" encoding="{boundaries["encoding"]}"?>'.encode()
+        + b"<span "
+        + boundaries["namespaces"]
+        + b">"
+    )
+    feed(parser, buffer, start, stop, backend)
+    parser.feed(b"</span>")
+    return parser.close()
+
+
+def parse_skeleton(buffer, boundaries, backend=ETREE):
+    """
+    Analyse le squelette du document : tout le document sauf les
+    enregistrements.
+
+    Retourne la racine du squelette et, pour chaque enregistrement de
+    boundaries, le chemin de son parent depuis la racine (noms des éléments
+    sans namespace, ex : /producteurs/producteur/rpg/ilots).
+    """
+    parser = parser_for(backend, events=("start", "end"))
+    root = None
+    names, parents = [], []
+
+    def read_events():
+        nonlocal root
+        if hasattr(parser, "flush"):
+            parser.flush()
+        for event, elem in parser.read_events():
+            if event == "start":
+                root = elem if root is None else root
+                names.append(elem.tag.rpartition("}")[2])
+            else:
+                names.pop()
+
+    position = 0
+    for _, start, stop in boundaries["records"]:
+        feed(parser, buffer, position, start, backend)
+        read_events()
+        parents.append("/" + "/".join(names))
+        position = stop
+    feed(parser, buffer, position, len(buffer), backend)
+    parser.close()
+    read_events()
+    return root, parents
+
+
+def parse_mapped(xml_file, backend=ETREE):
+    """
+    Lit un document XML complet à partir de sa projection en mémoire et
+    retourne sa racine (comme backends.parse).
+    """
+    parser = parser_for(backend)
+    with map_file(xml_file) as buffer:
+        feed(parser, buffer, 0, len(buffer), backend)
+    return parser.close()
+
+
+def iter_span_records(buffer, boundaries, spans, ns, backend=ETREE):
+    """
+    Enregistrements des plages spans (voir record_spans), plage par plage :
+    tuples (tag, élément), comme streaming.iter_records.
+    """
+    for tag, start, stop, _ in spans:
+        qualified = f"{ns}{tag}"
+        for elem in parse_span(buffer, boundaries, start, stop, backend):
+            if elem.tag == qualified:
+                yield tag, elem
+
+
+def iter_mapped_records(xml_file, ns, tags=RECORD_TAGS, backend=ETREE):
+    """
+    Parcourt un fichier XML telepac projeté en mémoire et produit ses
+    enregistrements de tags, au format de streaming.iter_records : tuples
+    (tag, élément) dans l'ordre du document, puis (None, racine) pour le
+    squelette du document.
+
+    Seules les plages des enregistrements de tags sont analysées, par blocs
+    de SPAN_SIZE octets ; le squelette ne contient aucun enregistrement,
+    même de tags non demandés.
+    """
+    with map_file(xml_file) as buffer:
+        boundaries = scan_boundaries(buffer)
+        spans = record_spans(buffer, boundaries, tags)
+        yield from iter_span_records(buffer, boundaries, spans, ns, backend)
+        yield None, parse_skeleton(buffer, boundaries, backend)[0]
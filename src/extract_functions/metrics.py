@@ -0,0 +1,215 @@
+"""
+Module de mesure des étapes du traitement d'un fichier XML telepac.
+
+Chaque étape (lecture du xml, extraction des couches, reprojection, sorties
+Folium, excel et Parquet) enregistre sa durée, le nombre d'entités et de
+sommets des couches qu'elle produit et, sur demande, son pic de mémoire
+Python (tracemalloc, qui ralentit le traitement). Le rapport d'un fichier est
+écrit en JSON ; les rapports d'un lot sont agrégés par étape.
+
+Les fonctions instrumentées reçoivent un objet Metrics optionnel : sans
+Metrics (None), measure ne mesure rien.
+"""
+
+import contextlib
+import json
+import threading
+import time
+import tracemalloc
+
+
+class Metrics:
+    """
+    Mesures des étapes du traitement d'un fichier.
+    """
+
+    def __init__(self, xml_file=None, memory=False):
+        self.xml_file = xml_file
+        self.memory = memory
+        self.stages = []
+        self.lock = threading.Lock()
+        self.start = time.perf_counter()
+        # Suivi de la mémoire démarré (et arrêté par stop) par ces mesures
+        self.tracing = memory and not tracemalloc.is_tracing()
+        if self.tracing:
+            tracemalloc.start()
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        """
+        Mesure de l'étape name. Le dictionnaire produit reçoit les mesures
+        de l'étape ; count_layers y ajoute les entités et sommets produits.
+        """
+        record = {"etape": name}
+        if self.memory:
+            tracemalloc.reset_peak()
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record["duree"] = round(time.perf_counter() - start, 4)
+            if self.memory:
+                # Pic de tout le processus pendant l'étape (y compris les
+                # étapes menées en parallèle dans d'autres threads)
+                peak = tracemalloc.get_traced_memory()[1]
+                record["memoire_max_mo"] = round(peak / 1024**2, 2)
+            with self.lock:
+                self.stages.append(record)
+
+    def report(self):
+        """
+        Rapport des mesures du fichier : durée totale, pic de mémoire
+        résidente du processus et mesures de chaque étape.
+        """
+        return {
+            "fichier": self.xml_file,
+            "duree": round(time.perf_counter() - self.start, 4),
+            "memoire_max_processus_mo": peak_rss_mb(),
+            "etapes": list(self.stages),
+        }
+
+    def stop(self):
+        """
+        Arrête le suivi de la mémoire démarré par ces mesures.
+        """
+        if self.tracing:
+            tracemalloc.stop()
+            self.tracing = False
+
+    def write_json(self, filename):
+        """
+        Écriture du rapport au format JSON.
+        """
+        write_report(self.report(), filename)
+
+
+def measure(metrics, name):
+    """
+    Contexte de mesure de l'étape name, sans effet si metrics vaut None.
+    """
+    if metrics is None:
+        return contextlib.nullcontext({})
+    return metrics.stage(name)
+
+
+def measured(metrics, name, func):
+    """
+    Fonction func mesurée comme étape name lors de son appel.
+    """
+    if metrics is None:
+        return func
+
+    def wrapper(*args, **kwargs):
+        with metrics.stage(name):
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
+def count_layers(record, layers):
+    """
+    Ajoute aux mesures d'une étape le nombre d'entités de chaque couche et
+    le nombre de sommets des couches géographiques.
+    """
+    entities = record.setdefault("entites", {})
+    vertices = record.setdefault("sommets", {})
+    for layer, df in layers.items():
+        entities[layer] = len(df)
+        if "geometry" in df:
+            import numpy as np
+            import shapely
+
+            coordinates = shapely.get_num_coordinates(np.asarray(df["geometry"].array))
+            vertices[layer] = int(coordinates.sum())
+    return record
+
+
+def peak_rss_mb():
+    """
+    Pic de mémoire résidente du processus (Mo), None si le système ne le
+    fournit pas (module resource absent sous Windows).
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    import sys
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss est en octets sous macOS, en kilo-octets sous Linux
+    divisor = 1024**2 if sys.platform == "darwin" else 1024
+    return round(peak / divisor, 1)
+
+
+def aggregate_reports(reports):
+    """
+    Agrège les rapports des fichiers d'un lot par étape : nombre de fichiers,
+    durées totale et maximale, pic de mémoire, entités et sommets produits.
+    """
+    stages = {}
+    for report in reports:
+        for record in report["etapes"]:
+            stage = stages.setdefault(
+                record["etape"],
+                {"fichiers": 0, "duree": 0.0, "duree_max": 0.0},
+            )
+            stage["fichiers"] += 1
+            stage["duree"] = round(stage["duree"] + record["duree"], 4)
+            stage["duree_max"] = max(stage["duree_max"], record["duree"])
+            if "memoire_max_mo" in record:
+                stage["memoire_max_mo"] = max(
+                    stage.get("memoire_max_mo", 0.0), record["memoire_max_mo"]
+                )
+            for key in ("entites", "sommets"):
+                for layer, value in record.get(key, {}).items():
+                    totals = stage.setdefault(key, {})
+                    totals[layer] = totals.get(layer, 0) + value
+    return {
+        "fichiers": len(reports),
+        "duree": round(sum(report["duree"] for report in reports), 4),
+        "etapes": stages,
+    }
+
+
+def write_report(report, filename):
+    """
+    Écriture d'un rapport (fichier ou lot) au format JSON.
+    """
+    with open(filename, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+
+
+def profiled(func, profile_file):
+    """
+    Fonction func exécutée sous profileur, le profil étant écrit dans
+    profile_file : rapport html de pyinstrument si l'extension est .html,
+    sinon statistiques cProfile (lisibles avec pstats ou snakeviz).
+    """
+
+    def wrapper(*args, **kwargs):
+        if profile_file.endswith(".html"):
+            try:
+                from pyinstrument import Profiler
+            except ImportError as error:
+                raise ImportError(
+                    "Le profil html nécessite le paquet pyinstrument "
+                    "(pip install pyinstrument)"
+                ) from error
+            profiler = Profiler()
+            profiler.start()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                profiler.stop()
+                with open(profile_file, "w", encoding="utf-8") as f:
+                    f.write(profiler.output_html())
+
+        import cProfile
+
+        profiler = cProfile.Profile()
+        try:
+            return profiler.runcall(func, *args, **kwargs)
+        finally:
+            profiler.dump_stats(profile_file)
+
+    return wrapper
@@ -0,0 +1,187 @@
+"""
+Module d'extraction parallèle d'un fichier XML telepac volumineux.
+
+Le document est découpé en plages d'enregistrements consécutifs (ilot,
+sna-declaree, zdh-declaree) repérées sur sa projection en mémoire (voir
+mapped.scan_boundaries), réparties sur un pool de processus :
+- chaque processus projette lui-même le fichier (seules les bornes de sa
+  plage lui sont transmises), analyse sa plage, remplit les colonnes des
+  couches demandées (ColumnBuilder) et construit leurs géométries (shapely),
+  renvoyées en WKB : un seul appel vectorisé (shapely.to_wkb) au lieu de la
+  sérialisation géométrie par géométrie de pickle ;
+- le processus principal analyse le squelette du document (couches
+  tabulaires) pendant ce temps, puis met bout à bout les morceaux de chaque
+  couche dans l'ordre du document (ColumnBuilder.extend) avant de construire
+  et reprojeter les couches une seule fois.
+
+Les couches obtenues sont identiques à celles de l'extraction en série
+(mêmes lignes, colonnes, types et catégories).
+"""
+
+from extract_functions.backends import ETREE
+from extract_functions.columns import ColumnBuilder
+from extract_functions.registry import (
+    ILOT_LAYERS,
+    RECORD_LAYERS,
+    TABULAR_LAYERS,
+    build_relation_layers,
+    check_layers,
+    load,
+    source_layers,
+)
+from extract_functions.reprojection import WGS84, reproject_layers
+
+# Nombre de plages visé par processus, pour équilibrer la charge
+SPANS_PER_WORKER = 4
+
+# Taille minimale (octets) d'une plage transmise à un processus
+MIN_SPAN_SIZE = 256 << 10
+
+
+def layer_functions(layer):
+    """
+    Tag des enregistrements, collecteur et construction d'une couche
+    géographique.
+    """
+    if layer in ILOT_LAYERS:
+        collect, build = load("walk_ilots", "ILOT_COLLECTORS")[layer]
+        return "ilot", collect, build
+    module, tag = RECORD_LAYERS[layer]
+    return tag, load(module, f"collect_{layer}"), load(module, f"build_{layer}")
+
+
+def span_size(boundaries, tags, workers):
+    """
+    Taille (octets) des plages : SPANS_PER_WORKER plages par processus,
+    entre MIN_SPAN_SIZE et mapped.SPAN_SIZE.
+    """
+    from extract_functions.mapped import SPAN_SIZE
+
+    total = sum(
+        stop - start for tag, start, stop in boundaries["records"] if tag in tags
+    )
+    return min(SPAN_SIZE, max(MIN_SPAN_SIZE, total // (workers * SPANS_PER_WORKER)))
+
+
+def extract_span(xml_file, header, span, ns, ns_gml, layers, backend=ETREE):
+    """
+    Extrait, dans un processus du pool, les morceaux des couches layers
+    d'une plage d'enregistrements span (tag, début, fin, nombre).
+
+    header contient l'encodage et les déclarations de namespaces du document
+    (voir mapped.scan_boundaries). Retourne {couche: (ColumnBuilder,
+    géométries en WKB, Lambert-93)}.
+    """
+    import shapely
+
+    from extract_functions.gml import build_geometries
+    from extract_functions.mapped import map_file, parse_span
+
+    tag, start, stop, _ = span
+    qualified = f"{ns}{tag}"
+    collectors = [
+        (layer, layer_functions(layer)[1], ColumnBuilder(), []) for layer in layers
+    ]
+    with map_file(xml_file) as buffer:
+        for elem in parse_span(buffer, header, start, stop, backend):
+            if elem.tag == qualified:
+                for _, collect, records, geometries in collectors:
+                    collect(elem, ns, ns_gml, records, geometries)
+    return {
+        layer: (records, shapely.to_wkb(build_geometries(geometries)))
+        for layer, _, records, geometries in collectors
+    }
+
+
+def extract_layers_parallel(
+    xml_file, ns, ns_gml, layers=None, crs=WGS84, backend=ETREE, workers=None
+):
+    """
+    Extrait les couches demandées d'un fichier XML telepac en répartissant
+    ses enregistrements sur un pool de workers processus (par défaut selon
+    le nombre de processeurs).
+
+    Les couches géographiques sont reprojetées ensemble dans crs (WGS84 par
+    défaut) une fois tous les morceaux réunis. backend désigne le moteur de
+    lecture XML (etree ou lxml).
+
+    Retourne un dictionnaire {nom de la couche: DataFrame ou GeoDataFrame},
+    identique à celui de l'extraction en série.
+    """
+    import os
+    from concurrent.futures import ProcessPoolExecutor
+
+    import numpy as np
+    import shapely
+
+    from extract_functions.mapped import (
+        map_file,
+        parse_skeleton,
+        record_spans,
+        scan_boundaries,
+    )
+
+    layers = check_layers(layers)
+    sources = source_layers(layers)
+    workers = workers or os.cpu_count() or 1
+
+    # Couches géographiques à extraire par tag d'enregistrement
+    tag_layers = {}
+    for layer in sources:
+        if layer in ILOT_LAYERS or layer in RECORD_LAYERS:
+            tag_layers.setdefault(layer_functions(layer)[0], []).append(layer)
+    parts = {
+        layer: (ColumnBuilder(), []) for tags in tag_layers.values() for layer in tags
+    }
+
+    with map_file(xml_file) as buffer:
+        boundaries = scan_boundaries(buffer)
+        header = {key: boundaries[key] for key in ("encoding", "namespaces")}
+        spans = record_spans(
+            buffer, boundaries, tag_layers, span_size(boundaries, tag_layers, workers)
+        )
+
+        executor = ProcessPoolExecutor(workers) if spans else None
+        try:
+            futures = [
+                executor.submit(
+                    extract_span,
+                    xml_file,
+                    header,
+                    span,
+                    ns,
+                    ns_gml,
+                    tag_layers[span[0]],
+                    backend,
+                )
+                for span in spans
+            ]
+
+            # Le squelette est analysé pendant l'extraction des plages
+            xml_root = parse_skeleton(buffer, boundaries, backend)[0]
+            extracted = {
+                layer: load(module, module)(xml_root, ns, ns_gml)
+                for layer, module in TABULAR_LAYERS.items()
+                if layer in sources
+            }
+
+            # Morceaux mis bout à bout dans l'ordre du document
+            for future in futures:
+                for layer, (records, geometries) in future.result().items():
+                    parts[layer][0].extend(records)
+                    parts[layer][1].append(geometries)
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+
+    geo_layers = {
+        layer: layer_functions(layer)[2](
+            records,
+            shapely.from_wkb(np.concatenate([np.empty(0, dtype=object)] + chunks)),
+        )
+        for layer, (records, chunks) in parts.items()
+    }
+    extracted.update(reproject_layers(geo_layers, crs))
+
+    extracted = build_relation_layers(extracted, layers)
+    return {layer: extracted[layer] for layer in layers}
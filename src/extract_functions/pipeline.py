@@ -0,0 +1,314 @@
+"""
+Module d'extraction en pipeline des fichiers XML telepac.
+
+Les étapes se recouvrent au lieu de s'enchaîner :
+- lecture : le document (arbre complet ou flux) est parcouru dans le thread
+  appelant et les collecteurs remplissent les enregistrements ;
+- décodage des géométries : dès qu'un lot de CHUNK_SIZE géométries est lu,
+  sa construction (shapely 2, qui libère le GIL) part dans un pool de threads.
+  Au plus QUEUE_SIZE lots attendent à la fois : la lecture est suspendue
+  tant que le décodage n'a pas rattrapé son retard ;
+- construction des couches : en fin de lecture, chaque couche est construite
+  et reprojetée dans le pool, indépendamment des autres ;
+- écriture : les rédacteurs (excel, html, Parquet) reçoivent un dictionnaire
+  LayerFutures dès le départ et consomment chaque couche quand elle est prête.
+"""
+
+import functools
+import threading
+from collections.abc import Mapping
+from concurrent.futures import Future, InvalidStateError
+
+from extract_functions.backends import ETREE, iter_elements, parse
+from extract_functions.columns import ColumnBuilder
+from extract_functions.registry import (
+    GEO_LAYERS,
+    ILOT_LAYERS,
+    RECORD_LAYERS,
+    RELATION_LAYERS,
+    TABULAR_LAYERS,
+    check_layers,
+    load,
+    source_layers,
+)
+from extract_functions.reprojection import WGS84, reproject
+from extract_functions.streaming import RECORD_TAGS, iter_records
+from extract_functions.topology import AREA_TOLERANCE, REPORT_LAYER
+
+# Nombre de géométries par lot décodé dans le pool
+CHUNK_SIZE = 2000
+
+# Nombre maximal de lots en attente de décodage
+QUEUE_SIZE = 8
+
+
+class LayerFutures(Mapping):
+    """
+    Dictionnaire {nom de la couche: DataFrame} dont les valeurs sont attendues
+    à la lecture : un rédacteur peut le recevoir avant la fin de l'extraction.
+    """
+
+    def __init__(self, futures):
+        self.futures = futures
+
+    def __getitem__(self, layer):
+        return self.futures[layer].result()
+
+    def __contains__(self, layer):
+        return layer in self.futures
+
+    def __iter__(self):
+        return iter(self.futures)
+
+    def __len__(self):
+        return len(self.futures)
+
+
+def pending_layers(layers=None):
+    """
+    Futures (encore vides) des couches demandées, dans l'ordre de LAYERS.
+    """
+    return {layer: Future() for layer in check_layers(layers)}
+
+
+def checked_layers(futures, tolerance=AREA_TOLERANCE):
+    """
+    Futures des couches contrôlées (voir topology.check_layer_geometries) à
+    partir des futures des couches extraites : chaque couche géographique est
+    réparée dès qu'elle est prête, et la table du contrôle (REPORT_LAYER) est
+    construite quand elles l'ont toutes été.
+    """
+    repair_layer = load("topology", "repair_layer")
+    check_report = load("topology", "check_report")
+    checked = {layer: Future() for layer in futures}
+    checked[REPORT_LAYER] = Future()
+    pending = {layer for layer in futures if layer in GEO_LAYERS}
+    invalid = {}
+    lock = threading.Lock()
+
+    def report():
+        try:
+            layers = {
+                layer: checked[layer].result()
+                for layer in ("ilots", "parcelles")
+                if layer in checked
+            }
+            rows = [invalid[layer] for layer in GEO_LAYERS if layer in invalid]
+            result = check_report(rows, layers, tolerance)
+        except BaseException as error:
+            settle(checked[REPORT_LAYER], error=error)
+        else:
+            settle(checked[REPORT_LAYER], result)
+
+    def repair(done, layer):
+        try:
+            gdf, invalid[layer] = repair_layer(done.result(), layer)
+        except BaseException as error:
+            settle(checked[layer], error=error)
+        else:
+            settle(checked[layer], gdf)
+        with lock:
+            pending.discard(layer)
+            last = not pending
+        if last:
+            report()
+
+    if not pending:
+        report()
+    for layer, future in futures.items():
+        if layer in GEO_LAYERS:
+            future.add_done_callback(functools.partial(repair, layer=layer))
+        else:
+            future.add_done_callback(functools.partial(transfer, future=checked[layer]))
+    return checked
+
+
+def iter_tree_records(xml_root, ns, tags=RECORD_TAGS):
+    """
+    Enregistrements d'un arbre complet, tag par tag, au format de iter_records.
+    """
+    for tag in tags:
+        for elem in iter_elements(xml_root, f"{ns}{tag}"):
+            yield tag, elem
+    yield None, xml_root
+
+
+def decode_chunk(chunk, slots):
+    """
+    Construit les géométries d'un lot puis libère sa place dans la file.
+    """
+    build_geometries = load("gml", "build_geometries")
+    try:
+        return build_geometries(chunk)
+    finally:
+        slots.release()
+
+
+def build_layer(build, records, chunks, crs):
+    """
+    Construit et reprojette une couche à partir de ses lots de géométries.
+    """
+    import numpy as np
+
+    geometries = np.concatenate(
+        [np.empty(0, dtype=object)] + [chunk.result() for chunk in chunks]
+    )
+    return reproject(build(records, geometries), crs)
+
+
+def extract_layers_pipeline(
+    source,
+    ns,
+    ns_gml,
+    futures,
+    executor,
+    crs=WGS84,
+    streaming=False,
+    backend=ETREE,
+    mapped=False,
+):
+    """
+    Extrait les couches d'un fichier XML telepac en pipeline.
+
+    Paramètres :
+    - source : fichier XML telepac
+    - ns, ns_gml : namespaces telepac et gml
+    - futures : {nom de la couche: Future} des couches demandées
+      (pending_layers), complétés au fil de l'extraction
+    - executor : pool de threads du décodage et de la construction
+    - crs : système de coordonnées des géométries en sortie
+    - streaming : lecture en flux (iterparse) plutôt qu'arbre complet
+    - backend : moteur de lecture XML (etree ou lxml)
+    - mapped : lecture du fichier projeté en mémoire, seuls les
+      enregistrements des couches demandées étant analysés
+
+    En cas d'erreur, les couches non terminées reçoivent l'exception, pour ne
+    pas bloquer les rédacteurs qui les attendent.
+    """
+    try:
+        run_pipeline(
+            source, ns, ns_gml, futures, executor, crs, streaming, backend, mapped
+        )
+    except BaseException as error:
+        for future in futures.values():
+            settle(future, error=error)
+        raise
+
+
+def run_pipeline(
+    source, ns, ns_gml, futures, executor, crs, streaming, backend, mapped=False
+):
+    """
+    Lecture, décodage par lots et construction des couches (voir
+    extract_layers_pipeline).
+    """
+    slots = threading.BoundedSemaphore(QUEUE_SIZE)
+
+    # Les sources des tables de relations sont extraites même si elles ne
+    # sont pas demandées ; chaque table est construite dès que sa source
+    # est prête
+    futures = dict(futures)
+    for layer in source_layers(futures):
+        futures.setdefault(layer, Future())
+    for layer in check_layers(futures):
+        if layer in RELATION_LAYERS:
+            module, origin = RELATION_LAYERS[layer]
+            futures[origin].add_done_callback(
+                functools.partial(
+                    build_relation,
+                    future=futures[layer],
+                    build=load(module, f"build_{layer}"),
+                )
+            )
+
+    # État de chaque couche à extraire par tag d'enregistrement :
+    # {tag: [(couche, collecteur, construction, données, lots, géométries)]}
+    collectors = {tag: [] for tag in RECORD_TAGS}
+    ilot_collectors = load("walk_ilots", "ILOT_COLLECTORS")
+    for layer in futures:
+        if layer in ILOT_LAYERS:
+            collect, build = ilot_collectors[layer]
+            collectors["ilot"].append([layer, collect, build, ColumnBuilder(), [], []])
+        elif layer in RECORD_LAYERS:
+            module, tag = RECORD_LAYERS[layer]
+            collect = load(module, f"collect_{layer}")
+            build = load(module, f"build_{layer}")
+            collectors[tag].append([layer, collect, build, ColumnBuilder(), [], []])
+
+    if mapped:
+        iter_mapped_records = load("mapped", "iter_mapped_records")
+        tags = [tag for tag, tag_collectors in collectors.items() if tag_collectors]
+        records = iter_mapped_records(source, ns, tags, backend=backend)
+    elif streaming:
+        records = iter_records(source, ns, backend=backend)
+    else:
+        records = iter_tree_records(parse(source, backend=backend), ns)
+
+    xml_root = None
+    for tag, elem in records:
+        if tag is None:
+            xml_root = elem
+            continue
+        for state in collectors[tag]:
+            _, collect, _, data, chunks, geometries = state
+            collect(elem, ns, ns_gml, data, geometries)
+            if len(geometries) >= CHUNK_SIZE:
+                # Attente d'une place dans la file (contre-pression)
+                slots.acquire()
+                chunks.append(executor.submit(decode_chunk, geometries, slots))
+                state[5] = []
+
+    # Construction de chaque couche dans le pool, dès la fin de la lecture
+    for tag_collectors in collectors.values():
+        for layer, _, build, data, chunks, geometries in tag_collectors:
+            slots.acquire()
+            chunks.append(executor.submit(decode_chunk, geometries, slots))
+            build_future = executor.submit(build_layer, build, data, chunks, crs)
+            build_future.add_done_callback(
+                lambda done, future=futures[layer]: transfer(done, future)
+            )
+
+    # Les informations tabulaires sont lues sur le squelette du document
+    for layer, module in TABULAR_LAYERS.items():
+        if layer in futures:
+            futures[layer].set_result(load(module, module)(xml_root, ns, ns_gml))
+
+
+def build_relation(done, future, build):
+    """
+    Construit une table de relations à partir du future terminé de sa
+    couche source, ou lui reporte l'exception de la source.
+    """
+    try:
+        result = build(done.result())
+    except BaseException as error:
+        settle(future, error=error)
+    else:
+        settle(future, result)
+
+
+def transfer(done, future):
+    """
+    Reporte le résultat (ou l'exception) d'un future terminé sur un autre.
+    """
+    error = done.exception()
+    if error is not None:
+        settle(future, error=error)
+    else:
+        settle(future, done.result())
+
+
+def settle(future, result=None, error=None):
+    """
+    Termine un future avec result, ou avec l'exception error. Un future déjà
+    terminé est laissé tel quel : l'erreur d'une étape est reportée sur
+    toutes les couches non terminées pendant que d'autres couches s'achèvent
+    dans le pool, et la première issue connue l'emporte.
+    """
+    try:
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+    except InvalidStateError:
+        pass
@@ -0,0 +1,145 @@
+"""
+Registre des couches extraites d'un fichier XML telepac.
+
+Les modules d'extraction sont importés à la demande : une extraction limitée
+aux couches tabulaires (animaux, demandeur, aides PAC) n'importe ni geopandas,
+ni shapely, ni GDAL.
+"""
+
+import functools
+import importlib
+
+from extract_functions.metrics import count_layers, measure
+from extract_functions.reprojection import LAMBERT93, WGS84, reproject_layers
+
+# Couches rattachées aux ilots, extraites en un seul parcours des ilots
+ILOT_LAYERS = ("ilots", "parcelles", "bio", "maec")
+
+# Couches géographiques portées par leurs propres enregistrements :
+# {couche: (module, tag de l'enregistrement)}
+RECORD_LAYERS = {
+    "sna": ("extract_sna", "sna-declaree"),
+    "zdh": ("extract_zdh", "zdh-declaree"),
+}
+
+# Couches tabulaires : {couche: module (et fonction) d'extraction}
+TABULAR_LAYERS = {
+    "animaux": "extract_animaux",
+    "demandeur": "extract_demandeur",
+    "aides_pac": "extract_aides_pac",
+}
+
+# Tables de relations, construites à partir d'une couche extraite :
+# {couche: (module, couche source)}
+RELATION_LAYERS = {
+    "sna_ilots": ("extract_sna", "sna"),
+    "sna_parcelles": ("extract_sna", "sna"),
+}
+
+GEO_LAYERS = ILOT_LAYERS + tuple(RECORD_LAYERS)
+LAYERS = GEO_LAYERS + tuple(TABULAR_LAYERS) + tuple(RELATION_LAYERS)
+
+
+def load(module, name):
+    """
+    Import à la demande d'une fonction d'un module de extract_functions
+    """
+    return getattr(importlib.import_module(f"extract_functions.{module}"), name)
+
+
+def check_layers(layers=None):
+    """
+    Vérifie les noms de couches demandés et les remet dans l'ordre de LAYERS.
+
+    Toutes les couches sont retenues si layers vaut None.
+    """
+    if layers is None:
+        return LAYERS
+    unknown = set(layers) - set(LAYERS)
+    if unknown:
+        raise ValueError(f"Couches inconnues : {sorted(unknown)}")
+    return tuple(layer for layer in LAYERS if layer in layers)
+
+
+def source_layers(layers=None):
+    """
+    Couches à extraire du document pour obtenir les couches demandées : les
+    couches demandées, hors tables de relations, et les sources de ces
+    tables, dans l'ordre de LAYERS.
+    """
+    layers = check_layers(layers)
+    sources = {
+        RELATION_LAYERS[layer][1] for layer in layers if layer in RELATION_LAYERS
+    }
+    return tuple(
+        layer
+        for layer in LAYERS
+        if layer not in RELATION_LAYERS and (layer in layers or layer in sources)
+    )
+
+
+def build_relation_layers(extracted, layers):
+    """
+    Ajoute à extracted les tables de relations demandées dans layers,
+    construites à partir de leurs couches sources déjà extraites.
+    """
+    for layer in layers:
+        if layer in RELATION_LAYERS:
+            module, source = RELATION_LAYERS[layer]
+            extracted[layer] = load(module, f"build_{layer}")(extracted[source])
+    return extracted
+
+
+def extract_selected_layers(xml_root, ns, ns_gml, layers=None, crs=WGS84, metrics=None):
+    """
+    Extrait uniquement les couches demandées d'un document XML.
+
+    Les couches géographiques sont construites en Lambert-93 puis reprojetées
+    ensemble dans crs (WGS84 par défaut), en une seule transformation. Les
+    tables de relations sont construites à partir de leurs couches sources,
+    extraites même si elles ne sont pas demandées. Chaque extraction et la
+    reprojection sont mesurées dans metrics (Metrics), s'il est fourni.
+
+    Retourne un dictionnaire {nom de la couche: DataFrame ou GeoDataFrame}.
+    """
+    layers = check_layers(layers)
+    sources = source_layers(layers)
+    extracted = {}
+
+    # Traitements des ilots, parcelles, éléments bio et maec
+    # (elements surfaciques) en un seul parcours des ilots
+    ilot_layers = [layer for layer in sources if layer in ILOT_LAYERS]
+    if ilot_layers:
+        extract_ilot_layers = load("walk_ilots", "extract_ilot_layers")
+        with measure(metrics, "extract_" + "+".join(ilot_layers)) as record:
+            walked = extract_ilot_layers(
+                xml_root, ns, ns_gml, ilot_layers, crs=LAMBERT93
+            )
+            count_layers(record, walked)
+        extracted.update(walked)
+
+    # Traitements des sna-declaree, zdh-declaree et couches tabulaires
+    for layer in sources:
+        if layer in RECORD_LAYERS:
+            extract = load(RECORD_LAYERS[layer][0], f"extract_{layer}")
+            extract = functools.partial(extract, crs=LAMBERT93)
+        elif layer in TABULAR_LAYERS:
+            extract = load(TABULAR_LAYERS[layer], TABULAR_LAYERS[layer])
+        else:
+            continue
+        with measure(metrics, f"extract_{layer}") as record:
+            extracted[layer] = extract(xml_root, ns, ns_gml)
+            count_layers(record, {layer: extracted[layer]})
+
+    # Tables de relations, à partir des couches extraites
+    relation_layers = [layer for layer in layers if layer in RELATION_LAYERS]
+    if relation_layers:
+        with measure(metrics, "relations") as record:
+            build_relation_layers(extracted, relation_layers)
+            count_layers(record, {layer: extracted[layer] for layer in relation_layers})
+
+    # Reprojection en bloc de toutes les couches géographiques
+    with measure(metrics, "reprojection"):
+        extracted = reproject_layers(extracted, crs)
+
+    return {layer: extracted[layer] for layer in layers}
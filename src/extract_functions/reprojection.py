@@ -0,0 +1,88 @@
+"""
+Module de reprojection des couches géographiques extraites.
+
+Les géométries telepac sont en Lambert-93 (EPSG:2154). Plutôt qu'un to_crs
+par couche, les coordonnées de toutes les couches sont reprojetées en un seul
+appel d'un transformateur pyproj partagé, mis en cache pour tout le processus.
+"""
+
+import functools
+
+# Système de coordonnées natif des fichiers telepac et système de sortie par défaut
+LAMBERT93 = "EPSG:2154"
+WGS84 = "EPSG:4326"
+
+
+@functools.lru_cache(maxsize=None)
+def get_transformer(source_crs, target_crs):
+    """
+    Transformateur pyproj partagé entre deux systèmes de coordonnées.
+    """
+    from pyproj import Transformer
+
+    return Transformer.from_crs(source_crs, target_crs, always_xy=True)
+
+
+def reproject_layers(layers, crs=WGS84):
+    """
+    Reprojette dans crs les GeoDataFrames d'un dictionnaire de couches.
+
+    Les coordonnées de toutes les couches d'un même système d'origine sont
+    concaténées et transformées en bloc, puis réparties entre les couches.
+    Les couches tabulaires et celles déjà dans crs sont retournées telles quelles.
+    La coordonnée Z des géométries qui en ont une est conservée.
+
+    Retourne un nouveau dictionnaire {nom de la couche: DataFrame ou GeoDataFrame}.
+    """
+    reprojected = dict(layers)
+    geo_layers = [name for name, df in layers.items() if hasattr(df, "crs")]
+    if not geo_layers:
+        return reprojected
+
+    import numpy as np
+    import shapely
+    from pyproj import CRS
+
+    target = CRS.from_user_input(crs)
+
+    # Couches à reprojeter, regroupées par système d'origine
+    by_source = {}
+    for name in geo_layers:
+        source = layers[name].crs
+        if source is not None and source != target:
+            by_source.setdefault(source, []).append(name)
+
+    for source, names in by_source.items():
+        transformer = get_transformer(source, target)
+        geometries = np.concatenate(
+            [np.asarray(layers[name].geometry.array) for name in names]
+        )
+        # Les géométries avec altitude (Z) la gardent, transformée avec x et y
+        has_z = shapely.has_z(geometries)
+        for include_z in (False, True):
+            selected = has_z == include_z
+            if selected.any():
+                geometries[selected] = shapely.transform(
+                    geometries[selected],
+                    transformer.transform,
+                    include_z=include_z,
+                    interleaved=False,
+                )
+
+        start = 0
+        for name in names:
+            gdf = layers[name]
+            stop = start + len(gdf)
+            gdf = gdf.set_crs(None, allow_override=True)
+            gdf[gdf.geometry.name] = geometries[start:stop]
+            reprojected[name] = gdf.set_crs(target)
+            start = stop
+
+    return reprojected
+
+
+def reproject(gdf, crs=WGS84):
+    """
+    Reprojette un GeoDataFrame dans crs avec le transformateur partagé.
+    """
+    return reproject_layers({"gdf": gdf}, crs)["gdf"]
@@ -0,0 +1,137 @@
+"""
+Module d'extraction en flux (iterparse) des fichiers XML telepac volumineux.
+
+Les enregistrements (ilot, sna-declaree, zdh-declaree) sont transmis aux
+collecteurs dès que leur élément est terminé, puis vidés et détachés de
+l'arbre : seul le squelette du document (demandeur, animaux, aides...)
+reste en mémoire, quelle que soit la taille du fichier.
+"""
+
+from extract_functions.backends import ETREE, LXML, check_backend, iterparse, load_lxml
+from extract_functions.columns import ColumnBuilder
+from extract_functions.registry import (
+    ILOT_LAYERS,
+    RECORD_LAYERS,
+    TABULAR_LAYERS,
+    build_relation_layers,
+    check_layers,
+    load,
+    source_layers,
+)
+from extract_functions.reprojection import WGS84, reproject_layers
+
+RECORD_TAGS = ("ilot",) + tuple(tag for _, tag in RECORD_LAYERS.values())
+
+
+def iter_records(source, ns, tags=RECORD_TAGS, backend=ETREE):
+    """
+    Parcourt le document en flux et produit un enregistrement à la fois.
+
+    Produit des tuples (tag, élément) pour chaque enregistrement terminé dont
+    le tag fait partie de tags. L'élément est vidé et détaché de son parent
+    dès que le consommateur demande l'enregistrement suivant. Le dernier tuple
+    (None, racine) donne le squelette du document, sans les enregistrements.
+    """
+    record_tags = {f"{ns}{tag}": tag for tag in tags}
+    if check_backend(backend) == LXML:
+        yield from iter_records_lxml(source, record_tags)
+        return
+
+    stack = []
+    root = None
+
+    for event, elem in iterparse(source, events=("start", "end")):
+        if event == "start":
+            if root is None:
+                root = elem
+            stack.append(elem)
+            continue
+
+        stack.pop()
+        tag = record_tags.get(elem.tag)
+        if tag is not None:
+            yield tag, elem
+            elem.clear()
+            if stack:
+                stack[-1].remove(elem)
+
+    yield None, root
+
+
+def iter_records_lxml(source, record_tags):
+    """
+    Variante lxml de iter_records : iterparse ne signale que la fin des
+    enregistrements (filtre tag), le reste du document formant le squelette.
+    """
+    context = load_lxml().iterparse(source, events=("end",), tag=list(record_tags))
+    for _, elem in context:
+        yield record_tags[elem.tag], elem
+        elem.clear()
+        elem.getparent().remove(elem)
+
+    yield None, context.root
+
+
+def extract_layers_streaming(
+    source, ns, ns_gml, layers=None, crs=WGS84, backend=ETREE, mapped=False
+):
+    """
+    Extrait en flux les couches demandées d'un fichier XML telepac.
+
+    Les couches géographiques sont reprojetées ensemble dans crs
+    (WGS84 par défaut) une fois le fichier entièrement lu. backend désigne
+    le moteur de lecture XML (etree ou lxml). Si mapped est vrai, le fichier
+    est projeté en mémoire et seuls les enregistrements des couches
+    demandées sont analysés (voir mapped.iter_mapped_records).
+
+    Retourne un dictionnaire {nom de la couche: DataFrame ou GeoDataFrame},
+    identique à celui obtenu à partir de l'arbre complet.
+    """
+    layers = check_layers(layers)
+    sources = source_layers(layers)
+
+    # Collecteurs des couches à extraire par tag d'enregistrement :
+    # {tag: [(couche, collecteur, construction, données, géométries)]}
+    collectors = {tag: [] for tag in RECORD_TAGS}
+    ilot_layers = [layer for layer in sources if layer in ILOT_LAYERS]
+    if ilot_layers:
+        ilot_collectors = load("walk_ilots", "ILOT_COLLECTORS")
+        for layer in ilot_layers:
+            collect, build = ilot_collectors[layer]
+            collectors["ilot"].append((layer, collect, build, ColumnBuilder(), []))
+    for layer, (module, tag) in RECORD_LAYERS.items():
+        if layer in sources:
+            collect = load(module, f"collect_{layer}")
+            build = load(module, f"build_{layer}")
+            collectors[tag].append((layer, collect, build, ColumnBuilder(), []))
+
+    # Tous les enregistrements sont libérés, même ceux des couches non
+    # demandées ; en lecture projetée, ils ne sont pas analysés
+    if mapped:
+        iter_mapped_records = load("mapped", "iter_mapped_records")
+        tags = [tag for tag, tag_collectors in collectors.items() if tag_collectors]
+        records = iter_mapped_records(source, ns, tags, backend=backend)
+    else:
+        records = iter_records(source, ns, backend=backend)
+    xml_root = None
+    for tag, elem in records:
+        if tag is None:
+            xml_root = elem
+            continue
+        for _, collect, _, layer_records, geometries in collectors[tag]:
+            collect(elem, ns, ns_gml, layer_records, geometries)
+
+    extracted = {
+        layer: build(layer_records, geometries)
+        for tag_collectors in collectors.values()
+        for layer, _, build, layer_records, geometries in tag_collectors
+    }
+    extracted = reproject_layers(extracted, crs)
+
+    # Les informations tabulaires sont lues sur le squelette du document
+    for layer, module in TABULAR_LAYERS.items():
+        if layer in sources:
+            extracted[layer] = load(module, module)(xml_root, ns, ns_gml)
+
+    extracted = build_relation_layers(extracted, layers)
+    return {layer: extracted[layer] for layer in layers}
@@ -0,0 +1,266 @@
+"""
+Module de contrôle et de réparation des géométries des couches extraites.
+
+Les géométries telepac sont décodées sans contrôle : un polygone qui se
+recoupe fait échouer union_all (centrage de la visu Folium) et toute
+superposition ultérieure. Le contrôle, optionnel, porte sur toutes les
+couches géographiques :
+- validité des géométries (shapely.is_valid), les géométries invalides étant
+  réparées (shapely.make_valid) ;
+- parcelles d'un même ilot qui se chevauchent, trouvées par un index spatial
+  (STRtree) des parcelles ;
+- parcelles qui débordent de leur ilot, trouvées par un index spatial des
+  ilots.
+
+Toutes les opérations sont appliquées en bloc aux tableaux de géométries
+(opérations vectorisées de shapely). Les surfaces sont calculées en
+Lambert-93. Le résultat du contrôle est une table (controle_geometries), une
+ligne par anomalie.
+"""
+
+from extract_functions.registry import GEO_LAYERS
+from extract_functions.reprojection import LAMBERT93, reproject_layers
+
+# Nom de la table du contrôle dans les couches extraites
+REPORT_LAYER = "controle_geometries"
+
+# Surface (m²) en deçà de laquelle un chevauchement ou un débord est ignoré
+AREA_TOLERANCE = 1.0
+
+# Anomalies en sortie
+INVALIDE = "géométrie invalide"
+CHEVAUCHEMENT = "chevauchement de parcelles"
+HORS_ILOT = "parcelle hors ilot"
+
+# Colonnes identifiant les entités de chaque couche
+IDENTIFIERS = {
+    "ilots": ("numero-ilot-reference",),
+    "parcelles": ("numero-ilot-reference", "numero-parcelle"),
+    "bio": ("numero-ilot-reference", "numero-element-bio"),
+    "maec": ("numero-ilot-reference", "numero-element-maec"),
+    "sna": ("numero-sna-declaree",),
+    "zdh": ("numero-zdh-declaree",),
+}
+
+REPORT_COLUMNS = [
+    "couche",
+    "controle",
+    "identifiant",
+    "identifiant-autre",
+    "detail",
+    "surface",
+]
+
+
+def identifiers(df, layer):
+    """
+    Identifiants des entités d'une couche : valeurs des colonnes de
+    IDENTIFIERS jointes par "/", à défaut numéro de ligne.
+    """
+    import numpy as np
+
+    columns = [column for column in IDENTIFIERS.get(layer, ()) if column in df]
+    if not columns:
+        return np.arange(len(df)).astype(str).astype(object)
+    values = df[columns[0]].astype(str).to_numpy(dtype=object)
+    for column in columns[1:]:
+        values = values + "/" + df[column].astype(str).to_numpy(dtype=object)
+    return values
+
+
+def report(layer, controle, identifiant, autre=None, detail=None, surface=None):
+    """
+    Lignes du contrôle : une par élément de identifiant.
+    """
+    import pandas as pd
+
+    return pd.DataFrame(
+        {
+            "couche": layer,
+            "controle": controle,
+            "identifiant": identifiant,
+            "identifiant-autre": autre,
+            "detail": detail,
+            "surface": surface,
+        },
+        columns=REPORT_COLUMNS,
+        index=pd.RangeIndex(len(identifiant)),
+    )
+
+
+def repair_layer(gdf, layer):
+    """
+    Répare les géométries invalides d'une couche (make_valid, en conservant
+    la dimension des géométries d'origine).
+
+    Retourne la couche, réparée s'il y a lieu (copie), et les lignes du
+    contrôle de ses géométries invalides avec la raison de leur invalidité.
+    """
+    import numpy as np
+    import shapely
+
+    geometries = np.asarray(gdf.geometry.array)
+    (invalid,) = np.nonzero(
+        ~shapely.is_valid(geometries) & ~shapely.is_missing(geometries)
+    )
+    rows = report(
+        layer,
+        INVALIDE,
+        identifiers(gdf, layer)[invalid],
+        detail=shapely.is_valid_reason(geometries[invalid]),
+    )
+    if len(invalid):
+        repaired = geometries.copy()
+        repaired[invalid] = shapely.make_valid(
+            geometries[invalid], method="structure", keep_collapsed=False
+        )
+        gdf = gdf.copy()
+        gdf[gdf.geometry.name] = repaired
+    return gdf, rows
+
+
+def has_ilot_numbers(*layers):
+    """
+    Vrai si chaque couche a des lignes et la colonne numero-ilot-reference
+    (une couche vide extraite n'a aucune colonne).
+    """
+    return all(len(df) and "numero-ilot-reference" in df for df in layers)
+
+
+def parcelle_overlaps(parcelles, tolerance=AREA_TOLERANCE):
+    """
+    Chevauchements des parcelles d'un même ilot (Lambert-93, géométries
+    valides) : les paires de parcelles proches sont trouvées par un index
+    spatial, puis seules celles dont les intérieurs se recoupent sur plus de
+    tolerance m² sont retenues.
+    """
+    import numpy as np
+    import shapely
+
+    if not has_ilot_numbers(parcelles):
+        return report("parcelles", CHEVAUCHEMENT, [])
+
+    geometries = np.asarray(parcelles.geometry.array)
+    ilots = parcelles["numero-ilot-reference"].to_numpy()
+    first, second = shapely.STRtree(geometries).query(
+        geometries, predicate="intersects"
+    )
+    pairs = (first < second) & (ilots[first] == ilots[second])
+    first, second = first[pairs], second[pairs]
+
+    inside = shapely.relate_pattern(geometries[first], geometries[second], "T********")
+    first, second = first[inside], second[inside]
+    areas = shapely.area(shapely.intersection(geometries[first], geometries[second]))
+    overlapping = areas > tolerance
+
+    names = identifiers(parcelles, "parcelles")
+    return report(
+        "parcelles",
+        CHEVAUCHEMENT,
+        names[first[overlapping]],
+        autre=names[second[overlapping]],
+        surface=areas[overlapping].round(2),
+    )
+
+
+def parcelles_outside(parcelles, ilots, tolerance=AREA_TOLERANCE):
+    """
+    Parcelles qui débordent de leur ilot de plus de tolerance m² (Lambert-93,
+    géométries valides), ou dont l'ilot est absent de la couche des ilots.
+    Les parcelles couvertes par leur ilot sont trouvées par un index spatial
+    des ilots ; la surface hors ilot n'est calculée que pour les autres.
+    """
+    import numpy as np
+    import pandas as pd
+    import shapely
+
+    if not has_ilot_numbers(parcelles, ilots):
+        return report("parcelles", HORS_ILOT, [])
+
+    geometries = np.asarray(parcelles.geometry.array)
+    ilot_geometries = np.asarray(ilots.geometry.array)
+
+    # Position de l'ilot de chaque parcelle (-1 si l'ilot est absent)
+    numeros = ilots["numero-ilot-reference"]
+    unique = ~numeros.duplicated(keep="last").to_numpy()
+    found = pd.Index(numeros[unique]).get_indexer(parcelles["numero-ilot-reference"])
+    own = np.where(found >= 0, np.flatnonzero(unique)[found], -1)
+
+    covered = np.zeros(len(parcelles), dtype=bool)
+    index, ilot_index = shapely.STRtree(ilot_geometries).query(
+        geometries, predicate="covered_by"
+    )
+    covered[index[own[index] == ilot_index]] = True
+
+    (outside,) = np.nonzero(~covered & ~shapely.is_missing(geometries))
+    areas = shapely.area(geometries[outside])
+    known = own[outside] >= 0
+    areas[known] = shapely.area(
+        shapely.difference(
+            geometries[outside[known]], ilot_geometries[own[outside[known]]]
+        )
+    )
+    details = np.where(known, None, "ilot absent")
+    kept = (areas > tolerance) | ~known
+
+    return report(
+        "parcelles",
+        HORS_ILOT,
+        identifiers(parcelles, "parcelles")[outside[kept]],
+        autre=parcelles["numero-ilot-reference"].to_numpy(dtype=object)[outside[kept]],
+        detail=details[kept],
+        surface=areas[kept].round(2),
+    )
+
+
+def check_topology(layers, tolerance=AREA_TOLERANCE):
+    """
+    Chevauchements des parcelles d'un même ilot et débords des parcelles
+    hors de leur ilot, si layers contient les parcelles (et les ilots).
+    Les géométries doivent être valides (voir repair_layer).
+    """
+    import pandas as pd
+
+    if "parcelles" not in layers:
+        return report(None, None, [])
+    topology = reproject_layers(
+        {layer: layers[layer] for layer in ("ilots", "parcelles") if layer in layers},
+        LAMBERT93,
+    )
+    rows = [parcelle_overlaps(topology["parcelles"], tolerance)]
+    if "ilots" in topology:
+        rows.append(
+            parcelles_outside(topology["parcelles"], topology["ilots"], tolerance)
+        )
+    return pd.concat(rows, ignore_index=True)
+
+
+def check_report(invalid, layers, tolerance=AREA_TOLERANCE):
+    """
+    Table du contrôle : lignes des géométries invalides de chaque couche
+    (invalid, voir repair_layer) complétées du contrôle de la topologie des
+    couches réparées layers.
+    """
+    import pandas as pd
+
+    rows = list(invalid) + [check_topology(layers, tolerance)]
+    return pd.concat(rows, ignore_index=True)
+
+
+def check_layer_geometries(layers, tolerance=AREA_TOLERANCE):
+    """
+    Contrôle des géométries des couches extraites : réparation des géométries
+    invalides de chaque couche géographique, puis contrôle de la topologie
+    des parcelles (voir check_topology).
+
+    Retourne un nouveau dictionnaire des couches, réparées, complété de la
+    table du contrôle (REPORT_LAYER).
+    """
+    checked = dict(layers)
+    invalid = []
+    for layer in GEO_LAYERS:
+        if layer in checked:
+            checked[layer], rows = repair_layer(checked[layer], layer)
+            invalid.append(rows)
+    checked[REPORT_LAYER] = check_report(invalid, checked, tolerance)
+    return checked
@@ -0,0 +1,55 @@
+"""
+Module contenant le parcours unique des ilots d'un document XML.
+
+Chaque couche rattachée aux ilots (ilots, parcelles, éléments bio, MAEC)
+enregistre un collecteur, appelé pour chaque ilot, et une fonction de
+construction du GeoDataFrame final. L'arbre XML n'est ainsi parcouru
+qu'une seule fois quel que soit le nombre de couches demandées.
+"""
+
+from extract_functions.backends import iter_elements
+from extract_functions.columns import ColumnBuilder
+from extract_functions.extract_bio import build_bio, collect_bio
+from extract_functions.extract_ilots import build_ilots, collect_ilot
+from extract_functions.extract_maec import build_maec, collect_maec
+from extract_functions.extract_parcelles import build_parcelles, collect_parcelles
+from extract_functions.reprojection import WGS84, reproject_layers
+
+# Collecteurs par couche : (collecteur appelé sur chaque ilot, construction)
+ILOT_COLLECTORS = {
+    "ilots": (collect_ilot, build_ilots),
+    "parcelles": (collect_parcelles, build_parcelles),
+    "bio": (collect_bio, build_bio),
+    "maec": (collect_maec, build_maec),
+}
+
+
+def extract_ilot_layers(xml_root, ns, ns_gml, layers=None, crs=WGS84):
+    """
+    Extrait en un seul parcours des ilots les couches demandées.
+
+    Paramètres :
+    - xml_root : racine du document XML
+    - ns, ns_gml : namespaces telepac et gml
+    - layers : noms des couches à extraire parmi ILOT_COLLECTORS
+      (toutes par défaut)
+    - crs : système de coordonnées des géométries en sortie (WGS84 par défaut)
+
+    Retourne un dictionnaire {nom de la couche: GeoDataFrame}.
+    """
+    if layers is None:
+        layers = list(ILOT_COLLECTORS)
+
+    collectors = [
+        (name, ILOT_COLLECTORS[name][0], ColumnBuilder(), []) for name in layers
+    ]
+
+    for ilot in iter_elements(xml_root, f"{ns}ilot"):
+        for _, collect, records, geometries in collectors:
+            collect(ilot, ns, ns_gml, records, geometries)
+
+    extracted = {
+        name: ILOT_COLLECTORS[name][1](records, geometries)
+        for name, _, records, geometries in collectors
+    }
+    return reproject_layers(extracted, crs)
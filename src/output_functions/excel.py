@@ -0,0 +1,191 @@
+"""
+Module d'écriture des couches extraites dans un fichier excel.
+
+Les onglets sont écrits ligne à ligne avec xlsxwriter en mode mémoire
+constante. Les colonnes déclarées dans SHEET_SCHEMAS (surfaces, longueurs,
+effectifs...) sont converties en nombres pour ne plus être stockées sous
+forme de texte dans excel. Les géométries sont écrites en WKT (pleine
+précision) ou ignorées.
+
+Une cellule excel contient au plus MAX_CELL_LENGTH caractères : les textes
+plus longs (WKT de grands polygones) sont écrits en entier dans un fichier
+csv à côté du fichier excel et remplacés dans la cellule par un renvoi.
+
+pandas, shapely et xlsxwriter ne sont importés qu'à l'écriture, pour ne pas
+ralentir le démarrage des scripts (--help, couches tabulaires...).
+"""
+
+# Ordre des onglets : (couche, nom de l'onglet)
+SHEETS = [
+    ("demandeur", "Exploitation"),
+    ("animaux", "Animaux"),
+    ("aides_pac", "Aides PAC"),
+    ("ilots", "Ilots"),
+    ("parcelles", "Parcelles"),
+    ("bio", "Elements Bio par ilot"),
+    ("maec", "Elements MAEC par ilot"),
+    ("sna", "Elements SNA déclarés"),
+    ("zdh", "Elements ZDH déclarés"),
+    ("sna_ilots", "Relations SNA - ilots"),
+    ("sna_parcelles", "Relations SNA - parcelles"),
+    ("controle_sna_ilots", "Contrôle SNA - ilots"),
+    ("controle_sna_parcelles", "Contrôle SNA - parcelles"),
+    ("controle_geometries", "Contrôle géométries"),
+]
+
+# Colonnes numériques de chaque onglet : {couche: {colonne: type}}
+SHEET_SCHEMAS = {
+    "animaux": {"nb-animaux-1": "int"},
+    "ilots": {"numero-ilot": "int"},
+    "parcelles": {
+        "numero-parcelle": "int",
+        "surface-admissible": "float",
+        "longueur-bordure": "float",
+    },
+    "bio": {
+        "numero-element-bio": "int",
+        "premiere-campagne": "int",
+        "derniere-campagne": "int",
+    },
+    "maec": {
+        "numero-element-maec": "int",
+        "premiere-campagne": "int",
+        "derniere-campagne": "int",
+    },
+    "sna": {
+        "numero-sna-declaree": "int",
+        "surfaceGraphique": "float",
+        "largeur": "float",
+        "largeur-calculée": "float",
+    },
+    "zdh": {"numero-zdh-declaree": "int"},
+}
+
+GEOMETRY_OPTIONS = ("wkt", "drop")
+
+# Nombre maximal de caractères d'une cellule excel (xlsxwriter tronque au-delà)
+MAX_CELL_LENGTH = 32767
+LONG_TEXTS_SUFFIX = "_textes_longs.csv"
+
+
+def to_numeric(series, kind):
+    """
+    Conversion d'une colonne texte en nombres.
+
+    Les valeurs non numériques sont conservées telles quelles plutôt que
+    d'être perdues.
+    """
+    import pandas as pd
+
+    numbers = pd.to_numeric(series, errors="coerce")
+    if kind == "int" and numbers.dropna().mod(1).eq(0).all():
+        numbers = numbers.astype("Int64")
+    converted = numbers.astype(object).where(numbers.notna(), None)
+    return converted.where(numbers.notna() | series.isna(), series)
+
+
+def prepare_sheet(df, schema, geometry="wkt"):
+    """
+    Préparation d'une couche pour l'écriture : types numériques, géométrie
+    en WKT (ou supprimée) et listes imbriquées converties en texte.
+    """
+    import pandas as pd
+
+    df = pd.DataFrame(df)
+    for column in df.columns:
+        values = df[column]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            values = values.astype(object)
+        if column == "geometry" or values.dtype.name == "geometry":
+            if geometry == "drop":
+                df = df.drop(columns=column)
+                continue
+            import shapely
+
+            # Pleine précision, comme str(geometrie)
+            values = pd.Series(
+                shapely.to_wkt(values.array, rounding_precision=-1), index=df.index
+            )
+        elif column in schema:
+            values = to_numeric(values, schema[column])
+        elif values.dtype == object:
+            values = values.map(lambda v: str(v) if isinstance(v, (list, dict)) else v)
+        df[column] = values.astype(object)
+    return df.where(df.notna(), None)
+
+
+def long_texts(df, sheet, filename):
+    """
+    Remplace dans df les textes trop longs pour une cellule excel par un
+    renvoi au fichier filename.
+
+    Retourne la liste des textes remplacés : (onglet, ligne excel, colonne,
+    texte).
+    """
+    replaced = []
+    for position, column in enumerate(df.columns):
+        for row, value in enumerate(df[column]):
+            if isinstance(value, str) and len(value) > MAX_CELL_LENGTH:
+                # Ligne 1 : en-têtes
+                replaced.append((sheet, row + 2, column, value))
+                df.iat[row, position] = (
+                    f"[texte de {len(value)} caractères, voir {filename}]"
+                )
+    return replaced
+
+
+def write_long_texts(replaced, filename):
+    """
+    Écriture des textes trop longs pour excel dans un fichier csv.
+    """
+    import csv
+
+    with open(filename, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["onglet", "ligne", "colonne", "texte"])
+        writer.writerows(replaced)
+
+
+def write_excel(layers, excel_filename, geometry="wkt"):
+    """
+    Écriture des couches non vides dans un fichier excel, un onglet par couche.
+
+    Paramètres :
+    - layers : dictionnaire {nom de la couche: DataFrame ou GeoDataFrame}
+    - excel_filename : nom du fichier excel (extension xlsx)
+    - geometry : "wkt" pour écrire les géométries en WKT, "drop" pour les ignorer
+
+    Les textes de plus de MAX_CELL_LENGTH caractères sont écrits dans
+    <nom du fichier excel>_textes_longs.csv, et remplacés par un renvoi dans
+    les cellules.
+    """
+    import os
+
+    import xlsxwriter
+
+    if geometry not in GEOMETRY_OPTIONS:
+        raise ValueError(f"Option geometry inconnue : {geometry}")
+
+    long_texts_filename = os.path.splitext(excel_filename)[0] + LONG_TEXTS_SUFFIX
+    replaced = []
+
+    workbook = xlsxwriter.Workbook(excel_filename, {"constant_memory": True})
+    header_format = workbook.add_format({"bold": True, "border": 1})
+    for layer, sheet in SHEETS:
+        df = layers.get(layer)
+        if df is None or df.empty:
+            continue
+
+        df = prepare_sheet(df, SHEET_SCHEMAS.get(layer, {}), geometry=geometry)
+        replaced += long_texts(df, sheet, os.path.basename(long_texts_filename))
+        worksheet = workbook.add_worksheet(sheet)
+        worksheet.write_row(0, 0, list(df.columns), header_format)
+        for row, values in enumerate(df.itertuples(index=False, name=None), start=1):
+            worksheet.write_row(row, 0, values)
+    workbook.close()
+
+    if replaced:
+        write_long_texts(replaced, long_texts_filename)
+    elif os.path.exists(long_texts_filename):
+        # Fichier d'une écriture précédente du même fichier excel
+        os.remove(long_texts_filename)
@@ -0,0 +1,65 @@
+"""
+Module d'allègement des couches affichées dans la visu Folium.
+
+- simplification des géométries (shapely.simplify avec préservation de la
+  topologie) à la tolérance d'un pixel au niveau de zoom demandé, calculée
+  en Lambert-93 (mètres) ;
+- arrondi des coordonnées WGS84 à precision décimales (6 décimales : ~10 cm) ;
+- seules les colonnes affichées dans l'infobulle sont conservées.
+
+shapely et numpy ne sont importés qu'à l'appel.
+"""
+
+import math
+
+# Niveau de zoom jusqu'auquel les géométries simplifiées restent exactes au pixel
+SIMPLIFY_ZOOM = 18
+
+# Nombre de décimales des coordonnées WGS84
+PRECISION = 6
+
+# Taille (m) d'un pixel à l'équateur au zoom 0 (tuiles web de 256 pixels)
+PIXEL_SIZE_ZOOM_0 = 156543.03
+
+# Latitude utilisée pour la taille des pixels (France métropolitaine)
+LATITUDE = 46.0
+
+
+def zoom_tolerance(zoom, latitude=LATITUDE):
+    """
+    Taille (m) d'un pixel au niveau de zoom zoom, à la latitude latitude.
+    """
+    return PIXEL_SIZE_ZOOM_0 * math.cos(math.radians(latitude)) / 2**zoom
+
+
+def simplify_layer(gdf, fields, zoom=SIMPLIFY_ZOOM):
+    """
+    Couche réduite aux colonnes fields et aux géométries simplifiées à la
+    tolérance d'un pixel au zoom zoom. gdf doit être dans un système de
+    coordonnées en mètres (Lambert-93).
+    """
+    import shapely
+
+    gdf = gdf[[field for field in fields if field in gdf] + [gdf.geometry.name]]
+    return gdf.set_geometry(
+        shapely.simplify(
+            gdf.geometry.values, zoom_tolerance(zoom), preserve_topology=True
+        ),
+        crs=gdf.crs,
+    )
+
+
+def round_coordinates(gdf, precision=PRECISION):
+    """
+    Couche dont les coordonnées sont arrondies à precision décimales.
+    """
+    import numpy as np
+    import shapely
+
+    return gdf.set_geometry(
+        shapely.transform(
+            gdf.geometry.values,
+            lambda coords: np.round(coords, precision),
+        ),
+        crs=gdf.crs,
+    )
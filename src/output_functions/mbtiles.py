@@ -0,0 +1,565 @@
+"""
+Module d'export des couches géographiques en tuiles vectorielles (MBTiles).
+
+Les couches de tout un lot (jeux de données GeoParquet de write_layers_parquet)
+sont découpées en tuiles Mapbox Vector Tile (MVT 2.1) de MIN_ZOOM à MAX_ZOOM,
+enregistrées dans une archive MBTiles (base sqlite) :
+
+- à chaque niveau de zoom, les géométries sont simplifiées à la taille d'un
+  pixel de tuile (preserve_topology) et les polygones plus petits qu'un pixel
+  sont ignorés ;
+- le découpage (shapely.intersection avec les tuiles élargies de BUFFER
+  pixels) et le passage en coordonnées de tuile sont vectorisés ;
+- seuls les champs de TILE_FIELDS et les colonnes de partition (campagne,
+  numero-pacage) sont écrits dans les tuiles.
+
+L'encodage protobuf des tuiles est écrit ici, sans dépendance supplémentaire.
+numpy, shapely et geopandas ne sont importés qu'à l'export.
+"""
+
+import gzip
+import json
+import math
+import os
+import sqlite3
+import struct
+
+from extract_functions.reprojection import reproject_layers
+from output_functions.parquet import PARTITION_COLUMNS, read_layer_parquet
+
+WEB_MERCATOR = "EPSG:3857"
+HALF_WORLD = 20037508.342789244  # demi-largeur (m) du monde en Web Mercator
+
+# Champs écrits dans les tuiles : {couche: champs}
+TILE_FIELDS = {
+    "ilots": ("numero-ilot-reference",),
+    "parcelles": ("numero-ilot-reference", "numero-parcelle", "code-culture"),
+    "sna": ("categorieSna", "typeSna", "surfaceGraphique"),
+    "zdh": ("numero-zdh-declaree",),
+}
+
+MIN_ZOOM = 8
+MAX_ZOOM = 14
+EXTENT = 4096  # résolution d'une tuile
+BUFFER = 64  # marge (pixels de tuile) autour de chaque tuile
+
+# Types et commandes de géométrie MVT
+POINT, LINESTRING, POLYGON = 1, 2, 3
+MOVE_TO, LINE_TO, CLOSE_PATH = 1, 2, 7
+GEOMETRY_COLLECTION = 7  # identifiant shapely des collections
+
+
+def varint(value):
+    """
+    Encodage protobuf d'un entier positif.
+    """
+    data = bytearray()
+    while value > 0x7F:
+        data.append(value & 0x7F | 0x80)
+        value >>= 7
+    data.append(value)
+    return bytes(data)
+
+
+def varints(values):
+    """
+    Encodage protobuf d'un tableau d'entiers positifs.
+
+    Retourne les octets de tous les entiers à la suite et le nombre d'octets
+    de chaque entier.
+    """
+    import numpy as np
+
+    values = np.asarray(values, dtype=np.uint64)
+    nbytes = np.ones(len(values), dtype=np.int64)
+    for k in range(1, 10):
+        nbytes += values >= np.uint64(1 << 7 * k)
+    width = np.arange(nbytes.max(initial=1))
+    groups = (values[:, None] >> (width * 7).astype(np.uint64)) & np.uint64(0x7F)
+    groups |= (width < nbytes[:, None] - 1).astype(np.uint64) << np.uint64(7)
+    return groups[width < nbytes[:, None]].astype(np.uint8).tobytes(), nbytes
+
+
+def field(number, payload):
+    """
+    Champ protobuf de longueur variable (chaîne, message, entiers compactés).
+    """
+    return varint(number << 3 | 2) + varint(len(payload)) + payload
+
+
+def packed(values):
+    """
+    Entiers positifs compactés (packed) d'un champ protobuf.
+    """
+    return b"".join(varint(value) for value in values)
+
+
+def zigzag(values):
+    """
+    Encodage zigzag d'un tableau d'entiers signés.
+    """
+    return (values << 1) ^ (values >> 63)
+
+
+def command(command_id, count):
+    """
+    Entier(s) de commande MVT (MoveTo, LineTo, ClosePath) répétée count fois.
+    """
+    return command_id | count << 3
+
+
+def relative(coords, coord_owner):
+    """
+    Déplacements (zigzag) entre points successifs, le curseur repartant de
+    l'origine pour chaque géométrie.
+    """
+    import numpy as np
+
+    deltas = np.diff(coords, axis=0, prepend=np.zeros((1, 2), dtype=np.int64))
+    first = np.ones(len(coords), dtype=bool)
+    first[1:] = coord_owner[1:] != coord_owner[:-1]
+    deltas[first] = coords[first]
+    return zigzag(deltas)
+
+
+def point_commands(geometries):
+    """
+    Commandes MVT de points et multipoints : (entiers, géométrie de chaque entier).
+    """
+    import numpy as np
+    import shapely
+
+    coords, owner = shapely.get_coordinates(geometries, return_index=True)
+    coords = coords.astype(np.int64)
+    deltas = relative(coords, owner)
+
+    counts = np.bincount(owner, minlength=len(geometries))
+    owners = np.flatnonzero(counts)
+    counts = counts[owners]
+    sizes = 1 + 2 * counts
+    starts = np.cumsum(sizes) - sizes
+    values = np.empty(sizes.sum(), dtype=np.int64)
+    values[starts] = command(MOVE_TO, counts)
+    rank = np.arange(len(coords)) - np.repeat(np.cumsum(counts) - counts, counts)
+    positions = np.repeat(starts, counts) + 1 + 2 * rank
+    values[positions] = deltas[:, 0]
+    values[positions + 1] = deltas[:, 1]
+    return values, np.repeat(owners, sizes)
+
+
+def path_commands(coords, coord_path, path_owner, close):
+    """
+    Commandes MVT de lignes ou d'anneaux : (entiers, géométrie de chaque entier).
+
+    Paramètres :
+    - coords, coord_path : coordonnées entières et chemin de chaque point
+    - path_owner : géométrie de chaque chemin
+    - close : anneaux refermés par ClosePath (polygones)
+    """
+    import numpy as np
+
+    counts = np.bincount(coord_path, minlength=len(path_owner))
+    if close:
+        # Le dernier point, égal au premier, est remplacé par ClosePath
+        keep = np.ones(len(coords), dtype=bool)
+        keep[(np.cumsum(counts) - 1)[counts > 0]] = False
+        coords, coord_path = coords[keep], coord_path[keep]
+        counts = np.maximum(counts - 1, 0)
+    valid = counts >= (3 if close else 2)
+    keep = valid[coord_path]
+    coords = coords[keep]
+    counts, owners = counts[valid], path_owner[valid]
+    deltas = relative(coords, np.repeat(owners, counts))
+
+    sizes = 2 * counts + 2 + close
+    starts = np.cumsum(sizes) - sizes
+    values = np.empty(sizes.sum(), dtype=np.int64)
+    values[starts] = command(MOVE_TO, 1)
+    values[starts + 3] = command(LINE_TO, counts - 1)
+    if close:
+        values[starts + sizes - 1] = command(CLOSE_PATH, 1)
+    # Premier point après MoveTo, les suivants après LineTo
+    rank = np.arange(len(coords)) - np.repeat(np.cumsum(counts) - counts, counts)
+    positions = np.repeat(starts, counts) + np.where(rank == 0, 1, 2 + 2 * rank)
+    values[positions] = deltas[:, 0]
+    values[positions + 1] = deltas[:, 1]
+    return values, np.repeat(owners, sizes)
+
+
+def line_commands(geometries):
+    """
+    Commandes MVT de lignes et multilignes.
+    """
+    import numpy as np
+    import shapely
+
+    parts, part_owner = shapely.get_parts(geometries, return_index=True)
+    coords, coord_part = shapely.get_coordinates(parts, return_index=True)
+    return path_commands(coords.astype(np.int64), coord_part, part_owner, close=False)
+
+
+def polygon_commands(geometries):
+    """
+    Commandes MVT de polygones et multipolygones.
+    """
+    import numpy as np
+    import shapely
+
+    parts, part_owner = shapely.get_parts(geometries, return_index=True)
+    rings, ring_part = shapely.get_rings(parts, return_index=True)
+    coords, coord_ring = shapely.get_coordinates(rings, return_index=True)
+    return path_commands(
+        coords.astype(np.int64), coord_ring, part_owner[ring_part], close=True
+    )
+
+
+# Encodage de chaque type MVT : (type, identifiants shapely, commandes)
+ENCODERS = (
+    (POINT, (0, 4), point_commands),
+    (LINESTRING, (1, 5), line_commands),
+    (POLYGON, (3, 6), polygon_commands),
+)
+
+
+def encode_geometries(geometries):
+    """
+    Type et commandes MVT encodées (octets) de géométries en coordonnées de
+    tuile entières, None pour les géométries vides ou d'un type non géré.
+    """
+    import numpy as np
+    import shapely
+
+    encoded = [None] * len(geometries)
+    type_ids = shapely.get_type_id(geometries)
+    for kind, kind_ids, commands in ENCODERS:
+        selected = np.flatnonzero(np.isin(type_ids, kind_ids))
+        if not len(selected):
+            continue
+        values, owner = commands(geometries[selected])
+        data, nbytes = varints(values)
+        offsets = np.concatenate([[0], np.cumsum(nbytes)])
+        bounds = offsets[np.searchsorted(owner, np.arange(len(selected) + 1))]
+        for i, start, stop in zip(selected, bounds[:-1], bounds[1:]):
+            if stop > start:
+                encoded[i] = (kind, data[start:stop])
+    return encoded
+
+
+def encode_value(value):
+    """
+    Message Value d'une propriété (texte, entier, réel ou booléen).
+    """
+    if isinstance(value, bool):
+        return varint(7 << 3) + varint(int(value))
+    if isinstance(value, int):
+        return varint(6 << 3) + varint(value << 1 ^ value >> 63)
+    if isinstance(value, float):
+        return varint(3 << 3 | 1) + struct.pack("<d", value)
+    return field(1, str(value).encode("utf-8"))
+
+
+def encode_layer(name, features):
+    """
+    Message Layer d'une couche de tuile.
+
+    features : liste de tuples (identifiant, type, commandes encodées,
+    propriétés de layer_properties).
+    """
+    keys, values = {}, {}
+    encoded = []
+    for feature_id, kind, commands, properties in features:
+        tags = []
+        for key, value in properties:
+            tags.append(keys.setdefault(key, len(keys)))
+            tags.append(values.setdefault(value, len(values)))
+        tags = bytes(tags) if len(keys) < 128 > len(values) else packed(tags)
+        feature = (
+            b"\x08"  # identifiant (champ 1)
+            + varint(feature_id)
+            + field(2, tags)
+            + bytes((3 << 3, kind))  # type (champ 3)
+            + field(4, commands)
+        )
+        encoded.append(field(2, feature))
+    return field(
+        3,
+        varint(15 << 3)
+        + varint(2)
+        + field(1, name.encode("utf-8"))
+        + b"".join(encoded)
+        + b"".join(field(3, key.encode("utf-8")) for key in keys)
+        + b"".join(field(4, encode_value(value)) for _, value in values)
+        + varint(5 << 3)
+        + varint(EXTENT),
+    )
+
+
+def tile_size(zoom):
+    """
+    Largeur (m, Web Mercator) d'une tuile au niveau de zoom zoom.
+    """
+    return 2 * HALF_WORLD / 2**zoom
+
+
+def cut_tiles(geometries, zoom):
+    """
+    Découpe des géométries (Web Mercator) en tuiles au niveau de zoom zoom.
+
+    Retourne les tableaux (indices des géométries, colonnes x, lignes y,
+    géométries découpées en coordonnées de tuile entières), une entrée par
+    couple (géométrie, tuile) non vide.
+    """
+    import numpy as np
+    import shapely
+
+    # Regroupement des parties d'une collection selon leur dimension
+    multipart = {
+        0: shapely.multipoints,
+        1: shapely.multilinestrings,
+        2: shapely.multipolygons,
+    }
+
+    size = tile_size(zoom)
+    pixel = size / EXTENT
+    last = 2**zoom - 1
+
+    geometries = shapely.simplify(geometries, pixel, preserve_topology=True)
+    bounds = shapely.bounds(geometries)
+    width = bounds[:, 2] - bounds[:, 0]
+    height = bounds[:, 3] - bounds[:, 1]
+    polygonal = shapely.get_dimensions(geometries) == 2
+    keep = ~shapely.is_empty(geometries) & ~(
+        polygonal & (width < pixel) & (height < pixel)
+    )
+    index = np.flatnonzero(keep)
+    bounds = bounds[index]
+
+    # Tuiles couvertes par l'emprise de chaque géométrie
+    x0 = np.clip(np.floor((bounds[:, 0] + HALF_WORLD) / size), 0, last)
+    x1 = np.clip(np.floor((bounds[:, 2] + HALF_WORLD) / size), 0, last)
+    y0 = np.clip(np.floor((HALF_WORLD - bounds[:, 3]) / size), 0, last)
+    y1 = np.clip(np.floor((HALF_WORLD - bounds[:, 1]) / size), 0, last)
+    nx = (x1 - x0 + 1).astype(np.int64)
+    counts = nx * (y1 - y0 + 1).astype(np.int64)
+    rank = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    pair = np.repeat(np.arange(len(index)), counts)
+    x = (x0[pair] + rank % nx[pair]).astype(np.int64)
+    y = (y0[pair] + rank // nx[pair]).astype(np.int64)
+    index = index[pair]
+
+    # Découpage par les tuiles élargies de la marge
+    minx = x * size - HALF_WORLD
+    maxy = HALF_WORLD - y * size
+    margin = BUFFER * pixel
+    boxes = np.stack(
+        [minx - margin, maxy - size - margin, minx + size + margin, maxy + margin],
+        axis=1,
+    )
+    clipped = geometries[index]
+    # Seules les géométries qui dépassent de leur tuile élargie sont découpées
+    inside = np.all(
+        (bounds[pair, :2] >= boxes[:, :2]) & (bounds[pair, 2:] <= boxes[:, 2:]), axis=1
+    )
+    cut = np.flatnonzero(~inside)
+    clipped[cut] = shapely.intersection(clipped[cut], shapely.box(*boxes[cut].T))
+    dimensions = shapely.get_dimensions(geometries[index])
+
+    # Coordonnées de tuile : origine en haut à gauche, y vers le bas
+    coords, owner = shapely.get_coordinates(clipped, return_index=True)
+    coords[:, 0] = (coords[:, 0] - minx[owner]) / pixel
+    coords[:, 1] = (maxy[owner] - coords[:, 1]) / pixel
+    clipped = shapely.set_coordinates(clipped.copy(), coords)
+    # Arrondi au pixel, puis correction des seules géométries rendues invalides
+    clipped = shapely.set_precision(clipped, 1.0, mode="pointwise")
+    invalid = np.flatnonzero(~shapely.is_valid(clipped))
+    clipped[invalid] = shapely.make_valid(clipped[invalid])
+    # Anneaux extérieurs d'aire positive dans le repère de la tuile (MVT)
+    clipped = shapely.orient_polygons(clipped, exterior_cw=False)
+
+    # Seules les parties de même dimension que la géométrie d'origine sont
+    # gardées (un polygone découpé peut toucher le bord par une ligne, un
+    # polygone arrondi au pixel peut se réduire à une ligne)
+    mixed = (shapely.get_type_id(clipped) == GEOMETRY_COLLECTION) | (
+        shapely.get_dimensions(clipped) != dimensions
+    )
+    for i in np.flatnonzero(mixed):
+        parts = shapely.get_parts(shapely.get_parts(clipped[i]))
+        clipped[i] = multipart[dimensions[i]](
+            parts[shapely.get_dimensions(parts) == dimensions[i]]
+        )
+
+    valid = ~shapely.is_empty(clipped)
+    return index[valid], x[valid], y[valid], clipped[valid]
+
+
+def layer_properties(df, fields):
+    """
+    Propriétés de chaque ligne d'une couche, limitées à fields : tuples de
+    paires (champ, (type, valeur)), sans les valeurs manquantes. Le type fait
+    partie de la valeur pour que 1, 1.0 et True restent distincts dans les
+    tuiles.
+    """
+    import numpy as np
+
+    columns = [column for column in fields if column in df]
+    values = [
+        np.asarray(
+            df[column].astype(object).where(df[column].notna(), None), dtype=object
+        )
+        for column in columns
+    ]
+    return [
+        tuple(
+            (column, (type(value), value))
+            for column, value in zip(columns, row)
+            if value is not None
+        )
+        for row in zip(*values)
+    ] or [()] * len(df)
+
+
+def lonlat_bounds(bounds):
+    """
+    Emprise (lon/lat) d'une emprise en Web Mercator.
+    """
+    minx, miny, maxx, maxy = bounds
+
+    def lat(y):
+        return math.degrees(math.atan(math.sinh(y / HALF_WORLD * math.pi)))
+
+    return [minx / HALF_WORLD * 180, lat(miny), maxx / HALF_WORLD * 180, lat(maxy)]
+
+
+def write_mbtiles(
+    layers, mbtiles_file, min_zoom=MIN_ZOOM, max_zoom=MAX_ZOOM, name="telepac"
+):
+    """
+    Écrit les couches géographiques dans une archive MBTiles de tuiles
+    vectorielles, de min_zoom à max_zoom (une archive existante est remplacée).
+
+    Paramètres :
+    - layers : {nom de la couche: GeoDataFrame}, dans n'importe quel système
+      de coordonnées
+    - mbtiles_file : fichier MBTiles en sortie
+
+    Retourne le nombre de tuiles écrites.
+    """
+    import numpy as np
+
+    layers = reproject_layers(
+        {layer: gdf for layer, gdf in layers.items() if not gdf.empty}, WEB_MERCATOR
+    )
+    fields = {
+        layer: [
+            column
+            for column in TILE_FIELDS.get(layer, ()) + PARTITION_COLUMNS
+            if column in gdf
+        ]
+        for layer, gdf in layers.items()
+    }
+    properties = {
+        layer: layer_properties(gdf, fields[layer]) for layer, gdf in layers.items()
+    }
+
+    connection = sqlite3.connect(mbtiles_file)
+    connection.executescript("""
+        DROP TABLE IF EXISTS metadata;
+        DROP TABLE IF EXISTS tiles;
+        CREATE TABLE metadata (name TEXT, value TEXT);
+        CREATE TABLE tiles (zoom_level INTEGER, tile_column INTEGER,
+                            tile_row INTEGER, tile_data BLOB);
+        """)
+
+    nb_tiles = 0
+    for zoom in range(min_zoom, max_zoom + 1):
+        # {(x, y): {couche: [entités]}}
+        tiles = {}
+        for layer, gdf in layers.items():
+            index, xs, ys, clipped = cut_tiles(np.asarray(gdf.geometry.array), zoom)
+            for i, x, y, encoded in zip(index, xs, ys, encode_geometries(clipped)):
+                if encoded is not None:
+                    tiles.setdefault((x, y), {}).setdefault(layer, []).append(
+                        (int(i) + 1, *encoded, properties[layer][i])
+                    )
+        connection.executemany(
+            "INSERT INTO tiles VALUES (?, ?, ?, ?)",
+            (
+                (
+                    zoom,
+                    int(x),
+                    2**zoom - 1 - int(y),  # lignes numérotées du sud au nord
+                    gzip.compress(
+                        b"".join(
+                            encode_layer(layer, features)
+                            for layer, features in tile_layers.items()
+                        )
+                    ),
+                )
+                for (x, y), tile_layers in tiles.items()
+            ),
+        )
+        nb_tiles += len(tiles)
+
+    total = np.array([gdf.total_bounds for gdf in layers.values()])
+    bounds = (
+        lonlat_bounds(
+            (total[:, 0].min(), total[:, 1].min(), total[:, 2].max(), total[:, 3].max())
+        )
+        if len(total)
+        else [-180, -85, 180, 85]
+    )
+    metadata = {
+        "name": name,
+        "format": "pbf",
+        "type": "overlay",
+        "minzoom": min_zoom,
+        "maxzoom": max_zoom,
+        "bounds": ",".join(f"{value:.6f}" for value in bounds),
+        "center": f"{(bounds[0] + bounds[2]) / 2:.6f},"
+        f"{(bounds[1] + bounds[3]) / 2:.6f},{min_zoom}",
+        "json": json.dumps(
+            {
+                "vector_layers": [
+                    {
+                        "id": layer,
+                        "fields": {column: "String" for column in fields[layer]},
+                        "minzoom": min_zoom,
+                        "maxzoom": max_zoom,
+                    }
+                    for layer in layers
+                ]
+            }
+        ),
+    }
+    connection.executemany(
+        "INSERT INTO metadata VALUES (?, ?)",
+        [(key, str(value)) for key, value in metadata.items()],
+    )
+    connection.execute(
+        "CREATE UNIQUE INDEX tile_index ON tiles (zoom_level, tile_column, tile_row)"
+    )
+    connection.commit()
+    connection.close()
+    return nb_tiles
+
+
+def export_mbtiles(
+    parquet_dir,
+    mbtiles_file,
+    layers=tuple(TILE_FIELDS),
+    campagne=None,
+    min_zoom=MIN_ZOOM,
+    max_zoom=MAX_ZOOM,
+):
+    """
+    Export en MBTiles des couches géographiques des jeux de données GeoParquet
+    de parquet_dir (toutes les exploitations, ou une seule campagne).
+
+    Retourne le nombre de tuiles écrites.
+    """
+    gdfs = {
+        layer: read_layer_parquet(parquet_dir, layer, campagne=campagne)
+        for layer in layers
+        if os.path.isdir(os.path.join(parquet_dir, layer))
+    }
+    return write_mbtiles(gdfs, mbtiles_file, min_zoom=min_zoom, max_zoom=max_zoom)
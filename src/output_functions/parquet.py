@@ -0,0 +1,141 @@
+"""
+Module d'écriture des couches extraites dans des jeux de données (Geo)Parquet.
+
+Chaque couche est ajoutée à un jeu de données partitionné (partitionnement
+hive) par campagne et numéro pacage :
+
+    parquet_dir/<couche>/campagne=<campagne>/numero-pacage=<pacage>/part-0.parquet
+
+Les fichiers sont compressés (zstd) et découpés en groupes de lignes dont les
+statistiques permettent de filtrer les lectures (predicate pushdown).
+"""
+
+import os
+
+PARQUET_COMPRESSION = "zstd"
+ROW_GROUP_SIZE = 50_000
+CAMPAGNE_INCONNUE = "inconnue"
+PARTITION_COLUMNS = ("campagne", "numero-pacage")
+
+# Couches tabulaires portant le numéro pacage et la campagne des partitions
+PARTITION_LAYERS = ("demandeur", "aides_pac")
+
+
+def detect_numero_pacage(layers):
+    """
+    Numéro pacage du producteur à partir de la couche demandeur
+    """
+    df_demandeur = layers.get("demandeur")
+    if df_demandeur is not None and "numero-pacage" in df_demandeur:
+        numero_pacage = df_demandeur["numero-pacage"].dropna()
+        if not numero_pacage.empty:
+            return str(numero_pacage.iloc[0])
+    return None
+
+
+def detect_campagne(layers):
+    """
+    Campagne de la déclaration, si elle figure dans une couche tabulaire
+    """
+    for name in PARTITION_LAYERS:
+        df = layers.get(name)
+        if df is not None and "campagne" in df:
+            campagne = df["campagne"].dropna()
+            if not campagne.empty:
+                return str(campagne.iloc[0])
+    return None
+
+
+def partition_path(parquet_dir, layer, campagne, numero_pacage):
+    """
+    Chemin du fichier d'une couche pour une campagne et un numéro pacage
+    """
+    return os.path.join(
+        parquet_dir,
+        layer,
+        f"campagne={campagne}",
+        f"numero-pacage={numero_pacage}",
+        "part-0.parquet",
+    )
+
+
+def write_layers_parquet(layers, parquet_dir, numero_pacage=None, campagne=None):
+    """
+    Ajoute les couches non vides aux jeux de données Parquet de parquet_dir.
+
+    Les GeoDataFrame sont écrits au format GeoParquet. Les colonnes campagne et
+    numero-pacage sont portées par la partition et retirées des données. Un
+    nouveau traitement du même fichier remplace sa partition au lieu de la
+    dupliquer. Les colonnes catégorielles sont écrites en texte, pour que les
+    schémas des partitions restent compatibles (Parquet encode de toute façon
+    les valeurs répétées par dictionnaire).
+
+    Retourne la liste des fichiers écrits.
+    """
+    numero_pacage = numero_pacage or detect_numero_pacage(layers)
+    campagne = campagne or detect_campagne(layers) or CAMPAGNE_INCONNUE
+    if numero_pacage is None:
+        raise ValueError("Numéro pacage introuvable : partition Parquet impossible")
+
+    written = []
+    for layer, df in layers.items():
+        if df.empty:
+            continue
+        path = partition_path(parquet_dir, layer, campagne, numero_pacage)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        df = df.drop(columns=list(PARTITION_COLUMNS), errors="ignore")
+        categorical = df.select_dtypes("category").columns
+        if len(categorical):
+            df = df.astype({column: object for column in categorical})
+        df.to_parquet(
+            path,
+            index=False,
+            compression=PARQUET_COMPRESSION,
+            row_group_size=ROW_GROUP_SIZE,
+        )
+        written.append(path)
+    return written
+
+
+def read_layer_parquet(parquet_dir, layer, campagne=None, numero_pacage=None):
+    """
+    Lecture d'une couche du jeu de données, filtrée sur les partitions demandées.
+
+    Les schémas des fichiers (colonnes propres à chaque exploitation) sont
+    unifiés. Retourne un GeoDataFrame pour les couches géographiques, sinon
+    un DataFrame.
+    """
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    partitioning = ds.partitioning(
+        pa.schema([(column, pa.string()) for column in PARTITION_COLUMNS]),
+        flavor="hive",
+    )
+    path = os.path.join(parquet_dir, layer)
+    dataset = ds.dataset(path, format="parquet", partitioning=partitioning)
+
+    expression = None
+    for field, value in zip(PARTITION_COLUMNS, (campagne, numero_pacage)):
+        if value is not None:
+            condition = ds.field(field) == str(value)
+            expression = condition if expression is None else expression & condition
+
+    fragments = list(dataset.get_fragments(filter=expression))
+    schema = pa.unify_schemas(
+        [fragment.physical_schema for fragment in fragments] + [partitioning.schema],
+        promote_options="permissive",
+    )
+    table = ds.dataset(
+        [fragment.path for fragment in fragments],
+        schema=schema,
+        format="parquet",
+        partitioning=partitioning,
+        partition_base_dir=path,
+    ).to_table()
+
+    if b"geo" in (table.schema.metadata or {}):
+        import geopandas as gpd
+
+        return gpd.GeoDataFrame.from_arrow(table)
+    return table.to_pandas()
@@ -2,28 +2,87 @@
 Tentative de lecture d'un fichier xml TELEPAC pour en extraire les informations.
 
 Usage:
-    python read_xml.py input_xml [--visu_folium] [--excel_filename FILE] [--output_dir OUTPUT_DIR]
+    python read_xml.py input_xml [--visu_folium] [--excel_filename FILE] [--excel_geometry {wkt,drop}]
+                       [--output_dir OUTPUT_DIR]
+                       [--streaming] [--parquet_dir PARQUET_DIR] [--campagne CAMPAGNE]
+                       [--layers LAYER [LAYER ...]] [--keep_lambert93]
+                       [--cache_dir CACHE_DIR] [--cache_max_mb CACHE_MAX_MB]
+                       [--backend {etree,lxml}] [--pipeline] [--threads THREADS]
+                       [--folium_light] [--folium_zoom ZOOM] [--folium_precision PRECISION]
+                       [--folium_assets_url URL]
+                       [--metrics_file METRICS_FILE] [--metrics_memory] [--profile PROFILE]
+                       [--check_geometries] [--mmap] [--workers WORKERS]
 """
 
 import argparse
-import xml.etree.ElementTree as ET
+import functools
 import os
-import pandas as pd
-import folium
-from folium.plugins import FloatImage, MiniMap
-from branca.element import Template, MacroElement
 
 
-# Importer les fonctions d'extraction nécessaires
-from extract_functions.extract_aides_pac import extract_aides_pac
-from extract_functions.extract_animaux import extract_animaux
-from extract_functions.extract_bio import extract_bio
-from extract_functions.extract_demandeur import extract_demandeur
-from extract_functions.extract_ilots import extract_ilots
-from extract_functions.extract_maec import extract_maec
-from extract_functions.extract_parcelles import extract_parcelles
-from extract_functions.extract_sna import extract_sna
-from extract_functions.extract_zdh import extract_zdh
+# Importer les fonctions d'extraction nécessaires : les modules
+# géographiques (geopandas, shapely, GDAL) sont chargés à la demande
+from extract_functions.backends import BACKENDS, ETREE, parse
+from extract_functions.cache import CACHE_MAX_MB, extract_layers_cached
+from extract_functions.metrics import Metrics, count_layers, measure, measured, profiled
+from extract_functions.parallel import extract_layers_parallel
+from extract_functions.pipeline import (
+    LayerFutures,
+    checked_layers,
+    extract_layers_pipeline,
+    pending_layers,
+)
+from extract_functions.registry import LAYERS, check_layers, extract_selected_layers
+from extract_functions.reprojection import LAMBERT93, WGS84, reproject_layers
+from extract_functions.streaming import extract_layers_streaming
+from extract_functions.topology import REPORT_LAYER, check_layer_geometries
+from output_functions.excel import GEOMETRY_OPTIONS, write_excel
+from output_functions.geojson import (
+    PRECISION,
+    SIMPLIFY_ZOOM,
+    round_coordinates,
+    simplify_layer,
+)
+from output_functions.parquet import PARTITION_LAYERS, write_layers_parquet
+
+# Définition des namespace
+NAMESPACE = "{urn:x-telepac:fr.gouv.agriculture.telepac:echange-producteur}"
+NAMESPACE_GML = "{http://www.opengis.net/gml}"
+
+
+# Couches affichées dans la visu Folium : {couche: style de la couche}
+FOLIUM_LAYERS = {
+    "ilots": {
+        "name": "Ilots",
+        "color": "blue",
+        "info": "numero-ilot-reference",
+        "show": True,
+    },
+    "parcelles": {
+        "name": "Parcelles",
+        "color": "green",
+        "info": "numero-ilot-reference, code-culture",
+    },
+    "bio": {
+        "name": "Parcelles Bio",
+        "color": "black",
+        "info": "code-mesure",
+    },
+    "maec": {
+        "name": "MAEC",
+        "color": "blue",
+        "info": "code-mesure",
+    },
+    "sna": {
+        "name": "SNA (Surface Non Agricole)",
+        "color": "green",
+        "info": "categorieSna, typeSna, surfaceGraphique",
+    },
+    "zdh": {
+        "name": "ZDH (Zone de Densité Homogène)",
+        "color": "black",
+        "info": "numero-zdh-declaree",
+    },
+}
 
 
 def usage() -> argparse.Namespace:
@@ -55,6 +114,14 @@ def usage() -> argparse.Namespace:
         required=False,
         help="Nom du fichier excel contenant l'extraction du xml. Extension xlsx obligatoire",
     )
+    required_args.add_argument(
+        "--excel_geometry",
+        type=str,
+        choices=GEOMETRY_OPTIONS,
+        default="wkt",
+        required=False,
+        help="Géométries écrites en WKT dans le fichier excel, ou ignorées (drop)",
+    )
     required_args.add_argument(
         "--output_dir",
         type=str,
@@ -63,7 +130,176 @@ def usage() -> argparse.Namespace:
         required=False,
         help="Nom du répertoire de sortie permettant de stocker les visus et fichier excel",
     )
-    return parser.parse_args()
+    required_args.add_argument(
+        "--streaming",
+        action="store_true",
+        default=False,
+        help="Lecture du xml en flux (iterparse) pour limiter la mémoire "
+        "utilisée sur les fichiers volumineux.",
+    )
+    required_args.add_argument(
+        "--mmap",
+        action="store_true",
+        default=False,
+        help="Lecture du xml projeté en mémoire (mmap) : seuls les ilots, SNA "
+        "et ZDH des couches demandées sont analysés, par plages d'octets.",
+    )
+    required_args.add_argument(
+        "--workers",
+        type=int,
+        action="store",
+        default=None,
+        required=False,
+        help="Extraction parallèle d'un xml volumineux : ses ilots, SNA et ZDH "
+        "sont répartis par plages sur WORKERS processus (incompatible avec "
+        "--pipeline)",
+    )
+    required_args.add_argument(
+        "--parquet_dir",
+        type=str,
+        action="store",
+        default=None,
+        required=False,
+        help="Répertoire des jeux de données GeoParquet (partitionnés par campagne "
+        "et numéro pacage) auxquels ajouter les couches extraites",
+    )
+    required_args.add_argument(
+        "--campagne",
+        type=str,
+        action="store",
+        default=None,
+        required=False,
+        help="Campagne utilisée pour partitionner les sorties Parquet",
+    )
+    required_args.add_argument(
+        "--layers",
+        type=str,
+        nargs="+",
+        choices=LAYERS,
+        default=None,
+        required=False,
+        help="Couches à extraire (toutes par défaut)",
+    )
+    required_args.add_argument(
+        "--keep_lambert93",
+        action="store_true",
+        default=False,
+        help="Géométries conservées en Lambert-93 (EPSG:2154) dans les sorties "
+        "excel et Parquet, au lieu de WGS84 (EPSG:4326)",
+    )
+    required_args.add_argument(
+        "--cache_dir",
+        type=str,
+        action="store",
+        default=None,
+        required=False,
+        help="Répertoire du cache des couches extraites : un fichier xml inchangé "
+        "n'est pas relu tant que le code des extracteurs ne change pas",
+    )
+    required_args.add_argument(
+        "--cache_max_mb",
+        type=float,
+        action="store",
+        default=CACHE_MAX_MB,
+        required=False,
+        help="Taille maximale du cache (Mo), les couches les moins récemment "
+        "utilisées sont supprimées au-delà",
+    )
+    required_args.add_argument(
+        "--backend",
+        type=str,
+        choices=BACKENDS,
+        default=ETREE,
+        required=False,
+        help="Moteur de lecture XML : xml.etree de la bibliothèque standard "
+        "(etree, par défaut) ou lxml",
+    )
+    required_args.add_argument(
+        "--pipeline",
+        action="store_true",
+        default=False,
+        help="Extraction en pipeline : décodage des géométries par lots pendant "
+        "la lecture et écriture des sorties dès que les couches sont prêtes",
+    )
+    required_args.add_argument(
+        "--threads",
+        type=int,
+        action="store",
+        default=None,
+        required=False,
+        help="Nombre de threads du décodage des géométries en pipeline "
+        "(par défaut selon le nombre de processeurs)",
+    )
+    required_args.add_argument(
+        "--folium_light",
+        action="store_true",
+        default=False,
+        help="Visu Folium allégée : géométries simplifiées, coordonnées arrondies "
+        "et seuls les champs des infobulles conservés",
+    )
+    required_args.add_argument(
+        "--folium_zoom",
+        type=int,
+        action="store",
+        default=SIMPLIFY_ZOOM,
+        required=False,
+        help="Niveau de zoom jusqu'auquel les géométries simplifiées de la visu "
+        "allégée restent exactes au pixel",
+    )
+    required_args.add_argument(
+        "--folium_precision",
+        type=int,
+        action="store",
+        default=PRECISION,
+        required=False,
+        help="Nombre de décimales des coordonnées de la visu allégée",
+    )
+    required_args.add_argument(
+        "--folium_assets_url",
+        type=str,
+        action="store",
+        default=None,
+        required=False,
+        help="URL (ou chemin relatif) d'un répertoire partagé contenant les "
+        "fichiers JS/CSS de Leaflet, utilisé à la place des CDN",
+    )
+    required_args.add_argument(
+        "--metrics_file",
+        type=str,
+        action=check_extension({"json"}),
+        default=None,
+        required=False,
+        help="Rapport JSON des mesures de chaque étape (durée, entités, sommets "
+        "décodés, mémoire). Extension json obligatoire",
+    )
+    required_args.add_argument(
+        "--metrics_memory",
+        action="store_true",
+        default=False,
+        help="Mesure du pic de mémoire de chaque étape dans le rapport "
+        "(tracemalloc, ralentit le traitement)",
+    )
+    required_args.add_argument(
+        "--profile",
+        type=str,
+        action="store",
+        default=None,
+        required=False,
+        help="Profil d'exécution du traitement : statistiques cProfile, ou "
+        "rapport pyinstrument si l'extension est html",
+    )
+    required_args.add_argument(
+        "--check_geometries",
+        action="store_true",
+        default=False,
+        help="Réparation des géométries invalides et contrôle des chevauchements "
+        "et débords des parcelles (table controle_geometries)",
+    )
+    args = parser.parse_args()
+    if args.pipeline and args.workers is not None:
+        # Le pipeline décode les géométries dans son pool de threads (--threads)
+        parser.error("--workers est incompatible avec --pipeline (voir --threads)")
+    return args
 
 
 def check_extension(choices):
@@ -83,7 +319,45 @@ def check_extension(choices):
     return Act
 
 
-def visu_folium_layers(layers, title_folium="Exploitation", html_output="output.html"):
+def tooltip_fields(layer):
+    """
+    Champs affichés dans l'infobulle d'une couche de la visu Folium.
+    """
+    return [
+        field.strip() for field in layer.get("info", "").split(",") if field.strip()
+    ]
+
+
+def share_assets(element, assets_url):
+    """
+    Remplace les liens CDN des fichiers JS/CSS d'un élément Folium et de ses
+    enfants par des liens vers le répertoire partagé assets_url, où chaque
+    fichier garde le nom qu'il a sur le CDN.
+    """
+    for attribute in ("default_js", "default_css"):
+        assets = getattr(element, attribute, None)
+        if assets:
+            setattr(
+                element,
+                attribute,
+                [
+                    (name, f"{assets_url.rstrip('/')}/{url.rsplit('/', 1)[-1]}")
+                    for name, url in assets
+                ],
+            )
+    for child in element._children.values():
+        share_assets(child, assets_url)
+
+
+def visu_folium_layers(
+    layers,
+    title_folium="Exploitation",
+    html_output="output.html",
+    light=False,
+    zoom=SIMPLIFY_ZOOM,
+    precision=PRECISION,
+    assets_url=None,
+):
     """
     Visualisation dynamique avec Folium à partir d'une liste de couches.
 
@@ -96,8 +370,28 @@ def visu_folium_layers(layers, title_folium="Exploitation", html_output="output.
             "color": Couleur principale (contour et remplissage),
         }
     - html_output : nom du fichier HTML de sortie.
+    - light : visu allégée, avec les géométries simplifiées à la tolérance d'un
+      pixel au niveau de zoom zoom, les coordonnées arrondies à precision
+      décimales et seuls les champs des infobulles conservés
+    - assets_url : répertoire partagé des fichiers JS/CSS (CDN par défaut)
+
+    Les couches qui ne sont pas en WGS84 sont reprojetées ensemble, en une
+    seule transformation.
     """
 
+    gdfs = {i: layer["gdf"] for i, layer in enumerate(layers)}
+    if light:
+        # Simplification en Lambert-93, la tolérance étant en mètres
+        gdfs = reproject_layers(gdfs, LAMBERT93)
+        gdfs = {
+            i: simplify_layer(gdf, tooltip_fields(layers[i]), zoom)
+            for i, gdf in gdfs.items()
+        }
+    gdfs = reproject_layers(gdfs, WGS84)
+    if light:
+        gdfs = {i: round_coordinates(gdf, precision) for i, gdf in gdfs.items()}
+    layers = [dict(layer, gdf=gdfs[i]) for i, layer in enumerate(layers)]
+
     # Trouver un gdf non vide pour centrer la carte (base_gdf)
     for layer in layers:
         if not layer["gdf"].empty:
@@ -107,8 +401,12 @@ def visu_folium_layers(layers, title_folium="Exploitation", html_output="output.
         print("Aucune couche valide pour centrer la carte.")
         return
 
+    import folium
+    from folium.plugins import FloatImage, MiniMap
+    from branca.element import Template, MacroElement
+
     # Centrage
-    center = base_gdf.to_crs(epsg=4326).geometry.union_all().centroid
+    center = base_gdf.geometry.union_all().centroid
     map_center = [center.y, center.x]
 
     # Création de la carte
@@ -120,16 +418,12 @@ def visu_folium_layers(layers, title_folium="Exploitation", html_output="output.
         gdf = layer["gdf"]
         if gdf.empty:
             continue
-        gdf = gdf.to_crs(epsg=4326)
         color_layer = layer.get("color", "blue")
         show_layer = layer.get("show", False)
-        info_layer = layer.get("info", "")
-        tooltip_fields = [
-            field.strip() for field in info_layer.split(",") if field.strip()
-        ]
+        fields = tooltip_fields(layer)
 
         folium.GeoJson(
-            data=gdf.to_json(),
+            data=gdf.to_json(drop_id=light),
             name=layer["name"],
             show=show_layer,
             style_function=lambda x, col=color_layer: {
@@ -145,8 +439,8 @@ def visu_folium_layers(layers, title_folium="Exploitation", html_output="output.
                 "fillOpacity": 0.7,
             },
             tooltip=folium.GeoJsonTooltip(
-                fields=tooltip_fields,
-                aliases=tooltip_fields,
+                fields=fields,
+                aliases=fields,
             ),
         ).add_to(m)
 
@@ -180,135 +474,327 @@ def visu_folium_layers(layers, title_folium="Exploitation", html_output="output.
     # Ajout de la minimap
     MiniMap().add_to(m)
 
+    if assets_url is not None:
+        share_assets(f, assets_url)
+
     m.save(html_output)
 
 
-def ajouter_onglet(data, excel_file, onglet):
+def visu_folium_extracted(extracted, html_output, **options):
     """
-    Ajout d'un nouvel onglet à la feuille Excel
-    uniquement si le tableau n'est pas vide
+    Visualisation Folium des couches extraites, titrée avec le nom de
+    l'exploitation du demandeur. Les options sont celles de
+    visu_folium_layers (light, zoom, precision, assets_url).
     """
-    if not data.empty:
-        data.to_excel(excel_file, sheet_name=onglet, index=False)
+    layers_folium = [
+        dict(style, gdf=extracted[name])
+        for name, style in FOLIUM_LAYERS.items()
+        if name in extracted
+    ]
+    df_demandeur = extracted.get("demandeur")
+    visu_folium_layers(
+        layers=layers_folium,
+        title_folium=(
+            df_demandeur["exploitation"].values[0]
+            if df_demandeur is not None and not df_demandeur.empty
+            else "Exploitation"
+        ),
+        html_output=html_output,
+        **options,
+    )
 
 
-if __name__ == "__main__":
+def extract_layers(
+    xml_file,
+    layers=None,
+    streaming=False,
+    crs=WGS84,
+    cache_dir=None,
+    cache_max_mb=CACHE_MAX_MB,
+    backend=ETREE,
+    metrics=None,
+    mapped=False,
+    workers=None,
+):
+    """
+    Extrait les couches demandées (toutes par défaut) d'un fichier XML telepac,
+    avec les géométries dans crs (WGS84 par défaut), lu avec le moteur XML
+    backend (etree ou lxml).
 
-    # Import des paramètres
-    args = usage()
-    XML_FILE = args.input_xml
-    OUTPUT_DIR = args.output_dir
-    if not os.path.exists(OUTPUT_DIR):
-        os.makedirs(OUTPUT_DIR)
-    EXCEL_FILENAME = f"{args.output_dir}/{args.excel_filename}"
-    CREATE_VISU_HTML = args.visu_folium
+    Si mapped est vrai, le fichier est projeté en mémoire et seules les
+    plages d'octets des enregistrements des couches demandées sont analysées.
+    Si workers est renseigné, ces plages sont réparties sur un pool de
+    workers processus (voir parallel.extract_layers_parallel).
 
-    # Définition des namespace
-    NAMESPACE = "{urn:x-telepac:fr.gouv.agriculture.telepac:echange-producteur}"
-    NAMESPACE_GML = "{http://www.opengis.net/gml}"
+    Si cache_dir est renseigné, les couches déjà extraites du même fichier
+    sont lues dans le cache et seules les couches manquantes sont extraites.
 
-    # Traitements des ilots
-    xml = ET.parse(XML_FILE).getroot()
-    gdf_ilots = extract_ilots(xml, NAMESPACE, NAMESPACE_GML)
+    Les étapes de l'extraction sont mesurées dans metrics (Metrics), s'il est
+    fourni.
 
-    # Traitements des parcelles
-    gdf_parcelles = extract_parcelles(xml, NAMESPACE, NAMESPACE_GML)
+    Retourne un dictionnaire {nom de la couche: DataFrame ou GeoDataFrame}.
+    """
+    if cache_dir is not None:
+        # Les couches manquantes sont extraites (et mesurées) pendant la
+        # lecture du cache
+        with measure(metrics, "cache") as record:
+            extracted = extract_layers_cached(
+                xml_file,
+                check_layers(layers),
+                lambda missing: extract_layers(
+                    xml_file,
+                    layers=missing,
+                    streaming=streaming,
+                    crs=crs,
+                    backend=backend,
+                    metrics=metrics,
+                    mapped=mapped,
+                    workers=workers,
+                ),
+                cache_dir,
+                crs=crs,
+                max_mb=cache_max_mb,
+            )
+            count_layers(record, extracted)
+        return extracted
+
+    if workers is not None:
+        # Plages d'enregistrements réparties sur un pool de processus
+        with measure(metrics, "extract_parallel") as record:
+            extracted = extract_layers_parallel(
+                xml_file,
+                NAMESPACE,
+                NAMESPACE_GML,
+                layers,
+                crs=crs,
+                backend=backend,
+                workers=workers,
+            )
+            count_layers(record, extracted)
+        return extracted
+
+    if streaming or mapped:
+        # Traitements des couches en un seul parcours du fichier
+        stage = "extract_mapped" if mapped else "extract_streaming"
+        with measure(metrics, stage) as record:
+            extracted = extract_layers_streaming(
+                xml_file,
+                NAMESPACE,
+                NAMESPACE_GML,
+                layers,
+                crs=crs,
+                backend=backend,
+                mapped=mapped,
+            )
+            count_layers(record, extracted)
+        return extracted
 
-    # Traitements des éléments bio
-    gdf_bio = extract_bio(xml, NAMESPACE, NAMESPACE_GML)
+    with measure(metrics, "parse"):
+        xml = parse(xml_file, backend=backend)
+    return extract_selected_layers(
+        xml, NAMESPACE, NAMESPACE_GML, layers, crs=crs, metrics=metrics
+    )
 
-    # Traitements des maec - elements surfaciques
-    gdf_maec = extract_maec(xml, NAMESPACE, NAMESPACE_GML)
 
-    # Traitements des sna-declaree
-    gdf_sna = extract_sna(xml, NAMESPACE, NAMESPACE_GML)
+def process_xml(
+    xml_file,
+    output_dir,
+    excel_filename="output.xlsx",
+    excel_geometry="wkt",
+    visu_folium=False,
+    streaming=False,
+    parquet_dir=None,
+    campagne=None,
+    layers=None,
+    keep_lambert93=False,
+    cache_dir=None,
+    cache_max_mb=CACHE_MAX_MB,
+    backend=ETREE,
+    pipeline=False,
+    threads=None,
+    folium_light=False,
+    folium_zoom=SIMPLIFY_ZOOM,
+    folium_precision=PRECISION,
+    folium_assets_url=None,
+    metrics=None,
+    check_geometries=False,
+    mapped=False,
+    workers=None,
+):
+    """
+    Traitement complet d'un fichier XML telepac : extraction des couches
+    demandées (toutes par défaut), visualisation Folium et fichier excel dans
+    output_dir, ajout optionnel des couches aux jeux de données GeoParquet
+    de parquet_dir. Les géométries sont en WGS84, ou en Lambert-93 si
+    keep_lambert93 est vrai. Les couches sont lues dans le cache cache_dir
+    si elles y sont déjà.
 
-    # Traitements des zdh-declaree
-    gdf_zdh = extract_zdh(xml, NAMESPACE, NAMESPACE_GML)
+    Si pipeline est vrai, les géométries sont décodées par lots dans un pool
+    de threads (threads) pendant la lecture, et chaque sortie est écrite dans
+    son propre thread dès que les couches qu'elle attend sont prêtes.
 
-    # Traitements des animaux
-    df_animaux = extract_animaux(xml, NAMESPACE, NAMESPACE_GML)
+    Les options folium_* règlent la visu Folium (voir visu_folium_layers).
 
-    # Traitements des informations du demandeur
-    df_demandeur = extract_demandeur(xml, NAMESPACE, NAMESPACE_GML)
+    Si metrics (Metrics) est fourni, chaque étape de l'extraction et chaque
+    sortie y est mesurée.
 
-    # Traitements des demandes d'aide
-    df_aide_pac = extract_aides_pac(xml, NAMESPACE, NAMESPACE_GML)
+    Si mapped est vrai, le fichier est projeté en mémoire et seuls les
+    enregistrements des couches demandées sont analysés. Si workers est
+    renseigné, ils sont répartis sur un pool de workers processus
+    (incompatible avec pipeline).
 
-    if CREATE_VISU_HTML:
-        # Création de visu dynamique avec Folium
-        layers_folium = [
-            {
-                "gdf": gdf_ilots,
-                "name": "Ilots",
-                "color": "blue",
-                "info": "numero-ilot-reference",
-                "show": True,
-            },
-            {
-                "gdf": gdf_parcelles,
-                "name": "Parcelles",
-                "color": "green",
-                "info": "numero-ilot-reference, code-culture",
-            },
-            {
-                "gdf": gdf_bio,
-                "name": "Parcelles Bio",
-                "color": "black",
-                "info": "code-mesure",
-            },
-            {
-                "gdf": gdf_maec,
-                "name": "MAEC",
-                "color": "blue",
-                "info": "code-mesure",
-            },
-            {
-                "gdf": gdf_sna,
-                "name": "SNA (Surface Non Agricole)",
-                "color": "green",
-                "info": "categorieSna, typeSna, surfaceGraphique",
-            },
-            {
-                "gdf": gdf_zdh,
-                "name": "ZDH (Zone de Densité Homogène)",
-                "color": "black",
-                "info": "numero-zdh-declaree",
-            },
+    Si check_geometries est vrai, les géométries invalides sont réparées
+    avant les sorties et la table du contrôle des géométries
+    (controle_geometries) est ajoutée aux couches.
+
+    Retourne le dictionnaire des couches extraites.
+    """
+    if pipeline and workers is not None:
+        raise ValueError("workers est incompatible avec pipeline (voir threads)")
+
+    if not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+
+    # Le demandeur et les aides PAC portent le numéro pacage et la campagne
+    # qui partitionnent les sorties Parquet
+    if parquet_dir is not None and layers is not None:
+        layers = list(layers) + [
+            layer for layer in PARTITION_LAYERS if layer not in layers
         ]
-        visu_folium_layers(
-            layers=layers_folium,
-            title_folium=(
-                df_demandeur["exploitation"].values[0]
-                if not df_demandeur.empty
-                else "Exploitation"
-            ),
-            html_output=f"{OUTPUT_DIR}/visu_exploitation.html",
-        )
 
-    if EXCEL_FILENAME is not None:
-        # Création d'un fichier excel en sortie
-        with pd.ExcelWriter(EXCEL_FILENAME) as writer:
-            ajouter_onglet(data=df_demandeur, excel_file=writer, onglet="Exploitation")
-            ajouter_onglet(data=df_animaux, excel_file=writer, onglet="Animaux")
-            ajouter_onglet(data=df_aide_pac, excel_file=writer, onglet="Aides PAC")
-            ajouter_onglet(data=gdf_ilots, excel_file=writer, onglet="Ilots")
-            ajouter_onglet(data=gdf_parcelles, excel_file=writer, onglet="Parcelles")
-            ajouter_onglet(
-                data=gdf_bio, excel_file=writer, onglet="Elements Bio par ilot"
-            )
-            ajouter_onglet(
-                data=gdf_maec, excel_file=writer, onglet="Elements MAEC par ilot"
+    crs = LAMBERT93 if keep_lambert93 else WGS84
+    if pipeline and cache_dir is None:
+        # Couches complétées au fil de l'extraction en pipeline
+        futures = pending_layers(layers)
+        if check_geometries:
+            extracted = LayerFutures(checked_layers(futures))
+        else:
+            extracted = LayerFutures(futures)
+    else:
+        extracted = extract_layers(
+            xml_file,
+            layers=layers,
+            streaming=streaming,
+            crs=crs,
+            cache_dir=cache_dir,
+            cache_max_mb=cache_max_mb,
+            backend=backend,
+            metrics=metrics,
+            mapped=mapped,
+            workers=workers,
+        )
+        if check_geometries:
+            with measure(metrics, "controle_geometries") as record:
+                extracted = check_layer_geometries(extracted)
+                count_layers(record, {REPORT_LAYER: extracted[REPORT_LAYER]})
+
+    # Sorties à écrire, chacune ne lisant que les couches qu'elle utilise
+    outputs = []
+    if visu_folium:
+        # Création de visu dynamique avec Folium
+        outputs.append(
+            functools.partial(
+                measured(metrics, "folium", visu_folium_extracted),
+                extracted,
+                f"{output_dir}/visu_exploitation.html",
+                light=folium_light,
+                zoom=folium_zoom,
+                precision=folium_precision,
+                assets_url=folium_assets_url,
             )
-            ajouter_onglet(
-                data=gdf_sna, excel_file=writer, onglet="Elements SNA déclarés"
+        )
+    if excel_filename is not None:
+        # Création d'un fichier excel en sortie
+        outputs.append(
+            functools.partial(
+                measured(metrics, "excel", write_excel),
+                extracted,
+                f"{output_dir}/{excel_filename}",
+                geometry=excel_geometry,
             )
-            ajouter_onglet(
-                data=gdf_zdh, excel_file=writer, onglet="Elements ZDH déclarés"
+        )
+    if parquet_dir is not None:
+        # Ajout des couches aux jeux de données GeoParquet
+        outputs.append(
+            functools.partial(
+                measured(metrics, "parquet", write_layers_parquet),
+                extracted,
+                parquet_dir,
+                campagne=campagne,
             )
+        )
+
+    if not pipeline:
+        for output in outputs:
+            output()
+        return extracted
+
+    from concurrent.futures import ThreadPoolExecutor
+
+    # Les rédacteurs ont leur propre pool : ils attendent les couches
+    # construites dans le pool de décodage sans en occuper les threads
+    with ThreadPoolExecutor(threads) as decoders, ThreadPoolExecutor(
+        max(len(outputs), 1)
+    ) as writers:
+        written = [writers.submit(output) for output in outputs]
+        if cache_dir is None:
+            with measure(metrics, "extract_pipeline") as record:
+                extract_layers_pipeline(
+                    xml_file,
+                    NAMESPACE,
+                    NAMESPACE_GML,
+                    futures,
+                    decoders,
+                    crs=crs,
+                    streaming=streaming,
+                    backend=backend,
+                    mapped=mapped,
+                )
+                count_layers(record, extracted)
+        for future in written:
+            future.result()
+
+    return dict(extracted)
+
+
+if __name__ == "__main__":
+
+    # Import des paramètres
+    args = usage()
+    metrics = None
+    if args.metrics_file is not None:
+        metrics = Metrics(args.input_xml, memory=args.metrics_memory)
+    process = process_xml
+    if args.profile is not None:
+        process = profiled(process_xml, args.profile)
+    process(
+        args.input_xml,
+        args.output_dir,
+        excel_filename=args.excel_filename,
+        excel_geometry=args.excel_geometry,
+        visu_folium=args.visu_folium,
+        streaming=args.streaming,
+        parquet_dir=args.parquet_dir,
+        campagne=args.campagne,
+        layers=args.layers,
+        keep_lambert93=args.keep_lambert93,
+        cache_dir=args.cache_dir,
+        cache_max_mb=args.cache_max_mb,
+        backend=args.backend,
+        pipeline=args.pipeline,
+        threads=args.threads,
+        folium_light=args.folium_light,
+        folium_zoom=args.folium_zoom,
+        folium_precision=args.folium_precision,
+        folium_assets_url=args.folium_assets_url,
+        metrics=metrics,
+        check_geometries=args.check_geometries,
+        mapped=args.mmap,
+        workers=args.workers,
+    )
+    if metrics is not None:
+        metrics.stop()
+        metrics.write_json(args.metrics_file)
 
     # Améliorations :
-    # - pouvoir extraire uniquement les infos relatifs à un champ
-    #   (ex: que les zdh, que les zna ...)
-    # - nombre stocke sous forme de texte dans excel
     # - on ne traite pas les données de pièces jointes
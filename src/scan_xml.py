@@ -3,10 +3,22 @@ Scan d'un fichier xml : affiche la liste des élements
 """
 
 import argparse
-import xml.etree.ElementTree as ET
+import functools
 import pickle
+from collections import Counter
 from pathlib import Path
 
+from extract_functions.backends import BACKENDS, ETREE, iterparse, parse
+from extract_functions.mapped import (
+    map_file,
+    parse_skeleton,
+    parse_span,
+    record_spans,
+    scan_boundaries,
+)
+
+NAMESPACE_URI = "urn:x-telepac:fr.gouv.agriculture.telepac:echange-producteur"
+
 
 def usage() -> argparse.Namespace:
     """Parse the options provided on the command line.
@@ -37,34 +49,171 @@ def usage() -> argparse.Namespace:
         help="Permet la création ou l'ajout d'information au fichier pickle "
         "stockant les éléments connus des données Telepac de xml.",
     )
+    required_args.add_argument(
+        "--details",
+        action="store_true",
+        default=False,
+        help="Affiche également le nombre d'occurrences de chaque chemin "
+        "et de chaque namespace.",
+    )
+    required_args.add_argument(
+        "--streaming",
+        action="store_true",
+        default=False,
+        help="Lecture du xml en flux (iterparse) pour limiter la mémoire "
+        "utilisée sur les fichiers volumineux.",
+    )
+    required_args.add_argument(
+        "--mmap",
+        action="store_true",
+        default=False,
+        help="Lecture du xml projeté en mémoire (mmap), découpé en plages "
+        "d'octets (squelette, puis plages d'ilots, SNA et ZDH).",
+    )
+    required_args.add_argument(
+        "--backend",
+        type=str,
+        choices=BACKENDS,
+        default=ETREE,
+        required=False,
+        help="Moteur de lecture XML : xml.etree (etree, par défaut) ou lxml",
+    )
     return parser.parse_args()
 
 
-def create_liste_elements(xml_filename):
+@functools.lru_cache(maxsize=None)
+def split_tag(tag):
+    """
+    Sépare un tag {namespace}nom en (namespace, nom), namespace None si absent
+    """
+    if tag[:1] == "{":
+        namespace, _, name = tag[1:].partition("}")
+        return namespace, name
+    return None, tag
+
+
+def iter_elements(xml_filename, backend=ETREE):
     """
-    Création d'une liste d'éléments de l'arbre du fichier xml
+    Parcours des éléments de l'arbre complet du fichier xml.
+    Produit des tuples (chemin, élément), le chemin étant formé des noms
+    des éléments depuis la racine (ex : /producteurs/producteur/rpg).
+    Les commentaires et instructions de traitement (lxml) sont ignorés.
     """
-    NAMESPACE = "{urn:x-telepac:fr.gouv.agriculture.telepac:echange-producteur}"
-    xml = ET.parse(xml_filename)
-    root = xml.getroot()
-    list_elem = list()
-    list_attrib = list()
-    for elem in root.iter():
-        i = elem.tag.find("}")
-        if i >= 0:
-            list_elem.append(elem.tag[i + 1 :])
-            # print(elem.tag[i + 1 :])
-            # print(elem.text)
+    root = parse(xml_filename, backend=backend)
+    yield from walk_elements(root, "/" + split_tag(root.tag)[1])
 
-        # On ajoute également les attributs (éventuels) de chaque élément
-        for j in xml.findall(f".//{NAMESPACE}{elem.tag[i + 1 :]}"):
-            if j.attrib.keys():
-                for at, at_val in j.attrib.items():
-                    if at not in list_attrib:
-                        list_attrib.append(at)
 
-    list_elem = list_elem + list_attrib
-    return list_elem
+def walk_elements(root, path):
+    """
+    Parcours des éléments du sous-arbre de root, de chemin path.
+    Produit des tuples (chemin, élément), comme iter_elements.
+    """
+    stack = [(root, path)]
+    while stack:
+        elem, path = stack.pop()
+        yield path, elem
+        stack.extend(
+            (child, f"{path}/{split_tag(child.tag)[1]}")
+            for child in reversed(elem)
+            if isinstance(child.tag, str)
+        )
+
+
+def iter_elements_streaming(xml_filename, backend=ETREE):
+    """
+    Parcours des éléments du fichier xml lu en flux (iterparse).
+    Produit les mêmes tuples (chemin, élément) que iter_elements ; chaque
+    élément est vidé et détaché de l'arbre une fois terminé.
+    """
+    stack = []
+    paths = [""]
+    for event, elem in iterparse(
+        xml_filename, events=("start", "end"), backend=backend
+    ):
+        if event == "start":
+            stack.append(elem)
+            paths.append(f"{paths[-1]}/{split_tag(elem.tag)[1]}")
+            yield paths[-1], elem
+        else:
+            stack.pop()
+            paths.pop()
+            elem.clear()
+            if stack:
+                stack[-1].remove(elem)
+
+
+def iter_elements_mapped(xml_filename, backend=ETREE):
+    """
+    Parcours des éléments du fichier xml projeté en mémoire (mmap) : le
+    squelette du document, puis les enregistrements (ilots, SNA, ZDH)
+    analysés par plages d'octets. Produit les mêmes tuples (chemin, élément)
+    que iter_elements, dans un autre ordre.
+    """
+    with map_file(xml_filename) as buffer:
+        boundaries = scan_boundaries(buffer)
+        root, parents = parse_skeleton(buffer, boundaries, backend=backend)
+        if root is not None:
+            yield from walk_elements(root, "/" + split_tag(root.tag)[1])
+
+        index = 0
+        for _, start, stop, count in record_spans(buffer, boundaries):
+            span = parse_span(buffer, boundaries, start, stop, backend=backend)
+            for elem in span:
+                if isinstance(elem.tag, str):
+                    path = f"{parents[index]}/{split_tag(elem.tag)[1]}"
+                    yield from walk_elements(elem, path)
+                    index += 1
+
+
+def census_elements(xml_filename, streaming=False, backend=ETREE, mapped=False):
+    """
+    Recensement des éléments du fichier xml en un seul parcours.
+
+    Retourne un dictionnaire de compteurs :
+    - elements : nombre d'occurrences de chaque élément d'un namespace
+      (telepac, gml...), nom sans namespace ; comme dans la liste des
+      éléments connus (pickle), les éléments sans namespace sont ignorés
+    - attributes : nombre d'éléments telepac portant chaque attribut
+    - paths : nombre d'occurrences de chaque chemin depuis la racine, pour
+      tous les éléments
+    - namespaces : nombre d'éléments de chaque namespace
+
+    Le fichier est lu avec le moteur XML backend (etree ou lxml), en flux
+    (streaming) ou projeté en mémoire (mapped).
+    """
+    census = {
+        "elements": Counter(),
+        "attributes": Counter(),
+        "paths": Counter(),
+        "namespaces": Counter(),
+    }
+    if mapped:
+        elements = iter_elements_mapped
+    else:
+        elements = iter_elements_streaming if streaming else iter_elements
+    for path, elem in elements(xml_filename, backend=backend):
+        namespace, name = split_tag(elem.tag)
+        census["paths"][path] += 1
+        if namespace is not None:
+            census["elements"][name] += 1
+            census["namespaces"][namespace] += 1
+
+        # On ajoute également les attributs (éventuels) des éléments telepac
+        if elem.attrib and namespace == NAMESPACE_URI:
+            census["attributes"].update(elem.attrib.keys())
+
+    return census
+
+
+def create_liste_elements(xml_filename, streaming=False, backend=ETREE, mapped=False):
+    """
+    Création d'une liste d'éléments de l'arbre du fichier xml : chaque élément
+    autant de fois qu'il apparaît, suivi des attributs des éléments telepac
+    """
+    census = census_elements(
+        xml_filename, streaming=streaming, backend=backend, mapped=mapped
+    )
+    return list(census["elements"].elements()) + list(census["attributes"])
 
 
 def create_pickle(pkl_filename, list_elem_uniq):
@@ -112,16 +261,28 @@ if __name__ == "__main__":
     XML_FILE = args.input_xml
     PICKLE_DIFF = args.pickle_diff
     PICKLE_CREATE = args.pickle_create
+    STREAMING = args.streaming
 
-    # Création d'une liste d'éléments du tree xml
-    list_elements = create_liste_elements(XML_FILE)
-    list_unique_elements = sorted(list(set(list_elements)))
+    # Recensement des éléments du tree xml
+    census = census_elements(
+        XML_FILE, streaming=STREAMING, backend=args.backend, mapped=args.mmap
+    )
+    list_unique_elements = sorted(set(census["elements"]) | set(census["attributes"]))
 
-    # Affichage des éléments uniques du tree xml
+    # Affichage des éléments uniques du tree xml, puis des attributs avec le
+    # nombre d'éléments qui les portent
     if not PICKLE_DIFF:
-        for element in list_unique_elements:
-            nb = list_elements.count(element)
+        for element, nb in sorted(census["elements"].items()):
             print(f"{element} - #{nb}")
+        for attribute, nb in sorted(census["attributes"].items()):
+            print(f"@{attribute} - #{nb} éléments portant l'attribut")
+
+    # Affichage des chemins et namespaces
+    if args.details:
+        for path, nb in sorted(census["paths"].items()):
+            print(f"{path} - #{nb}")
+        for namespace, nb in census["namespaces"].most_common():
+            print(f"{namespace} - #{nb}")
 
     # Gestion du pickle
     PICKLE_FILENAME = "elements_connus.pkl"
@@ -0,0 +1,99 @@
+"""
+Configuration des tests : les modules de src et le générateur de fichiers
+synthétiques de benchmarks sont importés comme par les scripts.
+
+Usage:
+    python -m pytest -q tests
+"""
+
+import os
+import re
+import sys
+
+import pytest
+
+ROOT_DIR = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, os.path.join(ROOT_DIR, "src"))
+sys.path.insert(0, os.path.join(ROOT_DIR, "benchmarks"))
+
+from telepac_synthetique import generate_telepac, write_telepac  # noqa: E402
+
+# Préfixe des éléments telepac de la variante à namespace préfixé
+PREFIX_PATTERN = re.compile(r"<(/?)(?![?!]|gml:)([\w-]+)")
+
+
+def multi_producteurs():
+    """
+    Deux producteurs dans le même document.
+    """
+    first = generate_telepac(nb_ilots=8, nb_sna=8, nb_sna_points=3, seed=1)
+    second = generate_telepac(
+        nb_ilots=5, nb_sna=4, nb_zdh=1, seed=2, numero_pacage="031000002"
+    )
+    start = second.index("<producteur ")
+    stop = second.index("</producteurs>")
+    return first.replace("</producteurs>", second[start:stop] + "</producteurs>")
+
+
+def commentaires():
+    """
+    Commentaires et instructions de traitement entre les enregistrements et
+    dans les géométries.
+    """
+    xml = generate_telepac(nb_ilots=8, nb_sna=8, seed=3)
+    xml = xml.replace("</ilot>", "</ilot><!-- fin de l'ilot -->")
+    xml = xml.replace("<gml:outerBoundaryIs>", "<gml:outerBoundaryIs><!-- contour -->")
+    xml = xml.replace("<gml:Polygon>", "<gml:Polygon><?polygone test?><!-- anneaux -->")
+    return xml.replace("<snas-declarees>", "<snas-declarees><?traitement test?>")
+
+
+def prefixe():
+    """
+    Namespace telepac déclaré avec un préfixe (tp:) plutôt que par défaut.
+    """
+    xml = PREFIX_PATTERN.sub(r"<\1tp:\2", generate_telepac(nb_ilots=8, seed=4))
+    return xml.replace(' xmlns="', ' xmlns:tp="', 1)
+
+
+@pytest.fixture(scope="session")
+def telepac_file(tmp_path_factory):
+    """
+    Fichier XML telepac synthétique : ilots, SNA surfaciques et ponctuelles,
+    ZDH, dont deux parcelles aux géométries invalides.
+    """
+    xml_file = tmp_path_factory.mktemp("telepac") / "telepac.xml"
+    write_telepac(
+        xml_file,
+        nb_ilots=30,
+        nb_sna=30,
+        nb_sna_points=10,
+        nb_zdh=5,
+        nb_invalides=2,
+        seed=1,
+    )
+    return str(xml_file)
+
+
+@pytest.fixture(scope="session")
+def variant_files(tmp_path_factory, telepac_file):
+    """
+    Fichiers XML telepac de structures variées : {nom: chemin}.
+    """
+    directory = tmp_path_factory.mktemp("variantes")
+    files = {"synthetique": telepac_file}
+    for name, content in (
+        ("multi_producteurs", multi_producteurs()),
+        ("commentaires", commentaires()),
+        ("prefixe", prefixe()),
+    ):
+        files[name] = str(directory / f"{name}.xml")
+        with open(files[name], "w", encoding="utf-8") as f:
+            f.write(content)
+
+    # Encodage latin-1 avec des caractères accentués
+    files["latin1"] = str(directory / "latin1.xml")
+    xml = generate_telepac(nb_ilots=5, nb_sna=5, seed=5)
+    xml = xml.replace('encoding="UTF-8"', 'encoding="ISO-8859-1"')
+    with open(files["latin1"], "wb") as f:
+        f.write(xml.replace("SYNTHETIQUE", "SYNTHÉTIQUE ÉLEVAGE").encode("latin-1"))
+    return files
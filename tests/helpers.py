@@ -0,0 +1,15 @@
+"""
+Comparaisons communes aux tests.
+"""
+
+import pandas as pd
+
+
+def assert_layers_equal(result, expected):
+    """
+    Vérifie que deux dictionnaires de couches ont les mêmes couches, dans le
+    même ordre, et des DataFrame identiques (valeurs, types, catégories).
+    """
+    assert list(result) == list(expected)
+    for layer, df in expected.items():
+        pd.testing.assert_frame_equal(result[layer], df, obj=layer)
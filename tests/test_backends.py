@@ -0,0 +1,139 @@
+"""
+Conformité des moteurs de lecture XML : chaque extracteur de
+extract_functions, l'extraction par le registre (arbre complet, flux et
+projection mmap) et le recensement de scan_xml donnent des résultats
+identiques avec etree et lxml.
+"""
+
+import pandas as pd
+import pytest
+
+from extract_functions.backends import BACKENDS, ETREE, LXML, parse
+from extract_functions.registry import (
+    ILOT_LAYERS,
+    RECORD_LAYERS,
+    TABULAR_LAYERS,
+    extract_selected_layers,
+    load,
+)
+from extract_functions.streaming import extract_layers_streaming
+from scan_xml import census_elements
+from telepac_synthetique import (
+    NAMESPACE,
+    NAMESPACE_GML,
+    NAMESPACE_GML_URI,
+    NAMESPACE_URI,
+)
+
+pytest.importorskip("lxml")
+
+MODES = ("dom", "streaming", "mmap")
+
+# Extracteurs publics : (module, fonction)
+EXTRACTORS = (
+    [(f"extract_{layer}", f"extract_{layer}") for layer in ILOT_LAYERS]
+    + [(module, f"extract_{layer}") for layer, (module, _) in RECORD_LAYERS.items()]
+    + [(module, module) for module in TABULAR_LAYERS.values()]
+)
+
+# Intersections de SNA, point et commentaires écrits à la main
+ECHANTILLON = f"""<?xml version="1.0" encoding="UTF-8"?>
+<producteurs xmlns="{NAMESPACE_URI}" xmlns:gml="{NAMESPACE_GML_URI}">
+<!-- commentaire ignoré par les extracteurs -->
+<producteur numero-pacage="031000002">
+<demandeur type="individuel"><siret>12345678900011</siret></demandeur>
+<snas-declarees><sna-declaree>
+<numeroSna>1</numeroSna><categorieSna>HAIE</categorieSna>
+<geometrie><gml:Point><gml:coordinates>430000.5,6280000.5</gml:coordinates>
+</gml:Point></geometrie>
+<intersectionsSnaIlots><intersectionSnaIlot><numeroIlot>3</numeroIlot>
+<largeur>5</largeur></intersectionSnaIlot></intersectionsSnaIlots>
+<largeur>7</largeur><largeur-calculee>8</largeur-calculee>
+<intersectionsSnaParcelles><intersectionSnaParcelle><numeroIlot>3</numeroIlot>
+<numeroParcelle>1</numeroParcelle><longueur-iae>2.5</longueur-iae>
+</intersectionSnaParcelle></intersectionsSnaParcelles>
+</sna-declaree></snas-declarees>
+</producteur>
+</producteurs>
+"""
+
+
+@pytest.fixture(scope="module")
+def conformity_files(tmp_path_factory, variant_files):
+    """
+    Fichiers variés et échantillon écrit à la main : {nom: chemin}.
+    """
+    xml_file = tmp_path_factory.mktemp("backends") / "echantillon.xml"
+    xml_file.write_text(ECHANTILLON, encoding="utf-8")
+    return {**variant_files, "echantillon": str(xml_file)}
+
+
+def extract_all(xml_file, backend, mode):
+    """
+    Extraction de toutes les couches avec un moteur et un mode de lecture.
+    """
+    if mode in ("streaming", "mmap"):
+        return extract_layers_streaming(
+            xml_file, NAMESPACE, NAMESPACE_GML, backend=backend, mapped=mode == "mmap"
+        )
+    return extract_selected_layers(
+        parse(xml_file, backend=backend), NAMESPACE, NAMESPACE_GML
+    )
+
+
+def results(xml_file, backend):
+    """
+    Sorties de chaque extracteur, du registre et du scan pour un moteur.
+    """
+    xml_root = parse(xml_file, backend=backend)
+    outputs = {
+        function: load(module, function)(xml_root, NAMESPACE, NAMESPACE_GML)
+        for module, function in EXTRACTORS
+    }
+    for mode in MODES:
+        for layer, df in extract_all(xml_file, backend, mode).items():
+            outputs[f"{mode}:{layer}"] = df
+        outputs[f"scan {mode}"] = census_elements(
+            xml_file,
+            streaming=mode == "streaming",
+            backend=backend,
+            mapped=mode == "mmap",
+        )
+    return outputs
+
+
+@pytest.mark.parametrize(
+    "name",
+    [
+        "synthetique",
+        "multi_producteurs",
+        "commentaires",
+        "prefixe",
+        "latin1",
+        "echantillon",
+    ],
+)
+def test_backends_conformity(conformity_files, name):
+    xml_file = conformity_files[name]
+    reference = results(xml_file, ETREE)
+    for backend in BACKENDS:
+        if backend == ETREE:
+            continue
+        outputs = results(xml_file, backend)
+        assert list(outputs) == list(reference)
+        for key, output in outputs.items():
+            if isinstance(output, pd.DataFrame):
+                pd.testing.assert_frame_equal(
+                    output, reference[key], obj=f"{backend}, {key}"
+                )
+            else:
+                assert output == reference[key], f"{backend}, {key}"
+
+
+def test_comments_in_polygons(conformity_files):
+    # Commentaires et instructions de traitement dans les gml:Polygon : lxml
+    # les conserve dans l'arbre, ils ne doivent pas être pris pour des anneaux
+    xml_root = parse(conformity_files["commentaires"], backend=LXML)
+    ilots = load("extract_ilots", "extract_ilots")(xml_root, NAMESPACE, NAMESPACE_GML)
+    assert len(ilots) == 8
+    assert ilots.geometry.is_valid.all()
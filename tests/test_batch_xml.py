@@ -0,0 +1,131 @@
+"""
+Traitement par lot (batch_xml) : sous-répertoires de sortie distincts pour
+les fichiers de même nom et récapitulatif.
+"""
+
+import csv
+import glob
+import os
+import re
+import shutil
+import subprocess
+import sys
+
+from batch_xml import output_names, process_batch, write_summary
+from conftest import ROOT_DIR
+
+
+def test_output_names_single_directory():
+    names, collisions = output_names(["data/a.xml", "data/b.xml"])
+    assert names == {"data/a.xml": "a", "data/b.xml": "b"}
+    assert collisions == {}
+
+
+def test_output_names_homonyms():
+    xml_files = ["data/2023/telepac.xml", "data/2024/telepac.xml", "data/autre.xml"]
+    names, collisions = output_names(xml_files)
+    assert names == {
+        "data/2023/telepac.xml": os.path.join("2023", "telepac"),
+        "data/2024/telepac.xml": os.path.join("2024", "telepac"),
+        "data/autre.xml": "autre",
+    }
+    assert collisions == {
+        "data/2023/telepac.xml": ["data/2024/telepac.xml"],
+        "data/2024/telepac.xml": ["data/2023/telepac.xml"],
+    }
+
+
+def test_output_names_extensions():
+    # Même nom sans extension : empreinte courte du chemin complet
+    names, collisions = output_names(["data/telepac.xml", "data/telepac.XML"])
+    assert len(set(names.values())) == 2
+    assert all(name.startswith("telepac_") for name in names.values())
+    assert collisions["data/telepac.xml"] == ["data/telepac.XML"]
+
+
+def test_process_batch_homonyms(tmp_path, telepac_file):
+    xml_files = []
+    for campagne in ("2023", "2024"):
+        os.makedirs(tmp_path / "xml" / campagne)
+        xml_files.append(str(tmp_path / "xml" / campagne / "telepac.xml"))
+        shutil.copy(telepac_file, xml_files[-1])
+    output_dir = str(tmp_path / "sorties")
+
+    results = process_batch(
+        xml_files, output_dir, workers=1, excel_filename="output.xlsx"
+    )
+    for campagne in ("2023", "2024"):
+        assert os.path.isfile(
+            os.path.join(output_dir, campagne, "telepac", "output.xlsx")
+        )
+
+    summary = os.path.join(output_dir, "batch_summary.csv")
+    write_summary(results, summary)
+    with open(summary, encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    assert [row["statut"] for row in rows] == ["ok", "ok"]
+    assert [row["sortie"] for row in rows] == [
+        os.path.join("2023", "telepac"),
+        os.path.join("2024", "telepac"),
+    ]
+    assert [row["collision"] for row in rows] == xml_files[::-1]
+
+
+def test_folium_light_options(tmp_path, telepac_file):
+    # Les options de la visu allégée sont transmises au traitement de
+    # chaque fichier
+    output_dir = tmp_path / "sorties"
+    subprocess.run(
+        [
+            sys.executable,
+            "batch_xml.py",
+            telepac_file,
+            "--output_dir",
+            str(output_dir),
+            "--workers",
+            "1",
+            "--no_excel",
+            "--visu_folium",
+            "--folium_light",
+            "--folium_zoom",
+            "12",
+            "--folium_precision",
+            "2",
+        ],
+        cwd=os.path.join(ROOT_DIR, "src"),
+        check=True,
+        capture_output=True,
+    )
+    (html_file,) = glob.glob(str(output_dir / "*" / "visu_exploitation.html"))
+    with open(html_file, encoding="utf-8") as f:
+        html = f.read()
+    coordinates = re.findall(r'"coordinates": ([-\d., \[\]]+)', html)
+    assert coordinates
+    decimals = {
+        len(number.split(".")[1])
+        for values in coordinates
+        for number in re.findall(r"-?\d+\.\d+", values)
+    }
+    assert decimals and max(decimals) <= 2
+
+
+def test_mbtiles_requires_parquet_dir(tmp_path, telepac_file):
+    completed = subprocess.run(
+        [
+            sys.executable,
+            "batch_xml.py",
+            telepac_file,
+            "--output_dir",
+            str(tmp_path / "sorties"),
+            "--mbtiles",
+            str(tmp_path / "lot.mbtiles"),
+        ],
+        cwd=os.path.join(ROOT_DIR, "src"),
+        capture_output=True,
+        text=True,
+    )
+    # Erreur d'usage d'argparse, avant tout traitement
+    assert completed.returncode == 2
+    assert completed.stderr.startswith("usage: batch_xml.py")
+    assert "--mbtiles nécessite --parquet_dir" in completed.stderr
+    assert not (tmp_path / "sorties").exists()
@@ -0,0 +1,122 @@
+"""
+Cache disque des couches extraites (extract_functions.cache) : clé du cache,
+écriture atomique et éviction des couches les moins récemment utilisées.
+"""
+
+import os
+
+import pandas as pd
+import pytest
+
+from extract_functions import cache
+from extract_functions.cache import (
+    CACHE_SUFFIX,
+    evict,
+    extract_layers_cached,
+    write_cache,
+)
+
+
+class Extractor:
+    """
+    Fonction d'extraction factice : couches d'une ligne, appels enregistrés.
+    """
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, layers):
+        self.calls.append(list(layers))
+        return {layer: pd.DataFrame({"couche": [layer]}) for layer in layers}
+
+
+def cached(xml_file, cache_dir, extract, layers=("ilots", "sna")):
+    return extract_layers_cached(xml_file, list(layers), extract, cache_dir)
+
+
+def cache_entries(cache_dir):
+    return sorted(os.listdir(cache_dir))
+
+
+@pytest.fixture
+def xml_file(tmp_path):
+    path = tmp_path / "telepac.xml"
+    path.write_bytes(b"<producteurs/>")
+    return str(path)
+
+
+def test_hit_on_identical_file(tmp_path, xml_file):
+    cache_dir = str(tmp_path / "cache")
+    extract = Extractor()
+    first = cached(xml_file, cache_dir, extract)
+    assert extract.calls == [["ilots", "sna"]]
+
+    # Copie identique du fichier sous un autre nom : clé de contenu
+    copy = tmp_path / "copie.xml"
+    copy.write_bytes(open(xml_file, "rb").read())
+    second = cached(str(copy), cache_dir, extract)
+    assert extract.calls == [["ilots", "sna"]]
+    for layer in first:
+        pd.testing.assert_frame_equal(first[layer], second[layer])
+
+    # Seule la couche absente du cache est extraite
+    cached(xml_file, cache_dir, extract, layers=("ilots", "zdh"))
+    assert extract.calls[1:] == [["zdh"]]
+
+
+def test_miss_on_changed_file(tmp_path, xml_file):
+    cache_dir = str(tmp_path / "cache")
+    extract = Extractor()
+    cached(xml_file, cache_dir, extract)
+    with open(xml_file, "ab") as f:
+        f.write(b" ")
+    cached(xml_file, cache_dir, extract)
+    assert len(extract.calls) == 2
+    assert len(cache_entries(cache_dir)) == 4
+
+
+def test_miss_on_extractor_version(tmp_path, xml_file, monkeypatch):
+    cache_dir = str(tmp_path / "cache")
+    extract = Extractor()
+    cached(xml_file, cache_dir, extract)
+    monkeypatch.setattr(cache, "extractor_version", lambda: "autre version")
+    cached(xml_file, cache_dir, extract)
+    assert len(extract.calls) == 2
+
+
+def test_extractor_version_computed_once():
+    cache.extractor_version.cache_clear()
+    version = cache.extractor_version()
+    assert cache.extractor_version() == version
+    assert cache.extractor_version.cache_info().misses == 1
+
+
+def test_atomic_write(tmp_path):
+    path = str(tmp_path / f"couche{CACHE_SUFFIX}")
+    write_cache(path, pd.DataFrame({"a": [1]}))
+
+    # Objet non sérialisable : ni fichier temporaire, ni entrée écrasée
+    with pytest.raises(Exception):
+        write_cache(path, pd.DataFrame({"a": [lambda: None]}))
+    assert cache_entries(tmp_path) == [f"couche{CACHE_SUFFIX}"]
+    assert pd.read_pickle(path)["a"].tolist() == [1]
+
+
+def test_lru_eviction(tmp_path):
+    # Quatre entrées de 1 Ko, de la plus récemment utilisée (d) à la moins
+    # récemment utilisée (a) ; les autres fichiers ne sont pas comptés
+    for age, name in enumerate(["d", "c", "b", "a"]):
+        path = tmp_path / f"{name}{CACHE_SUFFIX}"
+        path.write_bytes(b"x" * 1024)
+        os.utime(path, (1_000_000 - age * 100, 1_000_000 - age * 100))
+    (tmp_path / "autre.txt").write_bytes(b"x" * 4096)
+
+    evict(str(tmp_path), max_mb=2.5 / 1024)
+    assert cache_entries(tmp_path) == [
+        "autre.txt",
+        f"c{CACHE_SUFFIX}",
+        f"d{CACHE_SUFFIX}",
+    ]
+
+    evict(str(tmp_path), max_mb=0)
+    assert cache_entries(tmp_path) == ["autre.txt"]
@@ -0,0 +1,165 @@
+"""
+Contrôle des intersections déclarées des SNA : paires trouvées par l'index
+spatial identiques à celles de la comparaison de toutes les paires, et
+statuts des intersections sur des géométries construites à la main.
+"""
+
+import io
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import pytest
+import shapely
+
+from check_sna import (
+    CONFORME,
+    LONGUEUR_DIFFERENTE,
+    NON_CONSTATEE,
+    NON_DECLAREE,
+    TOLERANCE,
+    border_lengths,
+    check_sna,
+    sna_pairs,
+)
+from extract_functions.backends import parse
+from extract_functions.extract_sna import build_relation
+from extract_functions.registry import extract_selected_layers
+from extract_functions.reprojection import LAMBERT93
+from telepac_synthetique import NAMESPACE, NAMESPACE_GML, generate_telepac
+
+
+@pytest.fixture(scope="module")
+def layers():
+    xml = generate_telepac(nb_ilots=40, nb_sna=40, nb_sna_points=10, sna_distance=150)
+    return extract_selected_layers(
+        parse(io.BytesIO(xml.encode("utf-8"))),
+        NAMESPACE,
+        NAMESPACE_GML,
+        layers=["ilots", "parcelles", "sna"],
+        crs=LAMBERT93,
+    )
+
+
+def test_pairs_match_all_pairs(layers):
+    sna_geometries = np.asarray(layers["sna"].geometry.array)
+    geometries = np.asarray(layers["parcelles"].geometry.array)
+
+    expected = [
+        (i, j)
+        for i, sna in enumerate(sna_geometries)
+        for j, geometry in enumerate(geometries)
+        if sna.distance(geometry) <= TOLERANCE
+    ]
+    sna_index, index = sna_pairs(sna_geometries, geometries)
+    assert expected
+    assert list(zip(sna_index, index)) == expected
+
+    lengths, areas = border_lengths(sna_geometries, geometries, sna_index, index)
+    for k, (i, j) in enumerate(expected):
+        sna, geometry = sna_geometries[i], geometries[j]
+        if shapely.get_dimensions(sna) < 2:
+            assert lengths[k] == areas[k] == 0
+            continue
+        zone = sna.buffer(TOLERANCE, quad_segs=1)
+        assert lengths[k] == pytest.approx(geometry.boundary.intersection(zone).length)
+        assert areas[k] == pytest.approx(geometry.intersection(sna).area)
+
+
+def test_check_sna_statuses():
+    # Ilot 1 bordé à l'est (x = 100) par une haie de 100 m, longée par la
+    # parcelle 1 ; la parcelle 2 et l'ilot 2 en sont éloignés
+    ilots = gpd.GeoDataFrame(
+        {"numero-ilot": ["1", "2"], "numero-ilot-reference": ["R1", "R2"]},
+        geometry=[shapely.box(0, 0, 100, 100), shapely.box(1000, 0, 1100, 100)],
+        crs=LAMBERT93,
+    )
+    parcelles = gpd.GeoDataFrame(
+        {"numero-ilot-reference": ["R1", "R1"], "numero-parcelle": ["1", "2"]},
+        geometry=[shapely.box(50, 0, 100, 100), shapely.box(0, 0, 40, 100)],
+        crs=LAMBERT93,
+    )
+    sna = gpd.GeoDataFrame(
+        {
+            "numero-sna-declaree": ["1"],
+            "intersectionsSna_Ilots": [
+                [{"numero-ilot": "1", "largeur": "2"}, {"numero-ilot": "2"}]
+            ],
+            "intersectionSna_Parcelles": [
+                [
+                    {"numero-ilot": "1", "numero-parcelle": "1", "longueur-iae": "60"},
+                    {"numero-ilot": "1", "numero-parcelle": "2", "longueur-sie": "5"},
+                ]
+            ],
+        },
+        geometry=[shapely.box(100, 0, 102, 100)],
+        crs=LAMBERT93,
+    )
+    controle = check_sna({"ilots": ilots, "parcelles": parcelles, "sna": sna})
+
+    statuts = controle["controle_sna_ilots"].set_index("numero-ilot")["statut"]
+    assert statuts.to_dict() == {1: CONFORME, 2: NON_CONSTATEE}
+
+    parcelle_rows = controle["controle_sna_parcelles"].set_index("numero-parcelle")
+    assert parcelle_rows["statut"].to_dict() == {
+        1: LONGUEUR_DIFFERENTE,
+        2: NON_CONSTATEE,
+    }
+    assert parcelle_rows.loc[1, "longueur-calculee"] == pytest.approx(100, abs=1)
+    assert parcelle_rows.loc[2, "longueur-declaree"] == 5
+
+    # Haie non déclarée le long de la parcelle 1
+    sna["intersectionSna_Parcelles"] = [[]]
+    controle = check_sna({"ilots": ilots, "parcelles": parcelles, "sna": sna})
+    assert controle["controle_sna_parcelles"]["statut"].tolist() == [NON_DECLAREE]
+
+
+def test_relation_tables(layers):
+    for layer, values in (
+        ("sna_ilots", ["largeur"]),
+        ("sna_parcelles", ["longueur-sie", "longueur-iae"]),
+    ):
+        relation = build_relation(layers["sna"], layer)
+        keys = relation.columns.drop(values)
+        assert (relation.dtypes[keys] == "Int64").all()
+        assert (relation.dtypes[values] == "float64").all()
+        # Une ligne par paire SNA / élément, 40 SNA surfaciques et 10
+        # ponctuelles bordant chacune un ilot et deux de ses parcelles
+        assert not relation.duplicated(subset=keys).any()
+        assert len(relation) == 50 * (len(keys) - 1)
+
+
+def test_relation_rows():
+    sna = pd.DataFrame(
+        {
+            "numero-sna-declaree": ["1", "2", "3"],
+            "intersectionsSna_Ilots": [
+                [{"numero-ilot": "4", "largeur": "2"}, {"numero-ilot": "5"}],
+                [],
+                [{"numero-ilot": "6", "largeur": "non renseignée"}],
+            ],
+        }
+    )
+    relation = build_relation(sna, "sna_ilots")
+    assert relation["numero-sna-declaree"].tolist() == [1, 1, 3]
+    assert relation["numero-ilot"].tolist() == [4, 5, 6]
+    assert relation["largeur"][0] == 2 and relation["largeur"][1:].isna().all()
+
+
+@pytest.mark.parametrize(
+    "sna",
+    [
+        # Couche vide extraite : aucune colonne
+        pd.DataFrame(),
+        pd.DataFrame({"numero-sna-declaree": ["1"], "intersectionsSna_Ilots": [[]]}),
+    ],
+)
+def test_empty_declaration(sna):
+    relation = build_relation(sna, "sna_ilots")
+    assert relation.empty
+    assert list(relation.columns) == ["numero-sna-declaree", "numero-ilot", "largeur"]
+    assert relation.dtypes.tolist() == ["Int64", "Int64", "float64"]
+
+    empty = gpd.GeoDataFrame(geometry=[], crs=LAMBERT93)
+    controle = check_sna({"ilots": empty, "parcelles": empty, "sna": empty})
+    assert all(df.empty for df in controle.values())
@@ -0,0 +1,76 @@
+"""
+Construction des couches colonne par colonne (extract_functions.columns) :
+colonnes catégorielles et assemblage de couches extraites par morceaux.
+"""
+
+import pandas as pd
+import pytest
+
+from extract_functions.columns import ColumnBuilder
+
+
+def builder(*rows):
+    """
+    ColumnBuilder rempli des enregistrements rows ({colonne: valeur}).
+    """
+    columns = ColumnBuilder(categorical={"code-culture"})
+    for row in rows:
+        columns.update(row)
+        columns.end_row()
+    return columns
+
+
+def frame(columns):
+    return pd.DataFrame(columns.to_columns())
+
+
+def test_categorical_column():
+    rows = [
+        {"code-culture": "BTH", "surface": "1.5"},
+        {"surface": "2"},
+        {"code-culture": "MIS", "surface": "3"},
+        {"code-culture": "BTH", "surface": "4"},
+        {"code-culture": None, "surface": "5"},
+    ]
+    df = frame(builder(*rows))
+    assert df["code-culture"].dtype == "category"
+    assert df["code-culture"].cat.categories.tolist() == ["BTH", "MIS"]
+    # Mêmes valeurs que le DataFrame de la liste des dictionnaires
+    pd.testing.assert_frame_equal(
+        df.astype(object), pd.DataFrame(rows).astype(object), check_dtype=False
+    )
+
+
+@pytest.mark.parametrize(
+    "first, second",
+    [
+        # Catégories disjointes
+        (["BTH", "MIS"], ["ORH", "PPH"]),
+        # Catégories communes, dans un autre ordre
+        (["BTH", "MIS", None], ["MIS", None, "ORH", "BTH"]),
+        # Colonne absente du premier morceau
+        ([None, None], ["ORH", "BTH"]),
+        # Colonne absente du second morceau
+        (["BTH"], [None]),
+    ],
+)
+def test_extend(first, second):
+    def rows(codes):
+        return [
+            (
+                {"numero": str(i)}
+                if code is None
+                else {"numero": str(i), "code-culture": code}
+            )
+            for i, code in enumerate(codes)
+        ]
+
+    columns = builder(*rows(first))
+    columns.extend(builder(*rows(second)))
+    df = frame(columns)
+
+    expected = builder(*(rows(first) + rows(second)))
+    pd.testing.assert_frame_equal(df, frame(expected))
+    assert len(columns) == len(first) + len(second)
+    codes = df["code-culture"].astype(object)
+    assert codes.where(codes.notna(), None).tolist() == first + second
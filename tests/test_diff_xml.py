@@ -0,0 +1,91 @@
+"""
+Différences entre deux déclarations telepac (diff_xml) : éléments ajoutés,
+supprimés et modifiés, appariés sur leurs clés.
+"""
+
+import pytest
+import shapely
+
+from diff_xml import AJOUT, MODIFICATION, SUPPRESSION, diff_layer, diff_xml
+from extract_functions.reprojection import LAMBERT93
+from telepac_synthetique import write_telepac
+
+
+def ilots(rows):
+    """
+    Couche des ilots à partir de tuples (numéro, commune, géométrie).
+    """
+    import geopandas as gpd
+
+    numeros, communes, geometries = zip(*rows)
+    return gpd.GeoDataFrame(
+        {"numero-ilot-reference": numeros, "commune": communes},
+        geometry=list(geometries),
+        crs=LAMBERT93,
+    )
+
+
+def test_diff_layer():
+    square = shapely.box(0, 0, 10, 10)
+    # Même carré, autre point de départ et autre sens de parcours
+    rotated = shapely.Polygon([(10, 0), (0, 0), (0, 10), (10, 10), (10, 0)])
+    old = ilots(
+        [
+            ("A", "31555", square),
+            ("B", "31555", square),
+            ("C", "31555", square),
+            ("E", "31555", square),
+        ]
+    )
+    new = ilots(
+        [
+            ("A", "31555", rotated),
+            ("B", "31000", square),
+            ("D", "31555", square),
+            ("E", "31555", shapely.box(0, 0, 10, 12)),
+        ]
+    )
+    diff = diff_layer(old, new, ["numero-ilot-reference"])
+
+    statuts = dict(zip(diff["numero-ilot-reference"], diff["statut"]))
+    assert statuts == {
+        "B": MODIFICATION,
+        "C": SUPPRESSION,
+        "D": AJOUT,
+        "E": MODIFICATION,
+    }
+    champs = dict(zip(diff["numero-ilot-reference"], diff["champs_modifies"]))
+    assert champs["B"] == "commune"
+    assert champs["E"] == "geometry"
+    assert diff.crs == LAMBERT93
+
+
+def test_diff_layer_duplicate_keys():
+    square = shapely.box(0, 0, 10, 10)
+    old = ilots([("A", "1", square), ("A", "2", square)])
+    new = ilots([("A", "1", square), ("A", "3", square), ("A", "4", square)])
+    diff = diff_layer(old, new, ["numero-ilot-reference"])
+    assert sorted(zip(diff["statut"], diff["commune"])) == [
+        (AJOUT, "4"),
+        (MODIFICATION, "3"),
+    ]
+
+
+def test_diff_xml(tmp_path):
+    old_xml, new_xml, other_xml = (tmp_path / f"{name}.xml" for name in "abc")
+    write_telepac(old_xml, nb_ilots=6, seed=0)
+    write_telepac(new_xml, nb_ilots=7, seed=0)
+    write_telepac(other_xml, nb_ilots=6, seed=0, numero_pacage="031999999")
+
+    identical = diff_xml(old_xml, old_xml)
+    assert all(diff.empty for diff in identical.values())
+
+    # Le septième ilot, tiré après les six premiers, est le seul ajout
+    diff = diff_xml(old_xml, new_xml)
+    assert diff["ilots"]["statut"].tolist() == [AJOUT]
+    assert diff["ilots"]["numero-ilot-reference"].tolist() == ["0310000007"]
+    assert set(diff["parcelles"]["statut"]) == {AJOUT}
+
+    with pytest.raises(ValueError):
+        diff_xml(old_xml, other_xml)
+    assert all(diff.empty for diff in diff_xml(old_xml, other_xml, force=True).values())
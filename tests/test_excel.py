@@ -0,0 +1,63 @@
+"""
+Écriture excel : géométries en WKT pleine précision et textes trop longs
+pour une cellule.
+"""
+
+import os
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import pytest
+import shapely
+
+from output_functions.excel import (
+    LONG_TEXTS_SUFFIX,
+    MAX_CELL_LENGTH,
+    prepare_sheet,
+    write_excel,
+)
+
+openpyxl = pytest.importorskip("openpyxl")
+
+
+def test_prepare_sheet_full_precision():
+    geometries = [
+        shapely.Point(431244.2409999967, 6288499.064),
+        shapely.Polygon([(0.123456789012, 0), (1, 0), (1, 1.000000000001)]),
+    ]
+    df = gpd.GeoDataFrame({"numero-ilot": ["1", "2"]}, geometry=geometries)
+    sheet = prepare_sheet(df, {"numero-ilot": "int"})
+    assert list(sheet["geometry"]) == [str(geometry) for geometry in geometries]
+    assert [shapely.from_wkt(wkt) for wkt in sheet["geometry"]] == geometries
+
+
+def test_write_excel_long_texts(tmp_path):
+    # Polygone dont le WKT dépasse la taille maximale d'une cellule
+    angles = np.linspace(0, 2 * np.pi, 2000, endpoint=False)
+    ring = np.column_stack([430000 + 500 * np.cos(angles), 6280000 + np.sin(angles)])
+    large = shapely.Polygon(ring)
+    small = shapely.Point(430000.5, 6280000.5)
+    assert len(large.wkt) > MAX_CELL_LENGTH
+
+    ilots = gpd.GeoDataFrame(
+        {"numero-ilot": ["1", "2"]}, geometry=[small, large], crs="EPSG:2154"
+    )
+    excel_filename = str(tmp_path / "output.xlsx")
+    write_excel({"ilots": ilots}, excel_filename)
+
+    rows = list(openpyxl.load_workbook(excel_filename)["Ilots"].values)
+    assert rows[1] == (1, small.wkt)
+    assert rows[2][1] == (
+        f"[texte de {len(large.wkt)} caractères, voir output{LONG_TEXTS_SUFFIX}]"
+    )
+
+    long_texts = pd.read_csv(str(tmp_path / f"output{LONG_TEXTS_SUFFIX}"))
+    assert long_texts.to_dict("records") == [
+        {"onglet": "Ilots", "ligne": 3, "colonne": "geometry", "texte": large.wkt}
+    ]
+    assert shapely.from_wkt(long_texts["texte"][0]) == large
+
+    # Une nouvelle écriture sans texte trop long supprime le fichier annexe
+    write_excel({"ilots": ilots.iloc[:1]}, excel_filename)
+    assert not os.path.exists(tmp_path / f"output{LONG_TEXTS_SUFFIX}")
@@ -0,0 +1,103 @@
+"""
+Allègement des couches de la visu Folium (output_functions.geojson) :
+simplification au pixel, arrondi des coordonnées et GeoJSON allégé.
+"""
+
+import json
+
+import geopandas as gpd
+import numpy as np
+import pytest
+import shapely
+
+from extract_functions.backends import parse
+from extract_functions.registry import extract_selected_layers
+from extract_functions.reprojection import LAMBERT93, WGS84, reproject_layers
+from output_functions.geojson import (
+    round_coordinates,
+    simplify_layer,
+    zoom_tolerance,
+)
+from read_xml import FOLIUM_LAYERS, tooltip_fields
+from telepac_synthetique import NAMESPACE, NAMESPACE_GML
+
+# Champs des infobulles de chaque couche de la visu Folium
+FIELDS = {layer: tooltip_fields(style) for layer, style in FOLIUM_LAYERS.items()}
+
+
+def test_zoom_tolerance():
+    # ~0,4 m au zoom 18, deux fois plus à chaque zoom en moins
+    assert zoom_tolerance(18) == pytest.approx(0.42, abs=0.01)
+    assert zoom_tolerance(17) == pytest.approx(2 * zoom_tolerance(18))
+
+
+def test_simplify_layer():
+    # Carré de 100 m dont les côtés ont des sommets alignés à 1 cm près
+    side = np.linspace(0, 100, 11)
+    ring = (
+        [(x, 0.01 * (i % 2)) for i, x in enumerate(side)]
+        + [(100, y) for y in side[1:]]
+        + [(x, 100) for x in side[::-1][1:]]
+        + [(0, y) for y in side[::-1][1:]]
+    )
+    gdf = gpd.GeoDataFrame(
+        {"numero-ilot": ["1"], "autre": ["x"]},
+        geometry=[shapely.Polygon(ring)],
+        crs=LAMBERT93,
+    )
+    simplified = simplify_layer(gdf, ["numero-ilot", "absent"])
+    assert list(simplified.columns) == ["numero-ilot", "geometry"]
+    assert simplified.crs == gdf.crs
+    assert shapely.get_num_coordinates(simplified.geometry.values).tolist() == [5]
+    assert simplified.geometry[0].area == pytest.approx(10000, abs=1)
+    # Au zoom 10 (~150 m par pixel), la topologie est préservée
+    assert simplified.geometry.is_valid.all()
+    assert simplify_layer(gdf, [], zoom=10).geometry.is_valid.all()
+
+
+def test_round_coordinates():
+    gdf = gpd.GeoDataFrame(
+        geometry=[shapely.Point(1.23456789, 45.98765432), None], crs=WGS84
+    )
+    rounded = round_coordinates(gdf, precision=3)
+    assert rounded.crs == gdf.crs
+    assert rounded.geometry[0].coords[0] == (1.235, 45.988)
+    assert rounded.geometry[1] is None
+    # La couche d'origine n'est pas modifiée
+    assert gdf.geometry[0].x == 1.23456789
+
+
+def test_light_geojson(telepac_file):
+    layers = extract_selected_layers(
+        parse(telepac_file),
+        NAMESPACE,
+        NAMESPACE_GML,
+        layers=list(FIELDS),
+        crs=LAMBERT93,
+    )
+
+    # Même enchaînement que visu_folium_layers, avec et sans allègement
+    light = reproject_layers(
+        {layer: simplify_layer(gdf, FIELDS[layer]) for layer, gdf in layers.items()},
+        WGS84,
+    )
+    full = reproject_layers(layers, WGS84)
+    for layer, gdf in layers.items():
+        light_json = round_coordinates(light[layer]).to_json(drop_id=True)
+        full_json = full[layer].to_json()
+        assert len(light_json) < len(full_json)
+
+        features = json.loads(light_json)["features"]
+        assert len(features) == len(gdf)
+        properties = gdf[[field for field in FIELDS[layer] if field in gdf]]
+        assert [feature["properties"] for feature in features] == (
+            json.loads(properties.to_json(orient="records"))
+        )
+        geometries = shapely.from_geojson(
+            [json.dumps(feature["geometry"]) for feature in features]
+        )
+        original = np.asarray(gdf.geometry.array)
+        assert (shapely.get_type_id(geometries) == shapely.get_type_id(original)).all()
+        # Les géométries valides le restent (le fichier de test contient des
+        # géométries invalides, non réparées sans --check_geometries)
+        assert (shapely.is_valid(geometries) | ~shapely.is_valid(original)).all()
@@ -0,0 +1,236 @@
+"""
+Décodage natif des géométries gml (extract_functions.gml) sur des
+échantillons écrits à la main, de coordonnées connues.
+"""
+
+import xml.etree.ElementTree as ET
+
+import numpy as np
+import pytest
+import shapely
+
+from extract_functions import gml
+from telepac_synthetique import NAMESPACE_GML, NAMESPACE_GML_URI
+
+SQUARE = "0 0, 100 0, 100 100, 0 100, 0 0"
+HOLE = "10 10, 20 10, 20 20, 10 20, 10 10"
+
+# (nom, gml, WKT attendu)
+ECHANTILLONS = [
+    (
+        "polygone_gml2_trous",
+        "<gml:Polygon><gml:outerBoundaryIs><gml:LinearRing><gml:coordinates>"
+        "0,0 100,0 100,100 0,100 0,0</gml:coordinates></gml:LinearRing>"
+        "</gml:outerBoundaryIs><gml:innerBoundaryIs><gml:LinearRing>"
+        "<gml:coordinates>10,10 20,10 20,20 10,20 10,10</gml:coordinates>"
+        "</gml:LinearRing></gml:innerBoundaryIs><gml:innerBoundaryIs>"
+        "<gml:LinearRing><gml:coordinates>50,50 60,50 60,60 50,50"
+        "</gml:coordinates></gml:LinearRing></gml:innerBoundaryIs></gml:Polygon>",
+        f"POLYGON (({SQUARE}), ({HOLE}), (50 50, 60 50, 60 60, 50 50))",
+    ),
+    (
+        "polygone_gml3_poslist",
+        "<gml:Polygon><gml:exterior><gml:LinearRing><gml:posList>"
+        "0 0 100 0 100 100 0 100 0 0</gml:posList></gml:LinearRing></gml:exterior>"
+        "<gml:interior><gml:LinearRing><gml:posList>10 10 20 10 20 20 10 20 10 10"
+        "</gml:posList></gml:LinearRing></gml:interior></gml:Polygon>",
+        f"POLYGON (({SQUARE}), ({HOLE}))",
+    ),
+    (
+        "poslist_3d",
+        '<gml:Polygon><gml:exterior><gml:LinearRing><gml:posList srsDimension="3">'
+        "0 0 1 100 0 2 100 100 3 0 0 1</gml:posList></gml:LinearRing>"
+        "</gml:exterior></gml:Polygon>",
+        "POLYGON Z ((0 0 1, 100 0 2, 100 100 3, 0 0 1))",
+    ),
+    (
+        "anneau_3d",
+        '<gml:Polygon><gml:exterior><gml:LinearRing srsDimension="3"><gml:posList>'
+        "0 0 5 100 0 5 100 100 5 0 0 5</gml:posList></gml:LinearRing>"
+        "</gml:exterior></gml:Polygon>",
+        "POLYGON Z ((0 0 5, 100 0 5, 100 100 5, 0 0 5))",
+    ),
+    (
+        "liste_pos",
+        "<gml:Polygon><gml:exterior><gml:LinearRing><gml:pos>0 0</gml:pos>"
+        "<gml:pos>100 0</gml:pos><gml:pos>100 100</gml:pos><gml:pos>0 100</gml:pos>"
+        "<gml:pos>0 0</gml:pos></gml:LinearRing></gml:exterior></gml:Polygon>",
+        f"POLYGON (({SQUARE}))",
+    ),
+    (
+        "liste_coord",
+        "<gml:Polygon><gml:outerBoundaryIs><gml:LinearRing>"
+        "<gml:coord><gml:X>0</gml:X><gml:Y>0</gml:Y></gml:coord>"
+        "<gml:coord><gml:X>50.5</gml:X><gml:Y>0</gml:Y></gml:coord>"
+        "<gml:coord><gml:X>50.5</gml:X><gml:Y>25.25</gml:Y></gml:coord>"
+        "<gml:coord><gml:X>0</gml:X><gml:Y>0</gml:Y></gml:coord>"
+        "</gml:LinearRing></gml:outerBoundaryIs></gml:Polygon>",
+        "POLYGON ((0 0, 50.5 0, 50.5 25.25, 0 0))",
+    ),
+    (
+        "separateurs",
+        "<gml:Polygon><gml:outerBoundaryIs><gml:LinearRing>"
+        '<gml:coordinates cs=";" ts="|" decimal=",">'
+        "0;0|10,5;0|10,5;20,25|0;0</gml:coordinates></gml:LinearRing>"
+        "</gml:outerBoundaryIs></gml:Polygon>",
+        "POLYGON ((0 0, 10.5 0, 10.5 20.25, 0 0))",
+    ),
+    (
+        "point_gml2",
+        "<gml:Point><gml:coordinates>431244.2409999967,6288499.064"
+        "</gml:coordinates></gml:Point>",
+        "POINT (431244.2409999967 6288499.064)",
+    ),
+    (
+        "point_pos",
+        "<gml:Point><gml:pos>425133.3533 6289122.005</gml:pos></gml:Point>",
+        "POINT (425133.3533 6289122.005)",
+    ),
+    (
+        "point_pos_3d",
+        '<gml:Point srsDimension="3"><gml:pos>1.5 2.5 3.5</gml:pos></gml:Point>',
+        "POINT Z (1.5 2.5 3.5)",
+    ),
+    (
+        "multisurface",
+        "<gml:MultiSurface><gml:surfaceMember><gml:Polygon><gml:exterior>"
+        "<gml:LinearRing><gml:posList>0 0 100 0 100 100 0 100 0 0</gml:posList>"
+        "</gml:LinearRing></gml:exterior><gml:interior><gml:LinearRing>"
+        "<gml:posList>10 10 20 10 20 20 10 20 10 10</gml:posList></gml:LinearRing>"
+        "</gml:interior></gml:Polygon></gml:surfaceMember><gml:surfaceMember>"
+        "<gml:Polygon><gml:exterior><gml:LinearRing><gml:posList>"
+        "200 200 300 200 300 300 200 200</gml:posList></gml:LinearRing>"
+        "</gml:exterior></gml:Polygon></gml:surfaceMember></gml:MultiSurface>",
+        f"MULTIPOLYGON ((({SQUARE}), ({HOLE})), ((200 200, 300 200, 300 300, "
+        "200 200)))",
+    ),
+    (
+        "multipolygon_gml2",
+        "<gml:MultiPolygon><gml:polygonMember><gml:Polygon><gml:outerBoundaryIs>"
+        "<gml:LinearRing><gml:coordinates>0,0 100,0 100,100 0,100 0,0"
+        "</gml:coordinates></gml:LinearRing></gml:outerBoundaryIs></gml:Polygon>"
+        "</gml:polygonMember><gml:polygonMember><gml:Polygon><gml:outerBoundaryIs>"
+        "<gml:LinearRing><gml:coordinates>200,200 300,200 300,300 200,200"
+        "</gml:coordinates></gml:LinearRing></gml:outerBoundaryIs></gml:Polygon>"
+        "</gml:polygonMember></gml:MultiPolygon>",
+        f"MULTIPOLYGON ((({SQUARE})), ((200 200, 300 200, 300 300, 200 200)))",
+    ),
+]
+
+IDS = [name for name, _, _ in ECHANTILLONS]
+
+
+def parse_gml(txt):
+    """
+    Élément gml à partir d'un texte sans déclaration de namespace.
+    """
+    root = ET.fromstring(f'<racine xmlns:gml="{NAMESPACE_GML_URI}">{txt}</racine>')
+    return root[0]
+
+
+def assert_same_geometry(result, expected):
+    """
+    Même type, mêmes anneaux et mêmes coordonnées, z compris.
+    """
+    assert result.geom_type == expected.geom_type
+    assert result.has_z == expected.has_z
+    assert shapely.equals_exact(result, expected, tolerance=0)
+    np.testing.assert_array_equal(
+        shapely.get_coordinates(result, include_z=result.has_z),
+        shapely.get_coordinates(expected, include_z=expected.has_z),
+    )
+
+
+@pytest.mark.parametrize("txt, wkt", [e[1:] for e in ECHANTILLONS], ids=IDS)
+def test_read_geometry(txt, wkt):
+    decoded = gml.read_geometry(parse_gml(txt), NAMESPACE_GML)
+    assert decoded[0] != gml.GEOMETRY or decoded[1].geom_type == "MultiPolygon"
+    (geometry,) = gml.build_geometries([decoded])
+    assert_same_geometry(geometry, shapely.from_wkt(wkt))
+
+
+def test_build_geometries_batch():
+    # Construction en bloc, 2D et 3D mêlées, dans l'ordre des échantillons
+    decoded = [
+        gml.read_geometry(parse_gml(txt), NAMESPACE_GML) for _, txt, _ in ECHANTILLONS
+    ]
+    geometries = gml.build_geometries(decoded)
+    for geometry, (_, _, wkt) in zip(geometries, ECHANTILLONS):
+        assert_same_geometry(geometry, shapely.from_wkt(wkt))
+
+
+def test_unsupported_without_gdal(monkeypatch):
+    monkeypatch.setattr(gml, "load_ogr", lambda: None)
+    line = parse_gml(
+        "<gml:LineString><gml:posList>0 0 1 1</gml:posList></gml:LineString>"
+    )
+    with pytest.raises(ValueError, match="LineString"):
+        gml.read_geometry(line, NAMESPACE_GML)
+
+
+@pytest.mark.parametrize("txt", [e[1] for e in ECHANTILLONS], ids=IDS)
+def test_gdal_parity(txt):
+    if gml.load_ogr() is None:
+        pytest.skip("GDAL absent")
+    elem = parse_gml(txt)
+    (geometry,) = gml.build_geometries([gml.read_geometry(elem, NAMESPACE_GML)])
+    assert_same_geometry(geometry, gml.ogr_geometry(elem))
+
+
+def polygon_gml(exterior, *interiors):
+    """
+    gml:Polygon (GML 2) de coordonnées gml:coordinates données.
+    """
+    rings = "".join(
+        f"<gml:{boundary}><gml:LinearRing><gml:coordinates>{text}"
+        f"</gml:coordinates></gml:LinearRing></gml:{boundary}>"
+        for boundary, text in [("outerBoundaryIs", exterior)]
+        + [("innerBoundaryIs", text) for text in interiors]
+    )
+    return f"<gml:Polygon>{rings}</gml:Polygon>"
+
+
+def test_empty_coordinates():
+    square = "0,0 100,0 100,100 0,100 0,0"
+    samples = [
+        (polygon_gml(square), f"POLYGON (({SQUARE}))"),
+        (polygon_gml(""), "POLYGON EMPTY"),
+        (polygon_gml(square), f"POLYGON (({SQUARE}))"),
+        (polygon_gml(" \n\t "), "POLYGON EMPTY"),
+        # Trou sans coordonnées ignoré
+        (polygon_gml(square, "", " "), f"POLYGON (({SQUARE}))"),
+        (
+            "<gml:Polygon><gml:exterior><gml:LinearRing><gml:posList> "
+            "</gml:posList></gml:LinearRing></gml:exterior></gml:Polygon>",
+            "POLYGON EMPTY",
+        ),
+        ("<gml:Point><gml:coordinates> </gml:coordinates></gml:Point>", "POINT EMPTY"),
+        (
+            "<gml:Point><gml:coordinates>5,7</gml:coordinates></gml:Point>",
+            "POINT (5 7)",
+        ),
+        (
+            "<gml:MultiPolygon><gml:polygonMember>"
+            + polygon_gml("")
+            + "</gml:polygonMember><gml:polygonMember>"
+            + polygon_gml(square)
+            + "</gml:polygonMember></gml:MultiPolygon>",
+            f"MULTIPOLYGON ((({SQUARE})))",
+        ),
+        (
+            "<gml:MultiPolygon><gml:polygonMember>"
+            + polygon_gml("")
+            + "</gml:polygonMember></gml:MultiPolygon>",
+            "MULTIPOLYGON EMPTY",
+        ),
+        (
+            polygon_gml("200,200 300,200 300,300 200,200"),
+            "POLYGON ((200 200, 300 200, 300 300, 200 200))",
+        ),
+    ]
+    decoded = [gml.read_geometry(parse_gml(txt), NAMESPACE_GML) for txt, _ in samples]
+    # Les géométries gardent la position de leur élément
+    geometries = gml.build_geometries(decoded)
+    assert len(geometries) == len(samples)
+    for geometry, (_, wkt) in zip(geometries, samples):
+        assert_same_geometry(geometry, shapely.from_wkt(wkt))
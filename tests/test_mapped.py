@@ -0,0 +1,60 @@
+"""
+Lecture projetée en mémoire (mmap) : bornes des enregistrements repérées
+sur les octets et couches identiques à celles de la lecture en flux.
+"""
+
+import pytest
+from helpers import assert_layers_equal
+
+from extract_functions.backends import BACKENDS, parse
+from extract_functions.mapped import (
+    map_file,
+    parse_mapped,
+    record_spans,
+    scan_boundaries,
+)
+from extract_functions.streaming import extract_layers_streaming
+from telepac_synthetique import NAMESPACE, NAMESPACE_GML
+
+
+def test_scan_boundaries(telepac_file):
+    with map_file(telepac_file) as buffer:
+        boundaries = scan_boundaries(buffer)
+        records = boundaries["records"]
+        assert boundaries["encoding"] == "UTF-8"
+        assert len(boundaries["producteurs"]) == 1
+        assert [tag for tag, _, _ in records].count("ilot") == 30
+        assert [tag for tag, _, _ in records].count("sna-declaree") == 40
+        for tag, start, stop in records:
+            assert buffer[start : start + len(tag) + 1] == f"<{tag}".encode()
+            assert buffer[stop - len(tag) - 3 : stop] == f"</{tag}>".encode()
+
+        spans = record_spans(buffer, boundaries, size=1)
+        assert sum(count for *_, count in spans) == len(records)
+        grouped = record_spans(buffer, boundaries)
+        assert [tag for tag, *_ in grouped] == ["ilot", "sna-declaree", "zdh-declaree"]
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+@pytest.mark.parametrize(
+    "layers", [None, ["demandeur"], ["sna"], ["parcelles", "zdh", "sna_ilots"]]
+)
+def test_mapped_matches_streaming(variant_files, backend, layers):
+    for xml_file in variant_files.values():
+        expected = extract_layers_streaming(
+            xml_file, NAMESPACE, NAMESPACE_GML, layers, backend=backend
+        )
+        mapped = extract_layers_streaming(
+            xml_file, NAMESPACE, NAMESPACE_GML, layers, backend=backend, mapped=True
+        )
+        assert_layers_equal(mapped, expected)
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_parse_mapped_matches_parse(variant_files, backend):
+    for xml_file in variant_files.values():
+        expected = parse(xml_file, backend=backend)
+        mapped = parse_mapped(xml_file, backend=backend)
+        assert [(e.tag, e.text, dict(e.attrib)) for e in mapped.iter()] == [
+            (e.tag, e.text, dict(e.attrib)) for e in expected.iter()
+        ]
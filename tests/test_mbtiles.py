@@ -0,0 +1,296 @@
+"""
+Export MBTiles (output_functions.mbtiles) : tuiles relues avec un lecteur
+protobuf minimal (messages Tile, Layer, Feature et Value de MVT 2.1).
+"""
+
+import gzip
+import json
+import sqlite3
+import struct
+
+import geopandas as gpd
+import numpy as np
+import pytest
+import shapely
+
+from output_functions import mbtiles
+from output_functions.mbtiles import (
+    CLOSE_PATH,
+    EXTENT,
+    HALF_WORLD,
+    LINE_TO,
+    MOVE_TO,
+    POLYGON,
+    encode_geometries,
+    encode_layer,
+    export_mbtiles,
+    write_mbtiles,
+)
+
+
+def read_varint(data, position):
+    """
+    Entier protobuf à la position position : (valeur, position suivante).
+    """
+    value = shift = 0
+    while True:
+        byte = data[position]
+        position += 1
+        value |= (byte & 0x7F) << shift
+        shift += 7
+        if byte < 0x80:
+            return value, position
+
+
+def read_fields(data):
+    """
+    Champs d'un message protobuf : liste de (numéro, valeur), la valeur étant
+    un entier (varint), des octets (longueur variable) ou 8 octets (fixe).
+    """
+    fields = []
+    position = 0
+    while position < len(data):
+        key, position = read_varint(data, position)
+        number, wire_type = key >> 3, key & 7
+        if wire_type == 0:
+            value, position = read_varint(data, position)
+        elif wire_type == 1:
+            value, position = data[position : position + 8], position + 8
+        elif wire_type == 2:
+            size, position = read_varint(data, position)
+            value, position = data[position : position + size], position + size
+        else:
+            raise ValueError(f"Type protobuf inattendu : {wire_type}")
+        fields.append((number, value))
+    return fields
+
+
+def read_packed(data):
+    """
+    Entiers compactés (packed) d'un champ protobuf.
+    """
+    values = []
+    position = 0
+    while position < len(data):
+        value, position = read_varint(data, position)
+        values.append(value)
+    return values
+
+
+def unzigzag(value):
+    return (value >> 1) ^ -(value & 1)
+
+
+def read_value(data):
+    """
+    Message Value : valeur Python du type encodé.
+    """
+    ((number, value),) = read_fields(data)
+    if number == 1:
+        return value.decode("utf-8")
+    if number == 3:
+        return struct.unpack("<d", value)[0]
+    if number == 6:
+        return unzigzag(value)
+    if number == 7:
+        return bool(value)
+    raise ValueError(f"Champ Value inattendu : {number}")
+
+
+def read_tile(data):
+    """
+    Tuile décodée : {couche: (version, extent, [(id, type, commandes,
+    propriétés)])}.
+    """
+    layers = {}
+    for number, layer in read_fields(data):
+        assert number == 3
+        fields = read_fields(layer)
+        keys = [value.decode("utf-8") for n, value in fields if n == 3]
+        values = [read_value(value) for n, value in fields if n == 4]
+        features = []
+        for feature in (value for n, value in fields if n == 2):
+            feature = dict(read_fields(feature))
+            tags = read_packed(feature[2])
+            properties = {keys[k]: values[v] for k, v in zip(tags[::2], tags[1::2])}
+            features.append(
+                (feature[1], feature[3], read_packed(feature[4]), properties)
+            )
+        name = next(value for n, value in fields if n == 1).decode("utf-8")
+        layers[name] = (
+            next(value for n, value in fields if n == 15),
+            next(value for n, value in fields if n == 5),
+            features,
+        )
+    return layers
+
+
+def decode_commands(commands):
+    """
+    Anneaux (coordonnées absolues) des commandes MVT d'un polygone.
+    """
+    rings = []
+    x = y = 0
+    position = 0
+    while position < len(commands):
+        command_id, count = commands[position] & 7, commands[position] >> 3
+        position += 1
+        if command_id == CLOSE_PATH:
+            continue
+        for _ in range(count):
+            x += unzigzag(commands[position])
+            y += unzigzag(commands[position + 1])
+            position += 2
+            if command_id == MOVE_TO:
+                rings.append([])
+            rings[-1].append((x, y))
+    return rings
+
+
+def test_geometry_commands():
+    square = shapely.Polygon([(0, 0), (10, 0), (10, 10), (0, 10), (0, 0)])
+    other = shapely.Polygon([(20, 20), (30, 20), (30, 30), (20, 30), (20, 20)])
+    geometries = np.array(
+        [
+            square,
+            shapely.Point(5, 7),
+            shapely.LineString([(1, 1), (3, 4)]),
+            shapely.MultiPolygon([square, other]),
+            shapely.Polygon(),
+        ]
+    )
+    encoded = encode_geometries(geometries)
+
+    moveto, lineto3, close = MOVE_TO | 1 << 3, LINE_TO | 3 << 3, CLOSE_PATH | 1 << 3
+    square_commands = [moveto, 0, 0, lineto3, 20, 0, 0, 20, 19, 0, close]
+    assert encoded[0] == (POLYGON, bytes(square_commands))
+    # Point : zigzag(5) = 10, zigzag(7) = 14
+    assert encoded[1] == (1, bytes([moveto, 10, 14]))
+    assert encoded[2] == (2, bytes([moveto, 2, 2, LINE_TO | 1 << 3, 4, 6]))
+    # Le curseur continue d'une partie à l'autre : dernier sommet (0, 10)
+    # du premier carré, d'où (20, 10) relatif pour (20, 20)
+    assert encoded[3] == (
+        POLYGON,
+        bytes(square_commands + [moveto, 40, 20] + square_commands[3:]),
+    )
+    assert encoded[4] is None
+    assert decode_commands(list(encoded[3][1])) == [
+        [(0, 0), (10, 0), (10, 10), (0, 10)],
+        [(20, 20), (30, 20), (30, 30), (20, 30)],
+    ]
+
+
+def test_encode_layer_values():
+    commands = encode_geometries(np.array([shapely.Point(1, 2)]))[0]
+    properties = (
+        ("entier", (int, -3)),
+        ("grand", (int, 300)),
+        ("reel", (float, 2.5)),
+        ("texte", (str, "été")),
+        ("booleen", (bool, True)),
+        # 1, 1.0 et True restent des valeurs distinctes
+        ("un", (int, 1)),
+        ("un_reel", (float, 1.0)),
+        ("vrai", (bool, True)),
+    )
+    layer = encode_layer("sna", [(7, *commands, properties)])
+    version, extent, features = read_tile(layer)["sna"]
+    assert (version, extent) == (2, EXTENT)
+    ((feature_id, kind, geometry, values),) = features
+    assert (feature_id, kind, geometry) == (7, 1, [9, 2, 4])
+    assert values == {
+        "entier": -3,
+        "grand": 300,
+        "reel": 2.5,
+        "texte": "été",
+        "booleen": True,
+        "un": 1,
+        "un_reel": 1.0,
+        "vrai": True,
+    }
+    assert [type(values[key]) for key in ("un", "un_reel", "vrai")] == [
+        int,
+        float,
+        bool,
+    ]
+
+
+@pytest.fixture
+def sna_layer(monkeypatch):
+    """
+    Couche sna d'un polygone en Web Mercator, champs de chaque type.
+    """
+    monkeypatch.setitem(
+        mbtiles.TILE_FIELDS, "sna", ("entier", "reel", "texte", "booleen")
+    )
+    return gpd.GeoDataFrame(
+        {
+            "entier": [12],
+            "reel": [0.25],
+            "texte": ["HAIE"],
+            "booleen": [True],
+            "ignore": ["x"],
+        },
+        geometry=[shapely.box(1e6, 1e6, 2e6, 2e6)],
+        crs="EPSG:3857",
+    )
+
+
+def test_write_mbtiles(tmp_path, sna_layer):
+    mbtiles_file = str(tmp_path / "tuiles.mbtiles")
+    assert write_mbtiles({"sna": sna_layer}, mbtiles_file, 1, 2) == 2
+
+    connection = sqlite3.connect(mbtiles_file)
+    tiles = connection.execute(
+        "SELECT zoom_level, tile_column, tile_row, tile_data FROM tiles "
+        "ORDER BY zoom_level"
+    ).fetchall()
+    metadata = dict(connection.execute("SELECT name, value FROM metadata"))
+    connection.close()
+
+    # Tuiles XYZ (1, 0) et (2, 1) : lignes TMS numérotées du sud au nord
+    assert [tile[:3] for tile in tiles] == [(1, 1, 1 - 0), (2, 2, 3 - 1)]
+
+    zoom, _, _, data = tiles[1]
+    ((_, kind, commands, properties),) = read_tile(gzip.decompress(data))["sna"][2]
+    assert kind == POLYGON
+    assert properties == {"entier": 12, "reel": 0.25, "texte": "HAIE", "booleen": True}
+    size = 2 * HALF_WORLD / 2**zoom
+    pixel = size / EXTENT
+    (ring,) = decode_commands(commands)
+    low, high = round(1e6 / pixel), round(2e6 / pixel)
+    top, bottom = round((size - 2e6) / pixel), round((size - 1e6) / pixel)
+    assert sorted(ring) == sorted(
+        [(low, top), (high, top), (high, bottom), (low, bottom)]
+    )
+
+    assert metadata["name"] == "telepac"
+    assert metadata["format"] == "pbf"
+    assert (metadata["minzoom"], metadata["maxzoom"]) == ("1", "2")
+    west, south, east, north = map(float, metadata["bounds"].split(","))
+    assert west == pytest.approx(1e6 / HALF_WORLD * 180, abs=1e-6)
+    assert east == pytest.approx(2e6 / HALF_WORLD * 180, abs=1e-6)
+    assert 0 < south < north < 85
+    assert metadata["center"].endswith(",1")
+    (vector_layer,) = json.loads(metadata["json"])["vector_layers"]
+    assert vector_layer["id"] == "sna"
+    assert list(vector_layer["fields"]) == ["entier", "reel", "texte", "booleen"]
+
+
+def test_export_mbtiles(tmp_path, sna_layer):
+    pytest.importorskip("pyarrow")
+    from output_functions.parquet import write_layers_parquet
+
+    parquet_dir = str(tmp_path / "parquet")
+    write_layers_parquet(
+        {"sna": sna_layer}, parquet_dir, numero_pacage="031000001", campagne="2024"
+    )
+    mbtiles_file = str(tmp_path / "tuiles.mbtiles")
+    assert export_mbtiles(parquet_dir, mbtiles_file, min_zoom=2, max_zoom=2) == 1
+
+    connection = sqlite3.connect(mbtiles_file)
+    (data,) = connection.execute("SELECT tile_data FROM tiles").fetchone()
+    connection.close()
+    ((_, _, _, properties),) = read_tile(gzip.decompress(data))["sna"][2]
+    assert properties["campagne"] == "2024"
+    assert properties["numero-pacage"] == "031000001"
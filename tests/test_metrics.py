@@ -0,0 +1,171 @@
+"""
+Mesures des étapes du traitement (extract_functions.metrics) : durée, pic de
+mémoire, entités et sommets, agrégation d'un lot et profil d'exécution.
+"""
+
+import json
+import pstats
+import time
+import tracemalloc
+
+import geopandas as gpd
+import pandas as pd
+import pytest
+import shapely
+
+from extract_functions.metrics import (
+    Metrics,
+    aggregate_reports,
+    count_layers,
+    measure,
+    profiled,
+)
+
+
+@pytest.fixture
+def no_tracing():
+    if tracemalloc.is_tracing():
+        pytest.skip("tracemalloc déjà démarré")
+    yield
+    tracemalloc.stop()
+
+
+def test_stage_duration_and_memory(no_tracing):
+    metrics = Metrics("telepac.xml", memory=True)
+    assert tracemalloc.is_tracing()
+    with metrics.stage("extract_ilots") as record:
+        data = bytearray(8 * 1024**2)
+        time.sleep(0.01)
+    del data
+    with metrics.stage("excel"):
+        pass
+
+    first, second = metrics.stages
+    assert first is record and first["etape"] == "extract_ilots"
+    assert first["duree"] >= 0.01
+    # Pic de l'étape (8 Mo alloués), remis à zéro à l'étape suivante
+    assert 8 <= first["memoire_max_mo"] < 16
+    assert second["memoire_max_mo"] < 8
+
+    report = metrics.report()
+    assert report["fichier"] == "telepac.xml"
+    assert report["etapes"] == [first, second]
+    assert report["duree"] >= first["duree"]
+
+    metrics.stop()
+    assert not tracemalloc.is_tracing()
+
+
+def test_stop_keeps_external_tracing(no_tracing):
+    tracemalloc.start()
+    metrics = Metrics(memory=True)
+    metrics.stop()
+    assert tracemalloc.is_tracing()
+
+
+def test_without_memory(no_tracing):
+    metrics = Metrics()
+    with metrics.stage("parse") as record:
+        pass
+    assert not tracemalloc.is_tracing()
+    assert set(record) == {"etape", "duree"}
+    # Sans Metrics, aucune mesure
+    with measure(None, "parse") as record:
+        pass
+    assert record == {}
+
+
+def test_count_layers():
+    layers = {
+        "ilots": gpd.GeoDataFrame(
+            {"numero-ilot": ["1", "2"]},
+            geometry=[shapely.box(0, 0, 1, 1), shapely.Point(0, 0)],
+        ),
+        "vide": gpd.GeoDataFrame(geometry=[]),
+        "demandeur": pd.DataFrame({"numero-pacage": ["031000001"]}),
+    }
+    record = count_layers({"etape": "extract"}, layers)
+    assert record["entites"] == {"ilots": 2, "vide": 0, "demandeur": 1}
+    # 5 sommets du carré (anneau fermé) et 1 du point
+    assert record["sommets"] == {"ilots": 6, "vide": 0}
+
+
+def test_aggregate_reports():
+    reports = [
+        {
+            "duree": 1.0,
+            "etapes": [
+                {"etape": "parse", "duree": 0.5, "memoire_max_mo": 10.0},
+                {
+                    "etape": "extract_ilots",
+                    "duree": 0.25,
+                    "entites": {"ilots": 3},
+                    "sommets": {"ilots": 30},
+                },
+            ],
+        },
+        {
+            "duree": 2.0,
+            "etapes": [
+                {"etape": "parse", "duree": 1.5, "memoire_max_mo": 4.0},
+                {
+                    "etape": "extract_ilots",
+                    "duree": 0.5,
+                    "entites": {"ilots": 2},
+                    "sommets": {"ilots": 20},
+                },
+            ],
+        },
+    ]
+    assert aggregate_reports(reports) == {
+        "fichiers": 2,
+        "duree": 3.0,
+        "etapes": {
+            "parse": {
+                "fichiers": 2,
+                "duree": 2.0,
+                "duree_max": 1.5,
+                "memoire_max_mo": 10.0,
+            },
+            "extract_ilots": {
+                "fichiers": 2,
+                "duree": 0.75,
+                "duree_max": 0.5,
+                "entites": {"ilots": 5},
+                "sommets": {"ilots": 50},
+            },
+        },
+    }
+    assert aggregate_reports([]) == {"fichiers": 0, "duree": 0, "etapes": {}}
+
+
+def test_write_json(tmp_path):
+    metrics = Metrics("é.xml")
+    with metrics.stage("parse"):
+        pass
+    metrics.write_json(tmp_path / "metrics.json")
+    report = json.loads((tmp_path / "metrics.json").read_text(encoding="utf-8"))
+    assert report["fichier"] == "é.xml"
+    assert [record["etape"] for record in report["etapes"]] == ["parse"]
+
+
+def workload(n, offset=0):
+    return sum(range(n)) + offset
+
+
+def test_profiled(tmp_path):
+    profile_file = str(tmp_path / "profil.prof")
+    assert profiled(workload, profile_file)(1000, offset=1) == 499501
+    stats = pstats.Stats(profile_file)
+    assert any(name == "workload" for _, _, name in stats.stats)
+
+
+def test_profiled_exception(tmp_path):
+    def failing():
+        raise ValueError("échec")
+
+    profile_file = str(tmp_path / "profil.prof")
+    with pytest.raises(ValueError, match="échec"):
+        profiled(failing, profile_file)()
+    # Le profil est écrit même si la fonction échoue
+    pstats.Stats(profile_file)
@@ -0,0 +1,28 @@
+"""
+Extraction parallèle (plages d'enregistrements réparties sur un pool de
+processus) : couches identiques à celles de l'extraction en série.
+"""
+
+import pytest
+from helpers import assert_layers_equal
+
+from extract_functions import parallel
+from extract_functions.backends import BACKENDS
+from extract_functions.streaming import extract_layers_streaming
+from telepac_synthetique import NAMESPACE, NAMESPACE_GML
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+@pytest.mark.parametrize("layers", [None, ["demandeur"], ["sna_parcelles", "zdh"]])
+def test_parallel_matches_serial(monkeypatch, variant_files, backend, layers):
+    # Plages minuscules : chaque couche est réunie à partir de nombreux
+    # morceaux (colonnes et catégories différentes d'un morceau à l'autre)
+    monkeypatch.setattr(parallel, "MIN_SPAN_SIZE", 2000)
+    for xml_file in variant_files.values():
+        expected = extract_layers_streaming(
+            xml_file, NAMESPACE, NAMESPACE_GML, layers, backend=backend
+        )
+        extracted = parallel.extract_layers_parallel(
+            xml_file, NAMESPACE, NAMESPACE_GML, layers, backend=backend, workers=2
+        )
+        assert_layers_equal(extracted, expected)
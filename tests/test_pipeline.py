@@ -0,0 +1,87 @@
+"""
+Extraction en pipeline (extract_functions.pipeline) : couches identiques à
+l'extraction en série, et erreur d'un extracteur reportée à l'appelant et
+aux couches qui l'attendent.
+"""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import pytest
+
+from extract_functions import extract_demandeur, extract_sna
+from extract_functions.backends import parse
+from extract_functions.pipeline import (
+    LayerFutures,
+    extract_layers_pipeline,
+    pending_layers,
+)
+from extract_functions.registry import extract_selected_layers
+from telepac_synthetique import NAMESPACE, NAMESPACE_GML
+
+LAYERS = ["ilots", "parcelles", "sna", "sna_ilots", "demandeur"]
+
+
+class ExtractorError(Exception):
+    pass
+
+
+def failing(*args, **kwargs):
+    raise ExtractorError("extracteur en échec")
+
+
+def run(telepac_file, streaming=False):
+    futures = pending_layers(LAYERS)
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        extract_layers_pipeline(
+            telepac_file,
+            NAMESPACE,
+            NAMESPACE_GML,
+            futures,
+            executor,
+            streaming=streaming,
+        )
+        return LayerFutures(futures), futures
+
+
+@pytest.mark.parametrize("streaming", [False, True])
+def test_same_layers(telepac_file, streaming):
+    layers, _ = run(telepac_file, streaming)
+    expected = extract_selected_layers(
+        parse(telepac_file), NAMESPACE, NAMESPACE_GML, layers=LAYERS
+    )
+    assert list(layers) == list(expected)
+    for layer in expected:
+        pd.testing.assert_frame_equal(layers[layer], expected[layer])
+
+
+@pytest.mark.parametrize(
+    "module, name",
+    [
+        # Pendant la lecture, dans le thread appelant
+        (extract_sna, "collect_sna"),
+        # À la lecture du squelette, les couches des ilots étant en cours de
+        # construction dans le pool
+        (extract_demandeur, "extract_demandeur"),
+    ],
+)
+def test_reader_error(telepac_file, monkeypatch, caplog, module, name):
+    monkeypatch.setattr(module, name, failing)
+    for _ in range(5):
+        with pytest.raises(ExtractorError):
+            run(telepac_file)
+    # Aucune erreur dans les callbacks des futures (future déjà terminé)
+    assert not [record for record in caplog.records if record.levelno >= logging.ERROR]
+
+
+def test_build_error(telepac_file, monkeypatch):
+    # Erreur de construction de la couche sna dans le pool : reportée sur la
+    # couche et sur sa table de relations, les autres couches aboutissent
+    monkeypatch.setattr(extract_sna, "build_sna", failing)
+    layers, futures = run(telepac_file)
+    for layer in ("sna", "sna_ilots"):
+        with pytest.raises(ExtractorError):
+            layers[layer]
+    assert futures["sna"].exception() is futures["sna_ilots"].exception()
+    assert len(layers["ilots"]) == 30
@@ -0,0 +1,56 @@
+"""
+Script read_xml : sorties Parquet d'une sélection de couches et options
+incompatibles.
+"""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+from conftest import ROOT_DIR
+from read_xml import process_xml
+
+
+@pytest.mark.parametrize("mode", [[], ["--streaming"], ["--pipeline"]])
+def test_layers_parquet_partitions(tmp_path, telepac_file, mode):
+    # Le numéro pacage et la campagne des partitions sont lus même si le
+    # demandeur et les aides PAC ne sont pas demandés
+    parquet_dir = tmp_path / "parquet"
+    subprocess.run(
+        [
+            sys.executable,
+            "read_xml.py",
+            telepac_file,
+            "--layers",
+            "parcelles",
+            "--parquet_dir",
+            str(parquet_dir),
+            "--output_dir",
+            str(tmp_path / "sorties"),
+        ]
+        + mode,
+        cwd=os.path.join(ROOT_DIR, "src"),
+        check=True,
+        capture_output=True,
+    )
+    assert os.listdir(parquet_dir / "parcelles") == ["campagne=2024"]
+    assert os.listdir(parquet_dir / "parcelles" / "campagne=2024") == [
+        "numero-pacage=031000001"
+    ]
+
+
+def test_pipeline_workers_rejected(telepac_file, tmp_path):
+    # --workers n'est pas ignoré en silence avec --pipeline
+    completed = subprocess.run(
+        [sys.executable, "read_xml.py", telepac_file, "--pipeline", "--workers", "2"],
+        cwd=os.path.join(ROOT_DIR, "src"),
+        capture_output=True,
+        text=True,
+    )
+    assert completed.returncode == 2
+    assert "--workers est incompatible avec --pipeline" in completed.stderr
+
+    with pytest.raises(ValueError, match="workers"):
+        process_xml(telepac_file, str(tmp_path), pipeline=True, workers=2)
@@ -0,0 +1,77 @@
+"""
+Reprojection en bloc des couches (extract_functions.reprojection) : mêmes
+géométries qu'un to_crs par couche, avec un transformateur partagé.
+"""
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import shapely
+from pyproj import CRS
+
+from extract_functions.backends import parse
+from extract_functions.registry import extract_selected_layers
+from extract_functions.reprojection import (
+    LAMBERT93,
+    WGS84,
+    get_transformer,
+    reproject_layers,
+)
+from telepac_synthetique import NAMESPACE, NAMESPACE_GML
+
+
+def test_matches_to_crs(telepac_file):
+    layers = extract_selected_layers(
+        parse(telepac_file), NAMESPACE, NAMESPACE_GML, crs=LAMBERT93
+    )
+    layers["vide"] = gpd.GeoDataFrame({"a": []}, geometry=[], crs=LAMBERT93)
+    layers["altitude"] = gpd.GeoDataFrame(
+        geometry=[
+            shapely.Point(700000, 6600000, 150),
+            shapely.Point(700100, 6600100),
+            shapely.LineString([(700000, 6600000, 1), (700100, 6600100, 2)]),
+            None,
+        ],
+        crs=LAMBERT93,
+    )
+    geo_layers = [name for name, df in layers.items() if hasattr(df, "crs")]
+    assert {"ilots", "parcelles", "sna", "zdh"} <= set(geo_layers)
+
+    reprojected = reproject_layers(layers, WGS84)
+    for name, df in layers.items():
+        if name not in geo_layers:
+            assert reprojected[name] is df
+            continue
+        expected = df.to_crs(WGS84)
+        assert reprojected[name].crs == expected.crs
+        pd.testing.assert_frame_equal(
+            reprojected[name].drop(columns="geometry"),
+            expected.drop(columns="geometry"),
+        )
+        geometries = np.asarray(reprojected[name].geometry.array)
+        expected = np.asarray(expected.geometry.array)
+        assert (shapely.has_z(geometries) == shapely.has_z(expected)).all()
+        assert shapely.equals_exact(geometries, expected, tolerance=1e-9)[
+            ~shapely.is_missing(expected)
+        ].all()
+        assert shapely.is_missing(geometries).tolist() == (
+            shapely.is_missing(expected).tolist()
+        )
+        # La couche d'origine n'est pas modifiée
+        assert df.crs == LAMBERT93
+
+    altitude = np.asarray(reprojected["altitude"].geometry.array)
+    z = shapely.get_coordinates(altitude, include_z=True)[:, 2]
+    assert z[0] == 150 and np.isnan(z[1]) and z[2:].tolist() == [1, 2]
+
+
+def test_shared_transformer():
+    layer = gpd.GeoDataFrame(geometry=[shapely.Point(700000, 6600000)], crs=LAMBERT93)
+    source, target = CRS.from_user_input(LAMBERT93), CRS.from_user_input(WGS84)
+    transformer = get_transformer(source, target)
+
+    hits = get_transformer.cache_info().hits
+    for _ in range(2):
+        reproject_layers({"a": layer, "b": layer.copy()}, WGS84)
+    assert get_transformer.cache_info().hits == hits + 2
+    assert get_transformer(source, target) is transformer
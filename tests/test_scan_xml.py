@@ -0,0 +1,77 @@
+"""
+Script scan_xml : nombre d'occurrences des éléments et nombre d'éléments
+portant chaque attribut.
+"""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+from conftest import ROOT_DIR
+from scan_xml import census_elements
+from telepac_synthetique import NAMESPACE_GML_URI, NAMESPACE_URI
+
+# Éléments telepac, gml, d'un autre namespace et sans namespace
+MIXED = f"""<?xml version="1.0" encoding="UTF-8"?>
+<producteurs xmlns="{NAMESPACE_URI}" xmlns:gml="{NAMESPACE_GML_URI}"
+    xmlns:ext="urn:extension">
+  <producteur numero-pacage="031000001">
+    <ext:note ext:auteur="x" niveau="1"/>
+    <rpg><ilots><ilot numero-ilot="1"><geometrie><gml:Polygon srsName="EPSG:2154">
+    </gml:Polygon></geometrie></ilot></ilots></rpg>
+    <commentaire xmlns="" niveau="2"><texte/></commentaire>
+  </producteur>
+</producteurs>
+"""
+
+
+def test_census_attributes(variant_files):
+    census = census_elements(variant_files["multi_producteurs"])
+    # Un attribut par ilot
+    assert census["elements"]["ilot"] == 13
+    assert census["attributes"]["numero-ilot"] == 13
+
+
+def test_scan_output(variant_files):
+    output = subprocess.run(
+        [sys.executable, "scan_xml.py", variant_files["multi_producteurs"]],
+        cwd=os.path.join(ROOT_DIR, "src"),
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout.splitlines()
+    assert "ilot - #13" in output
+    assert "@numero-ilot - #13 éléments portant l'attribut" in output
+    # Éléments puis attributs, chacun dans l'ordre alphabétique
+    attributes = [line for line in output if line.startswith("@")]
+    assert output[-len(attributes) :] == sorted(attributes)
+
+
+@pytest.mark.parametrize("mode", [{}, {"streaming": True}, {"mapped": True}])
+def test_census_namespaces(tmp_path, mode):
+    xml_file = tmp_path / "mixte.xml"
+    xml_file.write_text(MIXED, encoding="utf-8")
+    census = census_elements(str(xml_file), **mode)
+
+    # Éléments d'un namespace seulement, comme la liste des éléments connus
+    assert set(census["elements"]) == {
+        "producteurs",
+        "producteur",
+        "note",
+        "rpg",
+        "ilots",
+        "ilot",
+        "geometrie",
+        "Polygon",
+    }
+    assert census["namespaces"] == {
+        NAMESPACE_URI: 6,
+        "urn:extension": 1,
+        NAMESPACE_GML_URI: 1,
+    }
+    # Attributs des éléments telepac seulement
+    assert census["attributes"] == {"numero-pacage": 1, "numero-ilot": 1}
+    # Chemins de tous les éléments
+    assert census["paths"]["/producteurs/producteur/commentaire/texte"] == 1
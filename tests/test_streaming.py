@@ -0,0 +1,51 @@
+"""
+Lecture en flux (iterparse) : mêmes couches et même recensement des
+éléments que la lecture de l'arbre complet, avec les deux moteurs XML.
+"""
+
+import pytest
+from helpers import assert_layers_equal
+
+from extract_functions.backends import BACKENDS, parse
+from extract_functions.registry import extract_selected_layers
+from extract_functions.streaming import extract_layers_streaming, iter_records
+from scan_xml import census_elements
+from telepac_synthetique import NAMESPACE, NAMESPACE_GML
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+@pytest.mark.parametrize("layers", [None, ["sna", "demandeur"], ["sna_parcelles"]])
+def test_streaming_matches_tree(variant_files, backend, layers):
+    for xml_file in variant_files.values():
+        expected = extract_selected_layers(
+            parse(xml_file, backend=backend), NAMESPACE, NAMESPACE_GML, layers
+        )
+        streamed = extract_layers_streaming(
+            xml_file, NAMESPACE, NAMESPACE_GML, layers, backend=backend
+        )
+        assert_layers_equal(streamed, expected)
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_skeleton_has_no_records(telepac_file, backend):
+    tags = []
+    for tag, elem in iter_records(telepac_file, NAMESPACE, backend=backend):
+        if tag is None:
+            skeleton = elem
+        else:
+            tags.append(tag)
+
+    assert tags.count("ilot") == 30
+    assert tags.count("sna-declaree") == 40
+    assert tags.count("zdh-declaree") == 5
+    for tag in ("ilot", "sna-declaree", "zdh-declaree"):
+        assert next(skeleton.iter(f"{NAMESPACE}{tag}"), None) is None
+    assert next(skeleton.iter(f"{NAMESPACE}demandeur"), None) is not None
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_census_streaming_matches_tree(variant_files, backend):
+    for xml_file in variant_files.values():
+        assert census_elements(
+            xml_file, streaming=True, backend=backend
+        ) == census_elements(xml_file, backend=backend)
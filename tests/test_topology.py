@@ -0,0 +1,129 @@
+"""
+Contrôle et réparation des géométries (extract_functions.topology) sur des
+couches écrites à la main, en Lambert-93.
+"""
+
+import geopandas as gpd
+import pandas as pd
+import shapely
+
+from extract_functions.backends import parse
+from extract_functions.registry import extract_selected_layers
+from extract_functions.topology import (
+    CHEVAUCHEMENT,
+    HORS_ILOT,
+    INVALIDE,
+    REPORT_COLUMNS,
+    REPORT_LAYER,
+    check_layer_geometries,
+    parcelle_overlaps,
+    parcelles_outside,
+    repair_layer,
+)
+from telepac_synthetique import NAMESPACE, NAMESPACE_GML, write_telepac
+
+
+def parcelles(*rows):
+    """
+    Couche des parcelles : (ilot, numéro, géométrie) par parcelle.
+    """
+    ilots, numeros, geometries = zip(*rows)
+    return gpd.GeoDataFrame(
+        {"numero-ilot-reference": list(ilots), "numero-parcelle": list(numeros)},
+        geometry=list(geometries),
+        crs="EPSG:2154",
+    )
+
+
+def ilots(*rows):
+    """
+    Couche des ilots : (ilot, géométrie) par ilot.
+    """
+    numeros, geometries = zip(*rows)
+    return gpd.GeoDataFrame(
+        {"numero-ilot-reference": list(numeros)},
+        geometry=list(geometries),
+        crs="EPSG:2154",
+    )
+
+
+def test_repair_layer():
+    bowtie = shapely.Polygon([(0, 0), (10, 10), (10, 0), (0, 10), (0, 0)])
+    square = shapely.box(0, 0, 10, 10)
+    layer = ilots(("A", square), ("B", bowtie))
+
+    repaired, rows = repair_layer(layer, "ilots")
+    assert list(rows.columns) == REPORT_COLUMNS
+    assert rows[["couche", "controle", "identifiant"]].values.tolist() == [
+        ["ilots", INVALIDE, "B"]
+    ]
+    assert rows["detail"][0].startswith("Self-intersection")
+    assert repaired.geometry.is_valid.all()
+    assert repaired.geometry[0] == square
+    assert repaired.geometry[1].area == 50
+    # La couche d'origine n'est pas modifiée
+    assert layer.geometry[1] == bowtie
+
+
+def test_parcelle_overlaps():
+    layer = parcelles(
+        ("A", "1", shapely.box(0, 0, 100, 100)),
+        # 10 m x 100 m avec la parcelle 1
+        ("A", "2", shapely.box(90, 0, 190, 100)),
+        # 100 m x 0,005 m avec la parcelle 1 : sous la tolérance
+        ("A", "3", shapely.box(0, 99.995, 100, 200)),
+        # Autre ilot : ignorée
+        ("B", "1", shapely.box(50, 50, 150, 150)),
+    )
+    rows = parcelle_overlaps(layer)
+    assert rows[
+        ["controle", "identifiant", "identifiant-autre", "surface"]
+    ].values.tolist() == [[CHEVAUCHEMENT, "A/1", "A/2", 1000.0]]
+    # Sous la tolérance par défaut (AREA_TOLERANCE), retenue avec une plus faible
+    assert parcelle_overlaps(layer, tolerance=0.1)["identifiant-autre"].tolist() == [
+        "A/2",
+        "A/3",
+    ]
+
+
+def test_parcelles_outside():
+    layer = parcelles(
+        ("A", "1", shapely.box(10, 10, 50, 50)),
+        # Déborde de 10 m x 100 m
+        ("A", "2", shapely.box(90, 0, 110, 100)),
+        # Déborde de 0,005 m x 100 m : sous la tolérance
+        ("A", "3", shapely.box(0, 0, 100.005, 100)),
+        ("Z", "1", shapely.box(0, 0, 10, 10)),
+    )
+    rows = parcelles_outside(layer, ilots(("A", shapely.box(0, 0, 100, 100))))
+    assert rows[
+        ["controle", "identifiant", "identifiant-autre", "surface"]
+    ].values.tolist() == [
+        [HORS_ILOT, "A/2", "A", 1000.0],
+        [HORS_ILOT, "Z/1", "Z", 100.0],
+    ]
+    assert pd.isna(rows["detail"][0]) and rows["detail"][1] == "ilot absent"
+
+
+def test_empty_layers():
+    # Couche vide extraite : aucune colonne
+    empty = pd.DataFrame()
+    layer = ilots(("A", shapely.box(0, 0, 100, 100)))
+    for rows in (
+        parcelle_overlaps(empty),
+        parcelles_outside(empty, layer),
+        parcelles_outside(parcelles(("A", "1", shapely.box(0, 0, 1, 1))), empty),
+    ):
+        assert list(rows.columns) == REPORT_COLUMNS
+        assert rows.empty
+
+
+def test_declaration_without_parcelles(tmp_path):
+    xml_file = str(tmp_path / "sans_parcelles.xml")
+    write_telepac(xml_file, nb_ilots=3, nb_parcelles=0)
+    layers = extract_selected_layers(parse(xml_file), NAMESPACE, NAMESPACE_GML)
+    assert len(layers["ilots"]) == 3 and layers["parcelles"].empty
+
+    checked = check_layer_geometries(layers)
+    assert list(checked[REPORT_LAYER].columns) == REPORT_COLUMNS
+    assert checked[REPORT_LAYER].empty
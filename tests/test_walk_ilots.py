@@ -0,0 +1,24 @@
+"""
+Parcours unique des ilots (walk_ilots) : mêmes couches que les extracteurs
+appelés un par un.
+"""
+
+import pandas as pd
+import pytest
+
+from extract_functions.backends import parse
+from extract_functions.registry import ILOT_LAYERS, load
+from extract_functions.walk_ilots import extract_ilot_layers
+from telepac_synthetique import NAMESPACE, NAMESPACE_GML
+
+
+@pytest.mark.parametrize("layers", [None, ["parcelles"], ["maec", "ilots"]])
+def test_walk_matches_extractors(telepac_file, layers):
+    xml_root = parse(telepac_file)
+    extracted = extract_ilot_layers(xml_root, NAMESPACE, NAMESPACE_GML, layers)
+
+    assert list(extracted) == list(layers or ILOT_LAYERS)
+    for layer, gdf in extracted.items():
+        extract = load(f"extract_{layer}", f"extract_{layer}")
+        expected = extract(xml_root, NAMESPACE, NAMESPACE_GML)
+        pd.testing.assert_frame_equal(gdf, expected, obj=layer)